@@ -0,0 +1,736 @@
+import argparse
+import json
+import os
+import random
+import secrets
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.client import HTTPConnection
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+import auth
+from models import Administrator, Lecturer, Student, Course, Group, Grade
+from database_repository import DATABASE_NAME, DB_PATH_ENV, DatabaseRepository
+from write_coalescer import GradeWriteCoalescer
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# Requests are handled by a fixed pool of threads sharing one thread-safe repository
+DEFAULT_WORKERS = 16
+# Connections waiting for a worker; the socketserver default of 5 refuses clients under load
+LISTEN_BACKLOG = 1024
+
+# A session ends after this long without a request
+SESSION_TTL_SECONDS = 8 * 60 * 60
+# Read results are served from memory for this long. Writes made through the API drop the affected
+# entries at once; writes made by CLI/GUI sessions on the same file show up once the entry expires.
+CACHE_TTL_SECONDS = 5.0
+CACHE_MAX_ENTRIES = 10000
+MAX_BODY_BYTES = 1024 * 1024
+MAX_PAGE_SIZE = 500
+SEARCH_LIMIT = 50
+
+USER_CLASSES = {"admin": Administrator, "lecturer": Lecturer, "student": Student}
+
+
+class ApiError(Exception):
+    """An error reported to the client as {"error": message} with the given HTTP status."""
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class TTLCache:
+    """
+    Thread-safe cache of read results. Each entry names the data areas it was built from ("users",
+    "grades", ...); invalidate(area) makes every entry built from that area stale in O(1).
+    """
+    def __init__(self, ttl=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def get_or_load(self, key, areas, loader):
+        """Returns the cached value for `key`, or calls loader() and caches its result."""
+        now = time.monotonic()
+        with self._lock:
+            generations = tuple(self._generations.get(area, 0) for area in areas)
+            entry = self._entries.get(key)
+            if entry and entry[0] > now and entry[1] == generations:
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+        value = loader()
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries.clear()
+            # Stored with the generations seen before loading: a write made meanwhile leaves it stale
+            self._entries[key] = (now + self.ttl, generations, value)
+        return value
+
+    def invalidate(self, *areas):
+        with self._lock:
+            for area in areas:
+                self._generations[area] = self._generations.get(area, 0) + 1
+
+
+class SessionStore:
+    """Bearer tokens issued at login, mapped to the logged-in user; expiry slides with every request."""
+    def __init__(self, ttl=SESSION_TTL_SECONDS):
+        self.ttl = ttl
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def create(self, user):
+        token = secrets.token_urlsafe(32)
+        with self._lock:
+            self._sessions[token] = [user, time.monotonic() + self.ttl]
+        return token
+
+    def get(self, token):
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.get(token)
+            if session is None:
+                return None
+            if session[1] <= now:
+                del self._sessions[token]
+                return None
+            session[1] = now + self.ttl
+            return session[0]
+
+    def drop(self, token):
+        with self._lock:
+            self._sessions.pop(token, None)
+
+    def drop_user(self, user_id):
+        """Ends every session of a user (after the account is deleted)."""
+        with self._lock:
+            for token in [t for t, (user, _) in self._sessions.items() if user["id"] == user_id]:
+                del self._sessions[token]
+
+    def __len__(self):
+        return len(self._sessions)
+
+
+def _int_param(params, name, default=None, minimum=None, maximum=None):
+    value = params.get(name, default)
+    if value is None:
+        raise ApiError(400, f"Missing parameter '{name}'")
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise ApiError(400, f"Parameter '{name}' must be an integer")
+    if minimum is not None:
+        value = max(minimum, value)
+    if maximum is not None:
+        value = min(maximum, value)
+    return value
+
+
+def _str_param(params, name):
+    value = params.get(name)
+    if not isinstance(value, str) or not value.strip():
+        raise ApiError(400, f"Missing parameter '{name}'")
+    return value.strip()
+
+
+class ApiService:
+    """
+    The operations of the CLI and GUI as JSON endpoints, independent of HTTP.
+    `routes` maps (method, path) to (required role, handler name); a role of None needs no
+    session and "any" accepts every logged-in user. Handlers take (user, params).
+    """
+    routes = {
+        ("POST", "/login"): (None, "login"),
+        ("POST", "/logout"): ("any", "logout"),
+        ("GET", "/me"): ("any", "me"),
+        ("GET", "/users"): ("admin", "list_users"),
+        ("POST", "/users"): ("admin", "create_user"),
+        ("DELETE", "/users"): ("admin", "delete_user"),
+        ("GET", "/users/search"): ("admin", "search_users"),
+        ("GET", "/courses"): ("admin", "list_courses"),
+        ("POST", "/courses"): ("admin", "create_course"),
+        ("DELETE", "/courses"): ("admin", "delete_course"),
+        ("GET", "/courses/search"): ("admin", "search_courses"),
+        ("POST", "/courses/lecturer"): ("admin", "assign_lecturer"),
+        ("GET", "/groups"): ("admin", "list_groups"),
+        ("POST", "/groups"): ("admin", "create_group"),
+        ("DELETE", "/groups"): ("admin", "delete_group"),
+        ("GET", "/groups/members"): ("admin", "group_members"),
+        ("POST", "/groups/assign"): ("admin", "assign_to_groups"),
+        ("POST", "/groups/rollover"): ("admin", "rollover_groups"),
+        ("GET", "/lecturer/rosters"): ("lecturer", "lecturer_rosters"),
+        ("POST", "/lecturer/grades"): ("lecturer", "save_grades"),
+        ("GET", "/student/grades"): ("student", "student_grades"),
+        ("GET", "/student/courses"): ("student", "student_courses"),
+        ("GET", "/stats"): ("admin", "stats"),
+    }
+
+    def __init__(self, repo, cache=None, sessions=None):
+        self.repo = repo
+        self.cache = cache or TTLCache()
+        self.sessions = sessions or SessionStore()
+        # Grade saves from concurrent lecturers are group-committed together
+        self.grade_writer = GradeWriteCoalescer(repo)
+
+    def close(self):
+        self.grade_writer.close()
+        self.repo.close()
+
+    def handle(self, method, path, params, token):
+        """Runs one request. Returns (HTTP status, JSON-serializable payload); raises ApiError."""
+        route = self.routes.get((method, path))
+        if route is None:
+            if any(route_path == path for _, route_path in self.routes):
+                raise ApiError(405, f"{method} is not allowed on {path}")
+            raise ApiError(404, f"No endpoint at {path}")
+        role, handler_name = route
+        user = None
+        if role is not None:
+            user = self.sessions.get(token) if token else None
+            if user is None:
+                raise ApiError(401, "Login required")
+            if role != "any" and user["role"] != role:
+                raise ApiError(403, f"Only {role}s can do this")
+        result = getattr(self, handler_name)(user, params)
+        if method == "POST" and path != "/login" and isinstance(result, dict) and "id" in result:
+            return 201, result
+        return 200, result
+
+    # --- Sessions ---
+
+    def login(self, user, params):
+        username = _str_param(params, "username")
+        password = params.get("password") or ""
+        user_obj = auth.get_user_by_username(self.repo, username)
+        # The only bcrypt check of a session; every later request is authenticated by its token
+        if not user_obj or not auth.check_password(user_obj.password_hash, password):
+            raise ApiError(401, "Invalid username or password")
+        user = user_obj.to_dict()
+        return {"token": self.sessions.create(user), "user": user}
+
+    def logout(self, user, params):
+        self.sessions.drop(params.get("_token"))
+        return {"logged_out": True}
+
+    def me(self, user, params):
+        return user
+
+    # --- Admin ---
+
+    def list_users(self, user, params):
+        return self._listing("users", params)
+
+    def list_courses(self, user, params):
+        return self._listing("courses", params)
+
+    def list_groups(self, user, params):
+        return self._listing("groups", params)
+
+    def _listing(self, listing, params):
+        offset = _int_param(params, "offset", 0, minimum=0)
+        limit = _int_param(params, "limit", 100, minimum=1, maximum=MAX_PAGE_SIZE)
+        order_by = params.get("order_by", "id")
+        descending = params.get("descending") in ("1", "true", True)
+        areas = {"users": ("users",), "courses": ("courses", "users"), "groups": ("groups",)}[listing]
+
+        def load():
+            try:
+                rows = self.repo.find_listing_page(listing, offset, limit, order_by, descending)
+            except ValueError as e:
+                raise ApiError(400, str(e))
+            return {"total": self.repo.count_listing(listing), "rows": rows}
+        return self.cache.get_or_load(("listing", listing, offset, limit, order_by, descending), areas, load)
+
+    def search_users(self, user, params):
+        text = params.get("q", "")
+        role = params.get("role")
+        return self.cache.get_or_load(("search users", text, role), ("users",),
+                                      lambda: self.repo.search_users(text, limit=SEARCH_LIMIT, role=role))
+
+    def search_courses(self, user, params):
+        text = params.get("q", "")
+        return self.cache.get_or_load(("search courses", text), ("courses", "users"),
+                                      lambda: self.repo.search_courses(text, limit=SEARCH_LIMIT))
+
+    def create_user(self, user, params):
+        role = params.get("role")
+        if role not in USER_CLASSES:
+            raise ApiError(400, f"Role must be one of: {', '.join(USER_CLASSES)}")
+        new_user = USER_CLASSES[role](None, _str_param(params, "name"), _str_param(params, "surname"),
+                                      _str_param(params, "username"),
+                                      auth.hash_password(_str_param(params, "password")))
+        success, msg, new_id = self.repo.insert_one("users", new_user)
+        if not success:
+            raise ApiError(409, msg)
+        self.cache.invalidate("users")
+        return {"id": new_id}
+
+    def delete_user(self, user, params):
+        user_id = _int_param(params, "id")
+        if user_id == user["id"]:
+            raise ApiError(400, "You cannot delete your own account")
+        if not self.repo.delete_one("users", user_id):
+            raise ApiError(404, "User not found")
+        self.sessions.drop_user(user_id)
+        # Deleting a user cascades to their grades and memberships and unassigns their courses
+        self.cache.invalidate("users", "grades", "groups", "courses")
+        return {"deleted": user_id}
+
+    def create_course(self, user, params):
+        lecturer_id = _int_param(params, "lecturer_id") if params.get("lecturer_id") else None
+        success, msg, new_id = self.repo.insert_one("courses", Course(None, _str_param(params, "name"), lecturer_id))
+        if not success:
+            raise ApiError(409, msg)
+        self.cache.invalidate("courses")
+        return {"id": new_id}
+
+    def delete_course(self, user, params):
+        course_id = _int_param(params, "id")
+        if not self.repo.delete_one("courses", course_id):
+            raise ApiError(404, "Course not found")
+        self.cache.invalidate("courses", "grades", "groups")
+        return {"deleted": course_id}
+
+    def assign_lecturer(self, user, params):
+        course_id = _int_param(params, "course_id")
+        lecturer_id = _int_param(params, "lecturer_id") if params.get("lecturer_id") else None
+        if lecturer_id is not None:
+            lecturer = self.repo.find_one("users", {"id": lecturer_id, "role": "lecturer"})
+            if not lecturer:
+                raise ApiError(404, "Lecturer not found")
+        if not self.repo.update_one("courses", course_id, {"lecturer_id": lecturer_id}):
+            raise ApiError(404, "Course not found")
+        self.cache.invalidate("courses")
+        return {"course_id": course_id, "lecturer_id": lecturer_id}
+
+    def create_group(self, user, params):
+        success, msg, new_id = self.repo.insert_one("groups", Group(None, _str_param(params, "name")))
+        if not success:
+            raise ApiError(409, msg)
+        self.cache.invalidate("groups")
+        return {"id": new_id}
+
+    def delete_group(self, user, params):
+        group_id = _int_param(params, "id")
+        if not self.repo.delete_one("groups", group_id):
+            raise ApiError(404, "Group not found")
+        self.cache.invalidate("groups")
+        return {"deleted": group_id}
+
+    def group_members(self, user, params):
+        group_id = _int_param(params, "id")
+
+        def load():
+            students, courses = self.repo.find_group_members(group_id)
+            return {"students": students, "courses": courses}
+        return self.cache.get_or_load(("group members", group_id), ("groups", "users", "courses"), load)
+
+    def assign_to_groups(self, user, params):
+        link_table = {"students": "group_students", "courses": "group_courses"}.get(params.get("members_of"))
+        if link_table is None:
+            raise ApiError(400, "members_of must be 'students' or 'courses'")
+        success, result = self.repo.assign_to_groups(link_table, params.get("members") or [],
+                                                     params.get("groups") or [], params.get("key", "id"))
+        if not success:
+            raise ApiError(400, result)
+        self.cache.invalidate("groups")
+        return result
+
+    def rollover_groups(self, user, params):
+        success, result = self.repo.rollover_groups(
+            params.get("groups") or [], params.get("find", ""), params.get("replace", ""), params.get("suffix", ""),
+            copy_courses=params.get("copy_courses", True), copy_students=params.get("copy_students", False),
+            dry_run=params.get("dry_run", False))
+        if not success:
+            raise ApiError(409, result)
+        if not result["dry_run"]:
+            self.cache.invalidate("groups")
+        return result
+
+    def stats(self, user, params):
+        return {"sessions": len(self.sessions), "cache_hits": self.cache.hits, "cache_misses": self.cache.misses,
+                "writes": getattr(self.repo, "write_stats", None), "grade_writes": self.grade_writer.stats}
+
+    # --- Lecturer ---
+
+    def lecturer_rosters(self, user, params):
+        lecturer_id = user["id"]
+
+        def load():
+            names = {c.id: c.name for c in self.repo.find_all("courses", {"lecturer_id": lecturer_id})}
+            rosters = self.repo.find_course_rosters(lecturer_id)
+            return [{"course_id": course_id, "course": names.get(course_id), "students": roster}
+                    for course_id, roster in rosters.items()]
+        return self.cache.get_or_load(("rosters", lecturer_id), ("courses", "groups", "grades", "users"), load)
+
+    def save_grades(self, user, params):
+        """
+        Saves [{"student_id", "course_id", "value"}, ...] in one transaction, only for the lecturer's courses
+        and the students on their rosters.
+        """
+        entries = params.get("grades")
+        if not isinstance(entries, list) or not entries:
+            raise ApiError(400, "Expected a non-empty 'grades' list")
+        # {course_id: {student_id, ...}} for every course the lecturer teaches, including empty ones
+        rosters = self.cache.get_or_load(
+            ("lecturer roster ids", user["id"]), ("courses", "groups", "users"),
+            lambda: {course_id: {entry["student_id"] for entry in roster}
+                     for course_id, roster in self.repo.find_course_rosters(user["id"]).items()})
+        grades = []
+        for entry in entries:
+            try:
+                student_id, course_id = int(entry["student_id"]), int(entry["course_id"])
+                value = Grade.parse_value(str(entry["value"]))
+            except (KeyError, TypeError, ValueError) as e:
+                raise ApiError(400, f"Invalid grade {entry!r}: {e}")
+            if course_id not in rosters:
+                raise ApiError(403, f"Course {course_id} is not taught by you")
+            if student_id not in rosters[course_id]:
+                raise ApiError(403, f"Student {student_id} is not on the roster of course {course_id}")
+            grades.append((student_id, course_id, value))
+        success, result = self.grade_writer.submit_many(grades).result()
+        if not success:
+            raise ApiError(400, result)
+        self.cache.invalidate("grades")
+        return {"saved": result}
+
+    # --- Student ---
+
+    def student_grades(self, user, params):
+        return self.cache.get_or_load(("student grades", user["id"]), ("grades", "courses"),
+                                      lambda: self.repo.find_student_grades(user["id"]))
+
+    def student_courses(self, user, params):
+        return self.cache.get_or_load(("student courses", user["id"]), ("groups", "courses", "users", "grades"),
+                                      lambda: self.repo.find_student_courses(user["id"]))
+
+
+class ApiRequestHandler(BaseHTTPRequestHandler):
+    server_version = "AcademicSystemAPI/1.0"
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    def _dispatch(self, method):
+        url = urlsplit(self.path)
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            if length > MAX_BODY_BYTES:
+                raise ApiError(413, "Request body too large")
+            if length:
+                try:
+                    body = json.loads(self.rfile.read(length))
+                except ValueError:
+                    raise ApiError(400, "Request body is not valid JSON")
+                if not isinstance(body, dict):
+                    raise ApiError(400, "Request body must be a JSON object")
+                params.update(body)
+            header = self.headers.get("Authorization", "")
+            token = header[len("Bearer "):].strip() if header.startswith("Bearer ") else None
+            params["_token"] = token
+            status, payload = self.server.service.handle(method, url.path, params, token)
+        except ApiError as e:
+            status, payload = e.status, {"error": str(e)}
+        except Exception as e:
+            self.log_error("Unhandled error on %s %s: %r", method, url.path, e)
+            status, payload = 500, {"error": "Internal server error"}
+        self._send_json(status, payload)
+
+    def _send_json(self, status, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class PooledHTTPServer(HTTPServer):
+    """HTTPServer handing each connection to a fixed pool of worker threads instead of a thread per request."""
+    request_queue_size = LISTEN_BACKLOG
+
+    def __init__(self, address, service, workers=DEFAULT_WORKERS, verbose=False):
+        super().__init__(address, ApiRequestHandler)
+        self.service = service
+        self.verbose = verbose
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="api-worker")
+
+    def process_request(self, request, client_address):
+        self._pool.submit(self._process_request, request, client_address)
+
+    def _process_request(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self._pool.shutdown(wait=True)
+
+
+def create_server(db_path=None, host=DEFAULT_HOST, port=DEFAULT_PORT, workers=DEFAULT_WORKERS, verbose=False):
+    """Opens the database in thread-safe mode and returns a ready (not yet serving) PooledHTTPServer."""
+    repo = DatabaseRepository(db_path, thread_safe=True)
+    auth.seed_initial_admin_if_needed(repo)
+    return PooledHTTPServer((host, port), ApiService(repo), workers, verbose)
+
+
+def serve(db_path=None, host=DEFAULT_HOST, port=DEFAULT_PORT, workers=DEFAULT_WORKERS, verbose=False):
+    server = create_server(db_path, host, port, workers, verbose)
+    print(f"Serving '{server.service.repo.db_path}' on http://{host}:{server.server_address[1]} "
+          f"with {workers} workers (Ctrl+C to stop)", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.service.close()
+
+
+# --- Load test ---
+
+class ApiClient:
+    """Minimal JSON client used by the load test (one HTTP/1.0 connection per request, like a browser without keep-alive)."""
+    def __init__(self, host, port, timeout=30):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.token = None
+
+    def request(self, method, path, params=None, body=None):
+        if params:
+            path = f"{path}?{urlencode(params)}"
+        headers = {"Content-Type": "application/json"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        conn = HTTPConnection(self.host, self.port, timeout=self.timeout)
+        try:
+            conn.request(method, path, json.dumps(body) if body is not None else None, headers)
+            response = conn.getresponse()
+            return response.status, json.loads(response.read() or b"null")
+        finally:
+            conn.close()
+
+
+def _load_test_user(client, role, deadline, think_seconds, rng, record):
+    rosters = None
+    while time.perf_counter() < deadline:
+        if role == "student":
+            operation, method, path, params, body = ("student grades", "GET", "/student/grades", None, None) \
+                if rng.random() < 0.7 else ("student courses", "GET", "/student/courses", None, None)
+        elif role == "lecturer":
+            if rosters is None or rng.random() < 0.5:
+                operation, method, path, params, body = "lecturer rosters", "GET", "/lecturer/rosters", None, None
+            else:
+                course = rng.choice(rosters)
+                student = rng.choice(course["students"])
+                operation, method, path, params, body = "save grade", "POST", "/lecturer/grades", None, {
+                    "grades": [{"student_id": student["student_id"], "course_id": course["course_id"],
+                                "value": rng.randint(0, 100)}]}
+        else:
+            if rng.random() < 0.5:
+                operation, method, path, params, body = "admin users page", "GET", "/users", {
+                    "offset": rng.randrange(0, 1000), "limit": 50, "order_by": "surname"}, None
+            else:
+                operation, method, path, params, body = "admin search", "GET", "/users/search", {
+                    "q": rng.choice("abcdefghilmnoprst") + rng.choice("aeiou")}, None
+        started = time.perf_counter()
+        try:
+            status, payload = client.request(method, path, params, body)
+        except OSError:
+            status = 0
+        record(operation, time.perf_counter() - started, status)
+        if operation == "lecturer rosters" and status == 200:
+            rosters = [course for course in payload if course["students"]] or None
+        if think_seconds:
+            time.sleep(rng.uniform(0, 2 * think_seconds))
+
+
+def run_load_test(host, port, accounts, users=200, seconds=10.0, think_seconds=0.0, seed=0):
+    """
+    Logs every account in `accounts` ([(role, username, password)]) in once, then simulates `users`
+    concurrent users spread over those sessions, each looping over its role's requests until the time
+    is up. Logins are timed but happen before the measured window: each is a deliberately slow bcrypt check.
+    Returns {operation: stats} plus an "overall" entry with requests per second.
+    """
+    timings = {}
+    lock = threading.Lock()
+
+    def record(operation, elapsed, status):
+        with lock:
+            entry = timings.setdefault(operation, {"times": [], "errors": 0})
+            entry["times"].append(elapsed)
+            entry["errors"] += not 200 <= status < 300
+
+    sessions = []
+
+    def log_in(role, username, password):
+        client = ApiClient(host, port)
+        started = time.perf_counter()
+        status, payload = client.request("POST", "/login", body={"username": username, "password": password})
+        record("login", time.perf_counter() - started, status)
+        if status == 200:
+            with lock:
+                sessions.append((role, payload["token"]))
+
+    login_threads = [threading.Thread(target=log_in, args=account) for account in accounts]
+    for thread in login_threads:
+        thread.start()
+    for thread in login_threads:
+        thread.join()
+    if not sessions:
+        raise RuntimeError("No simulated account could log in")
+    sessions.sort()
+
+    def user_client(token):
+        client = ApiClient(host, port)
+        client.token = token
+        return client
+
+    deadline = time.perf_counter() + seconds
+    threads = [threading.Thread(target=_load_test_user,
+                                args=(user_client(token), role, deadline, think_seconds,
+                                      random.Random(seed + i), record), daemon=True)
+               for i, (role, token) in enumerate(sessions[i % len(sessions)] for i in range(users))]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    results = {}
+    for operation, entry in sorted(timings.items()):
+        times = sorted(t * 1000 for t in entry["times"])
+        results[operation] = {
+            "requests": len(times),
+            "errors": entry["errors"],
+            "p50_ms": round(times[len(times) // 2], 2),
+            "p95_ms": round(times[min(len(times) - 1, int(len(times) * 0.95))], 2),
+            "p99_ms": round(times[min(len(times) - 1, int(len(times) * 0.99))], 2),
+        }
+    total = sum(entry["requests"] for name, entry in results.items() if name != "login")
+    results["overall"] = {"requests": total, "requests_per_s": round(total / elapsed, 1),
+                          "errors": sum(entry["errors"] for entry in results.values())}
+    return results
+
+
+def _free_port():
+    with socket.socket() as probe:
+        probe.bind((DEFAULT_HOST, 0))
+        return probe.getsockname()[1]
+
+
+def _wait_for_port(host, port, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection((host, port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"The API server did not start on {host}:{port}")
+
+
+def load_test_main(args):
+    import dataset_generator
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        db_path = args.db
+        if not db_path:
+            db_path = os.path.join(work_dir, "api_load.db")
+            print(f"Generating '{args.preset}' dataset...", flush=True)
+            dataset_generator.generate_preset(db_path, preset=args.preset)
+        repo = DatabaseRepository(db_path)
+        # Share of the accounts (and so of the simulated users) per role
+        mix = {"student": 0.85, "lecturer": 0.12, "admin": 0.03}
+        accounts = []
+        for role, share in mix.items():
+            role_users = repo.find_all("users", {"role": role})[:max(1, round(args.accounts * share))]
+            accounts += [(role, u.username, dataset_generator.PREHASHED_PASSWORD) for u in role_users
+                         if u.username != "admin.user"]
+        if not any(role == "admin" for role, _, _ in accounts):
+            accounts.append(("admin", "admin.user", "user")) # Seeded by the server on an empty admin table
+
+        port = _free_port()
+        server = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--db", db_path, "serve",
+                                   "--port", str(port), "--workers", str(args.workers)],
+                                  stdout=subprocess.DEVNULL)
+        try:
+            _wait_for_port(DEFAULT_HOST, port)
+            print(f"{args.users} simulated users on {len(accounts)} accounts for {args.seconds:.0f}s "
+                  f"against {args.workers} server workers...", flush=True)
+            results = run_load_test(DEFAULT_HOST, port, accounts, args.users, args.seconds,
+                                    args.think_ms / 1000, args.seed)
+        finally:
+            server.terminate()
+            server.wait()
+
+    for operation, stats in results.items():
+        if operation == "overall":
+            continue
+        print(f"  {operation:<20} {stats['requests']:>7} requests  p50 {stats['p50_ms']:>8.2f} ms  "
+              f"p95 {stats['p95_ms']:>8.2f} ms  p99 {stats['p99_ms']:>8.2f} ms  errors {stats['errors']}")
+    overall = results["overall"]
+    print(f"Overall: {overall['requests_per_s']} requests/s ({overall['requests']} requests, "
+          f"{overall['errors']} errors; logins excluded)")
+    return 1 if overall["errors"] else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON API over the academic system database, and its load test.")
+    parser.add_argument("--db", help=f"Database file (default: ${DB_PATH_ENV}, or {DATABASE_NAME}; load test: a generated one).")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = commands.add_parser("serve", help="Run the API server.")
+    serve_parser.add_argument("--host", default=DEFAULT_HOST)
+    serve_parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve_parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    serve_parser.add_argument("--verbose", action="store_true", help="Log every request.")
+
+    load_parser = commands.add_parser("loadtest", help="Start a server on a generated dataset and load it.")
+    load_parser.add_argument("--preset", default="department", help="Dataset preset when --db is not given.")
+    load_parser.add_argument("--users", type=int, default=200, help="Concurrent simulated users.")
+    load_parser.add_argument("--accounts", type=int, default=20,
+                             help="Distinct accounts logged in (one bcrypt check each); users share their sessions.")
+    load_parser.add_argument("--seconds", type=float, default=10.0)
+    load_parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Server worker threads.")
+    load_parser.add_argument("--think-ms", type=float, default=0.0, help="Mean pause between a user's requests.")
+    load_parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        serve(args.db, args.host, args.port, args.workers, args.verbose)
+    else:
+        sys.exit(load_test_main(args))
+
+
+if __name__ == "__main__":
+    main()
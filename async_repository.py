@@ -0,0 +1,120 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from database_repository import DatabaseRepository
+
+# Reader threads, and so at most this many read connections, per async repository
+DEFAULT_MAX_WORKERS = 4
+# Seconds a call may take before it is abandoned (None waits forever); each call can override it
+DEFAULT_TIMEOUT = 30.0
+# Rows fetched per query by stream()
+DEFAULT_STREAM_BATCH = 500
+
+
+class AsyncDatabaseRepository:
+    """
+    DatabaseRepository for asyncio code: the same calls, as coroutines, without blocking the event loop.
+    Reads run on a fixed pool of worker threads, each with its own connection; writes go to the
+    thread-safe repository's single writer thread. Every call takes an optional `timeout`.
+    Cancelling a call (or running out of time) interrupts a read that is running, and drops a write
+    that has not started yet; a write the writer thread has already started still commits.
+    Example:
+        async with AsyncDatabaseRepository("academic_system.db") as repo:
+            student = await repo.find_one("users", {"username": "student1"})
+            async for grade in repo.stream("grades", {"course_id": 3}):
+                ...
+    """
+    def __init__(self, db_path=None, profile=None, max_workers=DEFAULT_MAX_WORKERS, timeout=DEFAULT_TIMEOUT):
+        self.repo = DatabaseRepository(db_path, profile, thread_safe=True)
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="async-db")
+        self._lock = threading.Lock() # Guards which worker thread runs which read, for interrupts
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, traceback):
+        self.close()
+
+    def close(self):
+        """Waits for running calls, drops queued reads and stops the writer once queued writes are done."""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self.repo.close()
+
+    def _run_read(self, call, method_name, args):
+        with self._lock:
+            if call["abandoned"]:
+                return None
+            call["thread"] = threading.get_ident()
+        try:
+            return getattr(self.repo, method_name)(*args)
+        finally:
+            with self._lock:
+                call["thread"] = None
+
+    async def _read(self, method_name, *args, timeout=None):
+        call = {"thread": None, "abandoned": False}
+        loop = asyncio.get_running_loop()
+        try:
+            return await asyncio.wait_for(loop.run_in_executor(self._executor, self._run_read, call, method_name, args),
+                                          timeout if timeout is not None else self.timeout)
+        except (asyncio.CancelledError, asyncio.TimeoutError):
+            with self._lock:
+                call["abandoned"] = True
+                if call["thread"] is not None:
+                    self.repo.interrupt(call["thread"]) # Free the worker instead of finishing a query nobody awaits
+            raise
+
+    async def _write(self, method_name, *args, timeout=None):
+        future = self.repo.submit_write(method_name, *args)
+        return await asyncio.wait_for(asyncio.wrap_future(future), timeout if timeout is not None else self.timeout)
+
+    async def find_one(self, collection_name, query, timeout=None):
+        return await self._read("find_one", collection_name, query, timeout=timeout)
+
+    async def find_all(self, collection_name, query={}, timeout=None):
+        return await self._read("find_all", collection_name, query, timeout=timeout)
+
+    async def find_listing_page(self, listing, offset, limit, order_by="id", descending=False, timeout=None):
+        return await self._read("find_listing_page", listing, offset, limit, order_by, descending, timeout=timeout)
+
+    async def find_student_grades(self, student_id, timeout=None):
+        return await self._read("find_student_grades", student_id, timeout=timeout)
+
+    async def stream(self, collection_name, query={}, batch_size=DEFAULT_STREAM_BATCH, timeout=None):
+        """
+        Yields the matching objects one by one, fetching `batch_size` rows per query, so a large table is
+        never held in memory at once. `timeout` applies to each batch.
+        Example: async for user in repo.stream("users", {"role": "student"}): ...
+        """
+        after = 0
+        while after is not None:
+            objects, after = await self._read("find_batch", collection_name, query, after, batch_size,
+                                              timeout=timeout)
+            for obj in objects:
+                yield obj
+
+    async def insert_one(self, collection_name, obj, timeout=None):
+        return await self._write("insert_one", collection_name, obj, timeout=timeout)
+
+    async def update_one(self, collection_name, obj_id, updates, timeout=None):
+        return await self._write("update_one", collection_name, obj_id, updates, timeout=timeout)
+
+    async def delete_one(self, collection_name, obj_id, timeout=None):
+        return await self._write("delete_one", collection_name, obj_id, timeout=timeout)
+
+    async def upsert_grades_many(self, grades, timeout=None):
+        return await self._write("upsert_grades_many", grades, timeout=timeout)
+
+    async def add_student_to_group(self, group_id, student_id, timeout=None):
+        return await self._write("add_student_to_group", group_id, student_id, timeout=timeout)
+
+    async def remove_student_from_group(self, group_id, student_id, timeout=None):
+        return await self._write("remove_student_from_group", group_id, student_id, timeout=timeout)
+
+    async def add_course_to_group(self, group_id, course_id, timeout=None):
+        return await self._write("add_course_to_group", group_id, course_id, timeout=timeout)
+
+    async def remove_course_from_group(self, group_id, course_id, timeout=None):
+        return await self._write("remove_course_from_group", group_id, course_id, timeout=timeout)
@@ -1,13 +1,16 @@
-import bcrypt
 from models import Administrator
-from database_repository import DATABASE_NAME
+
+# bcrypt is imported inside the functions below: it is only needed at login and
+# when creating users, so keeping it off the import path speeds up startup.
 
 def hash_password(password):
     """Hashes a plaintext password using bcrypt."""
+    import bcrypt
     return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
 
 def check_password(hashed_password, password):
     """Verifies a plaintext password against a bcrypt hashed password."""
+    import bcrypt
     try:
         return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
     except ValueError:
@@ -40,7 +43,7 @@ def seed_initial_admin_if_needed(repository):
             print(f"\n--- Initial Administrator created ---")
             print(f"Username: {username}")
             print(f"Password: {password}")
-            print(f"This data is now stored in '{DATABASE_NAME}'.")
+            print(f"This data is now stored in '{repository.db_path}'.")
             print(f"-------------------------------------\n")
         else:
             print(f"\n--- Failed to seed initial admin: {msg} ---")
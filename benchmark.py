@@ -0,0 +1,506 @@
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import main
+import dataset_generator
+from models import Group, Course, Lecturer, Student
+from database_repository import DatabaseRepository, busy_retry_stats, reset_busy_retry_stats
+from query_counter import QueryCounter
+
+DEFAULT_BASELINE = "benchmark_baseline.json"
+DEFAULT_SIZES = "small,department"
+
+# Entry-point modules whose cold import time is tracked as part of the startup benchmark
+STARTUP_MODULES = ["main", "gui_app"]
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Differences below these floors are treated as noise, whatever the relative change
+MIN_LATENCY_DELTA_MS = 0.5
+MIN_MEMORY_DELTA_KIB = 64
+
+# Concurrent sessions benchmark: connection profiles compared, and the share of operations that save a grade
+CONCURRENCY_PROFILES = ("legacy", "default")
+CONCURRENCY_WRITE_RATIO = 0.2
+
+
+def _pick_samples(repo):
+    """Chooses representative ids from a generated dataset for the benchmark cases."""
+    students = repo.find_all("users", {"role": "student"})
+    lecturers = repo.find_all("users", {"role": "lecturer"})
+    courses = repo.find_all("courses")
+
+    courses_per_lecturer = {}
+    for course in courses:
+        if course.lecturer_id:
+            courses_per_lecturer[course.lecturer_id] = courses_per_lecturer.get(course.lecturer_id, 0) + 1
+    busiest_lecturer_id = max(courses_per_lecturer, key=courses_per_lecturer.get) if courses_per_lecturer else lecturers[0].id
+
+    enrolled_student_id = students[0].id
+    for student in students:
+        if repo.find_all("group_students", {"student_id": student.id}):
+            enrolled_student_id = student.id
+            break
+
+    taught_course_id = courses[0].id
+    for course in courses:
+        if repo.find_all("group_courses", {"course_id": course.id}):
+            taught_course_id = course.id
+            break
+
+    grade = repo.find_one("grades", {"student_id": enrolled_student_id}) or repo.find_all("grades")[0]
+    student = repo.find_one("users", {"id": enrolled_student_id})
+    return {
+        "student_id": enrolled_student_id,
+        "student_username": student.username,
+        "student_full_name": student.get_full_name(),
+        "student_usernames": [s.username for s in students[:100]],
+        "course_name": courses[0].name,
+        "lecturer_id": busiest_lecturer_id,
+        "course_id": taught_course_id,
+        "group_id": repo.find_all("group_courses", {"course_id": taught_course_id})[0]["group_id"],
+        "grade": grade,
+        "grade_batch": repo.find_all("grades")[:100],
+        "student_count": len(students),
+    }
+
+
+def _insert_and_delete_group(repo, samples):
+    samples["write_seq"] = samples.get("write_seq", 0) + 1
+    success, _, new_id = repo.insert_one("groups", Group(None, f"bench-group-{samples['write_seq']}"))
+    if success:
+        repo.delete_one("groups", new_id)
+
+
+def _add_and_remove_student(repo, samples):
+    # The benchmark group gets a student who is not normally in it, then loses them again
+    repo.add_student_to_group(samples["group_id"], samples["student_id"])
+    repo.remove_student_from_group(samples["group_id"], samples["student_id"])
+
+
+def _delete_student_with_links(repo, samples):
+    # A throwaway student (password hash "!" never matches) with memberships and grades; deleting them cascades in SQL
+    samples["write_seq"] = samples.get("write_seq", 0) + 1
+    username = f"bench.student.{samples['write_seq']}"
+    success, _, new_id = repo.insert_one("users", Student(None, "Bench", "Student", username, "!"))
+    if success:
+        repo.assign_students_to_groups([new_id], [samples["group_id"], samples["group_id"] + 1])
+        repo.upsert_grades_many([(new_id, samples["course_id"], 50.0)])
+        repo.delete_one("users", new_id)
+
+
+def _delete_lecturer_of_course(repo, samples):
+    # Deleting a lecturer leaves their course unassigned through ON DELETE SET NULL
+    samples["write_seq"] = samples.get("write_seq", 0) + 1
+    username = f"bench.lecturer.{samples['write_seq']}"
+    success, _, lecturer_id = repo.insert_one("users", Lecturer(None, "Bench", "Lecturer", username, "!"))
+    if success:
+        _, _, course_id = repo.insert_one("courses", Course(None, f"bench-course-{samples['write_seq']}", lecturer_id))
+        repo.delete_one("users", lecturer_id)
+        repo.delete_one("courses", course_id)
+
+
+def _delete_group_with_members(repo, samples):
+    # A full copy of the benchmark group (students and courses), then deleted with its links
+    samples["write_seq"] = samples.get("write_seq", 0) + 1
+    suffix = f" bench-{samples['write_seq']}"
+    success, _ = repo.rollover_groups([samples["group_id"]], suffix=suffix, copy_students=True)
+    clone = repo.find_one("groups", {"name": repo.find_one("groups", {"id": samples["group_id"]}).name + suffix})
+    if success and clone:
+        repo.delete_one("groups", clone.id)
+
+
+def _insert_many_groups(repo, samples):
+    samples["write_seq"] = samples.get("write_seq", 0) + 1
+    repo.insert_many("groups", [Group(None, f"bench-batch-{samples['write_seq']}-{i}") for i in range(100)])
+
+
+def _grade_batch_values(samples):
+    # Alternate the values between runs so every write really changes the rows
+    samples["write_seq"] = samples.get("write_seq", 0) + 1
+    offset = 0.5 if samples["write_seq"] % 2 else 0.0
+    return [(grade, min(100.0, grade.value + offset)) for grade in samples["grade_batch"]]
+
+
+def _update_grades_one_by_one(repo, samples):
+    for grade, value in _grade_batch_values(samples):
+        repo.update_one("grades", grade.id, {"value": value})
+
+
+def _update_grades_in_transaction(repo, samples):
+    with repo.transaction():
+        for grade, value in _grade_batch_values(samples):
+            repo.update_one("grades", grade.id, {"value": value})
+
+
+def _upsert_grades_batch(repo, samples):
+    repo.upsert_grades_many([(grade.student_id, grade.course_id, value) for grade, value in _grade_batch_values(samples)])
+
+
+# Read-only cases run first so the write cases cannot skew them
+REPOSITORY_CASES = [
+    ("repo.find_one users by username", lambda repo, s: repo.find_one("users", {"username": s["student_username"]})),
+    ("repo.find_one users by id", lambda repo, s: repo.find_one("users", {"id": s["student_id"]})),
+    ("repo.find_one groups by id", lambda repo, s: repo.find_one("groups", {"id": s["group_id"]})),
+    ("repo.find_all users", lambda repo, s: repo.find_all("users")),
+    ("repo.find_all students", lambda repo, s: repo.find_all("users", {"role": "student"})),
+    ("repo.find_all courses", lambda repo, s: repo.find_all("courses")),
+    ("repo.find_all groups", lambda repo, s: repo.find_all("groups")),
+    ("repo.find_all grades of student", lambda repo, s: repo.find_all("grades", {"student_id": s["student_id"]})),
+    ("repo.find_all group_students of group", lambda repo, s: repo.find_all("group_students", {"group_id": s["group_id"]})),
+    ("repo.find_id_map users", lambda repo, s: repo.find_id_map("users", "username")),
+    ("repo.count_listing users", lambda repo, s: repo.count_listing("users")),
+    ("repo.find_listing_page users mid-table by surname", lambda repo, s: repo.find_listing_page(
+        "users", s["student_count"] // 2, 100, order_by="surname")),
+    ("repo.find_listing_page courses by lecturer", lambda repo, s: repo.find_listing_page(
+        "courses", 0, 100, order_by="lecturer")),
+    ("repo.find_listing_page groups by students", lambda repo, s: repo.find_listing_page(
+        "groups", 0, 100, order_by="students", descending=True)),
+    ("repo.find_group_members", lambda repo, s: repo.find_group_members(s["group_id"])),
+    ("repo.find_course_rosters of lecturer", lambda repo, s: repo.find_course_rosters(s["lecturer_id"])),
+    ("repo.rollover_groups dry run of all groups", lambda repo, s: repo.rollover_groups(
+        list(repo.find_id_map("groups", "id")), suffix=" (next)", copy_students=True, dry_run=True)),
+    # Search-as-you-type: each case is one keystroke's query, so p95 is the keystroke latency
+    ("repo.search_users keystroke 1 char", lambda repo, s: repo.search_users(s["student_full_name"][:1])),
+    ("repo.search_users keystroke 2 chars", lambda repo, s: repo.search_users(s["student_full_name"][:2])),
+    ("repo.search_users keystroke 3 chars", lambda repo, s: repo.search_users(s["student_full_name"][:3])),
+    ("repo.search_users keystroke full name", lambda repo, s: repo.search_users(s["student_full_name"])),
+    ("repo.search_users keystroke students only", lambda repo, s: repo.search_users(
+        s["student_full_name"][:3], role="student")),
+    ("repo.search_courses keystroke 3 chars", lambda repo, s: repo.search_courses(s["course_name"][:3])),
+]
+
+SERVICE_CASES = [
+    ("service.admin view users", lambda repo, s: main.fetch_all_users(repo)),
+    ("service.admin view courses", lambda repo, s: main.fetch_course_listing(repo)),
+    ("service.admin view groups", lambda repo, s: main.fetch_group_listing(repo)),
+    ("service.admin assign lecturer listing", lambda repo, s: main.fetch_course_listing(repo, unassigned_label="Unassigned")),
+    ("service.admin assign student listing", lambda repo, s: main.fetch_group_names_by_member(
+        repo, repo.find_all("users", {"role": "student"}), repo.find_all("groups"), "group_students", "student_id")),
+    ("service.admin assign course listing", lambda repo, s: main.fetch_group_names_by_member(
+        repo, repo.find_all("courses"), repo.find_all("groups"), "group_courses", "course_id")),
+    ("service.lecturer_enter_grade roster", lambda repo, s: main.fetch_course_roster(repo, s["course_id"])),
+    ("service.lecturer view courses and students", lambda repo, s: main.fetch_lecturer_overview(repo, s["lecturer_id"])),
+    ("service.student_view_grades", lambda repo, s: main.fetch_student_grades(repo, s["student_id"])),
+    ("service.student_view_my_courses", lambda repo, s: main.fetch_student_courses(repo, s["student_id"])),
+]
+
+WRITE_CASES = [
+    ("repo.update_one grade", lambda repo, s: repo.update_one("grades", s["grade"].id, {"value": s["grade"].value})),
+    ("repo.insert_one+delete_one group", _insert_and_delete_group),
+    ("repo.add+remove student in group", _add_and_remove_student),
+    ("repo.insert_many 100 groups", _insert_many_groups),
+    ("repo.update_one 100 grades one commit each", _update_grades_one_by_one),
+    ("repo.update_one 100 grades in one transaction", _update_grades_in_transaction),
+    ("repo.upsert_grades_many 100 grades", _upsert_grades_batch),
+    ("repo.insert+delete student with links", _delete_student_with_links),
+    ("repo.insert+delete lecturer of a course", _delete_lecturer_of_course),
+    ("repo.clone+delete group with members", _delete_group_with_members),
+    ("repo.assign_students_to_groups 100x2", lambda repo, s: repo.assign_students_to_groups(
+        s["student_usernames"], [s["group_id"], s["group_id"] + 1], key="username")),
+]
+
+ALL_CASES = REPOSITORY_CASES + SERVICE_CASES + WRITE_CASES
+
+
+def _percentile(sorted_values, fraction):
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    position = (len(sorted_values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def run_case(func, repo, samples, repeat, max_seconds):
+    """
+    Runs one case: an instrumented first call (query count, peak memory) followed by
+    up to `repeat` timed calls, stopping early once `max_seconds` have been spent.
+    """
+    tracemalloc.start()
+    with QueryCounter() as counter:
+        start = time.perf_counter()
+        func(repo, samples)
+        first_elapsed = time.perf_counter() - start
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings = []
+    spent = first_elapsed
+    if first_elapsed > max_seconds:
+        # Too slow to repeat; the instrumented run is the only sample
+        timings.append(first_elapsed)
+    while len(timings) < repeat and spent <= max_seconds:
+        start = time.perf_counter()
+        func(repo, samples)
+        elapsed = time.perf_counter() - start
+        timings.append(elapsed)
+        spent += elapsed
+
+    return _summarize(timings, counter.count, peak_bytes)
+
+
+def _summarize(timings, queries, peak_bytes):
+    timings_ms = sorted(t * 1000 for t in timings)
+    return {
+        "runs": len(timings_ms),
+        "mean_ms": round(statistics.fmean(timings_ms), 3),
+        "min_ms": round(timings_ms[0], 3),
+        "p50_ms": round(_percentile(timings_ms, 0.50), 3),
+        "p95_ms": round(_percentile(timings_ms, 0.95), 3),
+        "max_ms": round(timings_ms[-1], 3),
+        "queries": queries,
+        "peak_kib": round(peak_bytes / 1024, 1),
+    }
+
+
+def import_time_report(module):
+    """
+    Imports `module` in a fresh interpreter with -X importtime.
+    Returns (total seconds, [(cumulative seconds, imported module)]) sorted slowest first.
+    """
+    env = dict(os.environ, PYTHONPATH=PROJECT_DIR)
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                               cwd=tempfile.gettempdir(), env=env, capture_output=True, text=True, check=True)
+    entries = []
+    total = 0.0
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue # Column header line
+        seconds = int(cumulative) / 1_000_000
+        entries.append((seconds, name.rstrip()))
+        if name.strip() == module:
+            total = seconds
+    entries.sort(reverse=True)
+    return total, entries
+
+
+def run_startup_benchmarks(repeat=5, print_report=False):
+    """Times cold imports of the entry points and opening a repository on a new and a current database."""
+    results = {}
+    for module in STARTUP_MODULES:
+        totals = []
+        for _ in range(repeat):
+            total, entries = import_time_report(module)
+            totals.append(total)
+        results[f"startup/import {module}"] = _summarize(totals, 0, 0)
+        if print_report:
+            print(f"\n-X importtime for '{module}' (slowest 15, cumulative):")
+            for seconds, name in entries[:15]:
+                print(f"  {seconds * 1000:8.2f} ms  {name}")
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        DatabaseRepository(os.path.join(work_dir, "startup_shared.db")) # Pre-built for the current-schema case
+        for label, fresh in (("new", True), ("current schema", False)):
+            timings = []
+            with QueryCounter() as counter:
+                for i in range(repeat):
+                    db_path = os.path.join(work_dir, f"startup_{i if fresh else 'shared'}.db")
+                    start = time.perf_counter()
+                    DatabaseRepository(db_path)
+                    timings.append(time.perf_counter() - start)
+            queries = counter.count // repeat
+            results[f"startup/open repository ({label})"] = _summarize(timings, queries, 0)
+
+    for key, stats in results.items():
+        print(f"  {key:<45} p50 {stats['p50_ms']:>10.3f} ms  p95 {stats['p95_ms']:>10.3f} ms", flush=True)
+    return results
+
+
+def run_benchmarks(sizes, repeat=5, max_seconds=5.0, seed=0, case_filter=None, data_dir=None):
+    """Generates one dataset per size and runs every case against it. Returns {key: stats}."""
+    results = {}
+    with tempfile.TemporaryDirectory(dir=data_dir) as work_dir:
+        for size in sizes:
+            db_path = os.path.join(work_dir, f"bench_{size}.db")
+            print(f"Generating '{size}' dataset...", flush=True)
+            dataset_generator.generate_preset(db_path, preset=size, seed=seed)
+            repo = DatabaseRepository(db_path)
+            samples = _pick_samples(repo)
+
+            for name, func in ALL_CASES:
+                if case_filter and case_filter not in name:
+                    continue
+                stats = run_case(func, repo, samples, repeat, max_seconds)
+                results[f"{size}/{name}"] = stats
+                print(f"  {name:<45} p50 {stats['p50_ms']:>10.3f} ms  p95 {stats['p95_ms']:>10.3f} ms  "
+                      f"queries {stats['queries']:>7}  peak {stats['peak_kib']:>9.1f} KiB", flush=True)
+    return results
+
+
+def _session_worker(db_path, profile, samples, seed, start_barrier, deadline_holder, outcome):
+    """One simulated session: pages through users and saves single grades until the deadline."""
+    repo = DatabaseRepository(db_path, profile)
+    rng = random.Random(seed)
+    reads, writes, failures = [], [], 0
+    grades = samples["grade_batch"]
+    start_barrier.wait()
+    while time.perf_counter() < deadline_holder[0]:
+        start = time.perf_counter()
+        if rng.random() < CONCURRENCY_WRITE_RATIO:
+            grade = rng.choice(grades)
+            success, _ = repo.upsert_grades_many([(grade.student_id, grade.course_id, float(rng.randint(0, 100)))])
+            writes.append(time.perf_counter() - start)
+            failures += not success
+        else:
+            offset = rng.randrange(max(1, samples["student_count"] - 50))
+            repo.find_listing_page("users", offset, 50, order_by="surname")
+            repo.find_all("grades", {"student_id": samples["student_id"]})
+            reads.append(time.perf_counter() - start)
+    outcome.append((reads, writes, failures))
+
+
+def run_concurrency_benchmark(size, sessions=8, seconds=3.0, seed=0, data_dir=None):
+    """
+    Runs `sessions` threads, each with its own repository like separate CLI/GUI sessions, mixing reads and
+    grade saves against one database for `seconds`, once per connection profile in CONCURRENCY_PROFILES.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory(dir=data_dir) as work_dir:
+        db_path = os.path.join(work_dir, f"bench_concurrency_{size}.db")
+        print(f"Generating '{size}' dataset for {sessions} concurrent sessions...", flush=True)
+        dataset_generator.generate_preset(db_path, preset=size, seed=seed)
+        samples = _pick_samples(DatabaseRepository(db_path))
+
+        for profile in CONCURRENCY_PROFILES:
+            DatabaseRepository(db_path, profile) # Switches the file's journal mode before the sessions start
+            reset_busy_retry_stats()
+            outcome = []
+            start_barrier = threading.Barrier(sessions + 1)
+            deadline_holder = [float("inf")]
+            threads = [threading.Thread(target=_session_worker,
+                                        args=(db_path, profile, samples, seed + i, start_barrier, deadline_holder, outcome))
+                       for i in range(sessions)]
+            for thread in threads:
+                thread.start()
+            deadline_holder[0] = time.perf_counter() + seconds
+            start_barrier.wait()
+            for thread in threads:
+                thread.join()
+
+            retries = busy_retry_stats()
+            for kind, index in (("reads", 0), ("grade saves", 1)):
+                timings = [t for session in outcome for t in session[index]]
+                if not timings:
+                    continue
+                stats = _summarize(timings, 0, 0)
+                stats["ops_per_s"] = round(len(timings) / seconds, 1)
+                if index == 1:
+                    stats["failures"] = sum(session[2] for session in outcome)
+                    stats["busy_retries"] = retries["retries"]
+                results[f"concurrency/{size}/{profile}/{kind}"] = stats
+                extra = (f"  failed {stats['failures']:>5}  busy retries {stats['busy_retries']:>5}"
+                         if index == 1 else "")
+                print(f"  {profile + ' ' + kind:<30} {stats['ops_per_s']:>9.1f} ops/s  p50 {stats['p50_ms']:>9.3f} ms  "
+                      f"p95 {stats['p95_ms']:>9.3f} ms{extra}", flush=True)
+    return results
+
+
+def compare_to_baseline(results, baseline, threshold):
+    """Returns a list of human-readable regressions of `results` against `baseline`."""
+    regressions = []
+    for key, current in sorted(results.items()):
+        base = baseline.get(key)
+        if not base:
+            continue
+        if (current["p50_ms"] > base["p50_ms"] * (1 + threshold)
+                and current["p50_ms"] - base["p50_ms"] > MIN_LATENCY_DELTA_MS):
+            regressions.append(f"{key}: p50 {base['p50_ms']:.3f} -> {current['p50_ms']:.3f} ms")
+        if current["queries"] > base["queries"]:
+            regressions.append(f"{key}: queries {base['queries']} -> {current['queries']}")
+        if (current["peak_kib"] > base["peak_kib"] * (1 + threshold)
+                and current["peak_kib"] - base["peak_kib"] > MIN_MEMORY_DELTA_KIB):
+            regressions.append(f"{key}: peak memory {base['peak_kib']:.1f} -> {current['peak_kib']:.1f} KiB")
+    return regressions
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Benchmark repository methods and service data paths.")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES,
+                        help=f"Comma-separated dataset presets ({', '.join(dataset_generator.PRESETS)}).")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per case.")
+    parser.add_argument("--max-case-seconds", type=float, default=5.0,
+                        help="Stop repeating a case once this much time has been spent on it.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--filter", help="Only run cases whose name contains this text.")
+    parser.add_argument("--output", default="bench_results.json", help="Where to write the JSON results.")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON to compare against.")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Allowed relative slowdown before a case counts as a regression (0.25 = 25%%).")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline.")
+    parser.add_argument("--data-dir", help="Directory for the temporary datasets (defaults to the system temp dir).")
+    parser.add_argument("--skip-startup", action="store_true", help="Do not run the startup benchmarks.")
+    parser.add_argument("--startup-report", action="store_true",
+                        help="Print the slowest imports of each entry point (an -X importtime summary).")
+    parser.add_argument("--concurrency", action="store_true",
+                        help="Also compare connection profiles under concurrent sessions (on the first size).")
+    parser.add_argument("--sessions", type=int, default=8, help="Concurrent sessions for --concurrency.")
+    parser.add_argument("--concurrency-seconds", type=float, default=3.0,
+                        help="How long each profile runs under --concurrency.")
+    args = parser.parse_args()
+
+    sizes = [size.strip() for size in args.sizes.split(",") if size.strip()]
+    unknown = [size for size in sizes if size not in dataset_generator.PRESETS]
+    if unknown:
+        parser.error(f"unknown dataset size(s): {', '.join(unknown)}")
+
+    results = {}
+    if not args.skip_startup:
+        print("Measuring startup...", flush=True)
+        results.update(run_startup_benchmarks(repeat=args.repeat, print_report=args.startup_report))
+    results.update(run_benchmarks(sizes, repeat=args.repeat, max_seconds=args.max_case_seconds,
+                             seed=args.seed, case_filter=args.filter, data_dir=args.data_dir))
+    if args.concurrency:
+        results.update(run_concurrency_benchmark(sizes[0], sessions=args.sessions, seconds=args.concurrency_seconds,
+                                                 seed=args.seed, data_dir=args.data_dir))
+    report = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sizes": sizes,
+            "seed": args.seed,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as output_file:
+        json.dump(report, output_file, indent=2, sort_keys=True)
+    print(f"\nResults written to '{args.output}'.")
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as baseline_file:
+            json.dump(report, baseline_file, indent=2, sort_keys=True)
+        print(f"Baseline saved to '{args.baseline}'.")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at '{args.baseline}'; run with --save-baseline to create one.")
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as baseline_file:
+        baseline = json.load(baseline_file)["results"]
+    regressions = compare_to_baseline(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+        for regression in regressions:
+            print(f"  - {regression}")
+        return 1
+    print(f"\nNo regressions against '{args.baseline}'.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
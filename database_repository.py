@@ -1,96 +1,820 @@
+import functools
+import itertools
+import os
+import queue
+import random
 import sqlite3
-import bcrypt
+import threading
+import time
+import weakref
+from concurrent.futures import Future
+from contextlib import contextmanager
+from urllib.parse import quote
 from models import User, Administrator, Lecturer, Student, Course, Group, Grade
 
 # Define the database file name
 DATABASE_NAME = "academic_system.db"
 
-def get_db_connection():
-    """Establishes and returns a connection to the SQLite database."""
-    conn = sqlite3.connect(DATABASE_NAME)
+# The database used when no path is given: $ACADEMIC_DB_PATH, else DATABASE_NAME in the working directory.
+# A path may also be a "file:" URI (e.g. "file:/srv/academic.db?mode=ro"), or ":memory:" (see DatabaseRepository).
+DB_PATH_ENV = "ACADEMIC_DB_PATH"
+
+def default_database():
+    return os.environ.get(DB_PATH_ENV) or DATABASE_NAME
+
+_memory_database_ids = itertools.count(1)
+
+def memory_database_uri(name=None):
+    """
+    URI of an in-memory database shared by every connection of this process opened with it, for as long
+    as one of them stays open; named `name`, or uniquely. SQLite 3.36+ has the memdb VFS, where a busy
+    database is waited for (busy_timeout) as with files; older versions get a shared-cache :memory:
+    database. Either way there is no WAL: other connections wait while a write transaction is open,
+    rather than reading the last commit.
+    """
+    name = name or f"academic-{os.getpid()}-{next(_memory_database_ids)}"
+    if sqlite3.sqlite_version_info >= (3, 36, 0):
+        return f"file:/{name}?vfs=memdb"
+    return f"file:{name}?mode=memory&cache=shared"
+
+def is_memory_database(db_path):
+    """True for ":memory:" and for URIs of in-memory databases, which have no file on disk."""
+    return db_path == ":memory:" or (db_path.startswith("file:")
+                                     and ("vfs=memdb" in db_path or "mode=memory" in db_path))
+
+# Stored in PRAGMA user_version once the schema is built; bump it whenever the schema changes
+SCHEMA_VERSION = 7
+
+# Paged listings shown by the GUI: the row query, the row count query and the columns it can be sorted by.
+# Column names come from this whitelist only, so they are safe to interpolate into ORDER BY.
+LISTINGS = {
+    "users": {
+        "select": "SELECT id, name, surname, username, role FROM users",
+        "count": "SELECT COUNT(*) FROM users",
+        "sortable": ("id", "name", "surname", "username", "role"),
+    },
+    "courses": {
+        "select": ("SELECT c.id AS id, c.name AS name, "
+                   "COALESCE(u.name || ' ' || u.surname, 'N/A') AS lecturer "
+                   "FROM courses c LEFT JOIN users u ON u.id = c.lecturer_id"),
+        "count": "SELECT COUNT(*) FROM courses",
+        "sortable": ("id", "name", "lecturer"),
+    },
+    "groups": {
+        "select": ("SELECT g.id AS id, g.name AS name, "
+                   "(SELECT COUNT(*) FROM group_students gs WHERE gs.group_id = g.id) AS students, "
+                   "(SELECT COUNT(*) FROM group_courses gc WHERE gc.group_id = g.id) AS courses "
+                   "FROM groups g"),
+        "count": "SELECT COUNT(*) FROM groups",
+        "sortable": ("id", "name", "students", "courses"),
+    },
+}
+
+# Full-text searches: the FTS5 index kept in sync with its table by triggers, the rows returned
+# (from the base table, aliased "t", plus optional joins), and per-column bm25 weights in index column order.
+SEARCHES = {
+    "users": {
+        "fts": "users_fts",
+        "columns": ("name", "surname", "username"),
+        "weights": (10.0, 10.0, 4.0),
+        "select": "SELECT t.id AS id, t.name AS name, t.surname AS surname, t.username AS username, t.role AS role",
+        "joins": "",
+    },
+    "courses": {
+        "fts": "courses_fts",
+        "columns": ("name",),
+        "weights": (1.0,),
+        "select": ("SELECT t.id AS id, t.name AS name, "
+                   "COALESCE(u.name || ' ' || u.surname, 'N/A') AS lecturer"),
+        "joins": "LEFT JOIN users u ON u.id = t.lecturer_id",
+    },
+}
+
+def _search_words(text):
+    import re # Only needed once somebody searches; kept off the startup path
+    return re.findall(r"\w+", text or "")
+
+def build_match_query(text):
+    """
+    Turns free text typed by a user into an FTS5 MATCH expression where every word is a prefix.
+    Returns None when there is nothing to search for.
+    Example: build_match_query("ali ben") -> '"ali"* "ben"*'
+    """
+    words = _search_words(text)
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
+
+# Below this many typed characters a prefix matches most of the table, so results come back in id order
+# instead of being ranked: bm25 would have to score every match and the first keystroke would lag.
+RANKED_SEARCH_MIN_CHARS = 2
+
+# Bulk group assignment: where the members of each linking table live, the rows that qualify,
+# and the columns callers may identify them by (whitelisted, so safe to interpolate).
+GROUP_MEMBERSHIPS = {
+    "group_students": {"member_column": "student_id", "table": "users", "where": "t.role = 'student'",
+                       "keys": ("id", "username")},
+    "group_courses": {"member_column": "course_id", "table": "courses", "where": "1",
+                      "keys": ("id", "name")},
+}
+
+# Academic terms: rows of these tables belong to the term that was current when they were inserted
+# (a trigger fills in term_id). Once a term is over, term_archive.py moves its rows out to a per-term
+# archive file, so the live tables only hold the current term; historical queries ATTACH the archives.
+TERM_TABLES = ("grades", "group_students", "group_courses")
+# The columns each term table's rows are unique on: a student has one grade per course, whatever the term.
+# So a closed term's rows, until archived, are guarded by triggers: a write that would update one of them,
+# or insert its key again, fails with CLOSED_TERM_ERROR instead of silently landing in the closed term.
+TERM_TABLE_KEYS = {
+    "grades": ("student_id", "course_id"),
+    "group_students": ("group_id", "student_id"),
+    "group_courses": ("group_id", "course_id"),
+}
+CLOSED_TERM_ERROR = "Rows of a closed term are still live: archive that term first (python term_archive.py archive)"
+DEFAULT_TERM_NAME = "Current term" # The term existing rows are given when terms are introduced
+
+# Every foreign key of the schema: (table, column, parent table, what the parent's deletion does).
+# With foreign_keys on, SQLite applies these itself; the list drives the cleanup of rows orphaned
+# while enforcement was off (a "cascade" orphan is deleted, a "set null" one has its column cleared).
+ORPHAN_CHECKS = [
+    ("courses", "lecturer_id", "users", "set null"),
+    ("grades", "student_id", "users", "cascade"),
+    ("grades", "course_id", "courses", "cascade"),
+    ("group_students", "group_id", "groups", "cascade"),
+    ("group_students", "student_id", "users", "cascade"),
+    ("group_courses", "group_id", "groups", "cascade"),
+    ("group_courses", "course_id", "courses", "cascade"),
+]
+
+def orphan_condition(table, column, parent_table):
+    """SQL condition matching rows of `table` whose `column` points at a missing `parent_table` row."""
+    return (f"{table}.{column} IS NOT NULL AND NOT EXISTS "
+            f"(SELECT 1 FROM {parent_table} p WHERE p.id = {table}.{column})")
+
+# Callables notified with the SQL text of every executed statement (see query_counter.py)
+_statement_listeners = []
+
+def add_statement_listener(listener):
+    """
+    Registers a callable that receives every SQL statement run from now on, on any connection: every
+    connection reports to the listeners from the start, so ones opened earlier (a thread-safe repository's
+    kept connections, its writer's) are counted as well.
+    """
+    _statement_listeners.append(listener)
+
+def remove_statement_listener(listener):
+    """Unregisters a statement listener previously added with add_statement_listener."""
+    if listener in _statement_listeners:
+        _statement_listeners.remove(listener)
+
+def _notify_statement_listeners(sql):
+    if not _statement_listeners:
+        return
+    for listener in list(_statement_listeners):
+        listener(sql)
+
+# Connection settings applied by get_db_connection. Pick one with the `profile` argument or the
+# ACADEMIC_DB_PROFILE environment variable. busy_timeout is in milliseconds; a negative cache_size is in KiB.
+DB_PROFILE_ENV = "ACADEMIC_DB_PROFILE"
+DEFAULT_PROFILE = "default"
+CONNECTION_PROFILES = {
+    # Several CLI and GUI sessions on one file: in WAL mode readers and the writer do not block each other,
+    # and synchronous=NORMAL only gives up the last commits on power loss (never consistency)
+    "default": {"journal_mode": "WAL", "synchronous": "NORMAL", "cache_size": -16000,
+                "mmap_size": 64 * 1024 * 1024, "temp_store": "MEMORY", "busy_timeout": 5000},
+    # As "default", but every commit is fsynced before it returns
+    "durable": {"journal_mode": "WAL", "synchronous": "FULL", "cache_size": -16000,
+                "mmap_size": 64 * 1024 * 1024, "temp_store": "MEMORY", "busy_timeout": 10000},
+    # A single process loading lots of rows (dataset generation, imports); a crash may lose the load
+    "bulk": {"journal_mode": "WAL", "synchronous": "OFF", "cache_size": -64000,
+             "mmap_size": 256 * 1024 * 1024, "temp_store": "MEMORY", "busy_timeout": 30000},
+    # SQLite's rollback journal as before, e.g. for network file systems where WAL's shared memory does not work
+    "legacy": {"journal_mode": "DELETE", "synchronous": "FULL", "busy_timeout": 5000},
+}
+
+# Reporting replica: a read-only snapshot copy of the database (see reporting_replica.py) that report
+# queries read from instead of the live file. Set it with the `replica` argument or ACADEMIC_DB_REPLICA.
+# It never changes once written, so it is opened immutable (no locking at all) and memory-mapped whole.
+DB_REPLICA_ENV = "ACADEMIC_DB_REPLICA"
+REPLICA_MMAP_SIZE = 1024 * 1024 * 1024
+
+def open_replica(replica_path):
+    """Opens a reporting replica read-only and immutable. Returns None when there is no replica file yet."""
+    if not replica_path or not os.path.exists(replica_path):
+        return None
+    conn = sqlite3.connect(f"file:{quote(os.path.abspath(replica_path))}?mode=ro&immutable=1", uri=True)
     conn.row_factory = sqlite3.Row
+    conn.execute(f"PRAGMA mmap_size = {REPLICA_MMAP_SIZE}")
+    conn.set_trace_callback(_notify_statement_listeners) # Next to nothing while there are no listeners
     return conn
 
+def replica_taken_at(replica_path):
+    """When the replica's snapshot was taken (a timestamp; refresh_replica stamps it on the file), or None."""
+    if not replica_path or not os.path.exists(replica_path):
+        return None
+    return os.path.getmtime(replica_path)
+
+# Writes that still find the database locked once busy_timeout has run out are retried this many
+# times, sleeping about BUSY_RETRY_BASE_DELAY * 2**attempt seconds (with jitter) in between.
+BUSY_RETRY_ATTEMPTS = 4
+BUSY_RETRY_BASE_DELAY = 0.05
+
+# A write whose BEGIN IMMEDIATE takes longer than this most likely waited for another session's write lock
+LOCK_WAIT_THRESHOLD = 0.002
+
+_busy_stats = {"retries": 0, "failures": 0, "wait_seconds": 0.0, "lock_waits": 0, "lock_wait_seconds": 0.0}
+_busy_stats_lock = threading.Lock()
+_thread_busy_stats = threading.local() # The same counters for the current thread only, never reset
+
+
+class DatabaseBusyError(sqlite3.OperationalError):
+    """Raised when a write could not get the database lock even after retrying."""
+
+
+def busy_retry_stats(current_thread=False):
+    """
+    Returns how often writes were retried, gave up, and how long they slept, since the last reset, and how
+    often (and how long) they waited for the write lock. With current_thread=True, counts only the calling
+    thread's writes since it started: take the difference around a call to see what that call waited.
+    """
+    if current_thread:
+        return {key: getattr(_thread_busy_stats, key, 0) for key in _busy_stats}
+    with _busy_stats_lock:
+        return dict(_busy_stats)
+
+def reset_busy_retry_stats():
+    with _busy_stats_lock:
+        _busy_stats.update(retries=0, failures=0, wait_seconds=0.0, lock_waits=0, lock_wait_seconds=0.0)
+
+def _add_busy_stats(**counts):
+    with _busy_stats_lock:
+        for key, value in counts.items():
+            _busy_stats[key] += value
+    for key, value in counts.items():
+        setattr(_thread_busy_stats, key, getattr(_thread_busy_stats, key, 0) + value)
+
+def _is_busy_error(error):
+    code = getattr(error, "sqlite_errorcode", None) # Python 3.11+
+    if code is not None:
+        return code & 0xFF in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+    return "locked" in str(error) or "busy" in str(error)
+
+def _retry_on_busy(operation):
+    for attempt in range(BUSY_RETRY_ATTEMPTS + 1):
+        try:
+            return operation()
+        except sqlite3.OperationalError as e:
+            if not _is_busy_error(e):
+                raise
+            if attempt == BUSY_RETRY_ATTEMPTS:
+                _add_busy_stats(failures=1)
+                raise DatabaseBusyError(
+                    f"the database is busy in another session ({e}); please try again") from e
+            delay = BUSY_RETRY_BASE_DELAY * (2 ** attempt) * random.uniform(0.5, 1.5)
+            _add_busy_stats(retries=1, wait_seconds=delay)
+            time.sleep(delay)
+
+def _begin_write(conn):
+    """
+    Starts a write transaction holding the write lock from the outset (BEGIN IMMEDIATE).
+    A deferred transaction that reads first can hit SQLITE_BUSY half-way through, which no
+    amount of waiting resolves; taking the lock up front leaves only the wait, which is retried.
+    Inside repo.transaction() the write becomes a savepoint of the pinned connection instead.
+    """
+    if isinstance(conn, _PinnedConnection):
+        conn.begin_write()
+        return
+    _begin_immediate(conn)
+
+def _begin_immediate(conn):
+    started = time.perf_counter()
+    _retry_on_busy(lambda: conn.execute("BEGIN IMMEDIATE"))
+    waited = time.perf_counter() - started
+    if waited > LOCK_WAIT_THRESHOLD:
+        _add_busy_stats(lock_waits=1, lock_wait_seconds=waited)
+
+def _commit(conn):
+    # In rollback-journal mode a commit waits for readers to finish and may report busy; retrying it is safe
+    _retry_on_busy(conn.commit)
+
+class _PinnedConnection:
+    """
+    The connection held open by DatabaseRepository.transaction(), handed to every repository call
+    made inside it. close() keeps it open, and each write runs in its own savepoint, so a call that
+    fails rolls back only its own changes; the whole unit of work commits once at the end.
+    """
+    def __init__(self, conn):
+        self._conn = conn
+        self._calls = 0 # Repository calls currently using the connection (a call may make another)
+        self._savepoints = [] # (name, call depth that opened it)
+        self._next_savepoint = 0
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def enter(self):
+        self._calls += 1
+        return self
+
+    def savepoint(self):
+        """Opens a savepoint and returns its name."""
+        self._next_savepoint += 1
+        name = f"sp_{self._next_savepoint}"
+        self._conn.execute(f"SAVEPOINT {name}")
+        return name
+
+    def release(self, name):
+        self._conn.execute(f"RELEASE {name}")
+
+    def rollback_to(self, name):
+        self._conn.execute(f"ROLLBACK TO {name}")
+        self._conn.execute(f"RELEASE {name}")
+
+    def begin_write(self):
+        self._savepoints.append((self.savepoint(), self._calls))
+
+    def commit(self):
+        if self._savepoints and self._savepoints[-1][1] == self._calls:
+            self.release(self._savepoints.pop()[0])
+
+    def rollback(self):
+        if self._savepoints and self._savepoints[-1][1] == self._calls:
+            self.rollback_to(self._savepoints.pop()[0])
+
+    def close(self):
+        self.rollback() # A write that returned without committing leaves nothing behind
+        self._calls -= 1
+
+class _KeptConnection:
+    """
+    A thread's long-lived connection in thread-safe mode. Repository calls get it from _connect()
+    and "close" it as usual; that only rolls back a transaction the outermost call left open.
+    """
+    def __init__(self, conn):
+        self._conn = conn
+        self._calls = 0
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def enter(self):
+        self._calls += 1
+        return self
+
+    def close(self):
+        self._calls -= 1
+        if self._calls == 0 and self._conn.in_transaction:
+            self._conn.rollback()
+
+# Thread-safe mode: how many queued writes the writer thread may commit together in one transaction
+WRITE_BATCH_LIMIT = 64
+
+def _write_method(method):
+    """
+    Marks a repository method that writes. On a thread-safe repository the call is queued to the
+    single writer thread and the caller waits for its result; otherwise it runs directly.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if (self._writer is None or threading.current_thread() is self._writer
+                or getattr(self._local, "conn", None) is not None):
+            # Inside transaction() the write belongs to the caller's own unit of work
+            return method(self, *args, **kwargs)
+        return self._queue_write(method, args, kwargs).result()
+    wrapper.writes = True
+    return wrapper
+
+def get_db_connection(db_path=None, profile=None):
+    """
+    Establishes and returns a connection to the SQLite database (a path or a "file:" URI;
+    default_database() by default), configured with one of the CONNECTION_PROFILES.
+    """
+    settings = CONNECTION_PROFILES[profile or os.environ.get(DB_PROFILE_ENV) or DEFAULT_PROFILE]
+    db_path = db_path or default_database()
+    conn = sqlite3.connect(db_path, timeout=settings.get("busy_timeout", 5000) / 1000, uri=db_path.startswith("file:"))
+    conn.row_factory = sqlite3.Row
+    # Off by default in SQLite; without it the ON DELETE CASCADE / SET NULL clauses never run
+    conn.execute("PRAGMA foreign_keys = ON")
+    for pragma in ("synchronous", "cache_size", "mmap_size", "temp_store"):
+        if pragma in settings:
+            conn.execute(f"PRAGMA {pragma} = {settings[pragma]}")
+    if "journal_mode" in settings:
+        try:
+            # Stored in the file; a no-op unless the mode actually changes
+            conn.execute(f"PRAGMA journal_mode = {settings['journal_mode']}")
+        except sqlite3.OperationalError:
+            pass # Another session holds a lock; it keeps the current mode until the next connection
+    conn.set_trace_callback(_notify_statement_listeners) # Next to nothing while there are no listeners
+    return conn
+
+def _report_method(method):
+    """
+    Marks a repository method that reads for a report. On a repository with a reporting replica its
+    queries go to the replica's snapshot, keeping long scans off the live database; inside transaction(),
+    or while there is no replica file yet, they read the live database as usual.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.replica is None or getattr(self._local, "report", False):
+            return method(self, *args, **kwargs)
+        self._local.report = True
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            self._local.report = False
+    return wrapper
+
 class DatabaseRepository:
     """
     Manages all database interactions for the academic system using SQLite.
     Provides methods for creating tables and performing CRUD operations for all entities.
     """
-    def __init__(self):
+    def __init__(self, db_path=None, profile=None, thread_safe=False, replica=None, template=None):
+        """
+        `db_path` is a file path or a "file:" URI (default: default_database()). ":memory:" gives the
+        repository a database of its own in memory, kept until close(); self.db_path is then a URI that
+        other repositories of the process can open to share it.
+        `template` (a repository, path or URI) is copied in first with SQLite's backup API, which makes a
+        fresh copy of a prepared dataset in milliseconds (see dataset_generator.fresh_repository).
+        With thread_safe=True one repository can be shared by many threads: each thread keeps its own
+        read connection, and every write is queued to a single writer thread, which commits whatever
+        has queued up meanwhile (up to WRITE_BATCH_LIMIT writes) in one transaction. Call close() when done.
+        `replica` (default: ACADEMIC_DB_REPLICA) is the reporting replica the report_* methods read from.
+        """
+        db_path = db_path or default_database()
+        self.db_path = memory_database_uri() if db_path == ":memory:" else db_path
+        self.profile = profile
+        # An in-memory database is dropped with its last connection: this one keeps it for the repository's lifetime
+        self._anchor = get_db_connection(self.db_path, profile) if is_memory_database(self.db_path) else None
+        if template is not None:
+            self._copy_from(getattr(template, "db_path", template))
+        self.replica = replica or os.environ.get(DB_REPLICA_ENV) or None
+        self.thread_safe = thread_safe
+        self._local = threading.local() # The connection pinned by transaction() (and the kept one), per thread
+        self._writer = None
+        # Thread id -> its kept connection, for interrupt(); weak, so a connection goes when its thread ends
+        self._kept_by_thread = weakref.WeakValueDictionary()
         self._create_tables()
+        if thread_safe:
+            self.write_stats = {"writes": 0, "batches": 0, "replayed": 0}
+            self._writes = queue.Queue()
+            self._writer = threading.Thread(target=self._write_loop, name="db-writer", daemon=True)
+            self._writer.start()
+
+    def close(self):
+        """
+        Stops the writer thread of a thread-safe repository once the queued writes are done, and lets go
+        of an in-memory database (dropped unless another repository still has it open).
+        """
+        if self._writer is not None:
+            self._writes.put(None)
+            self._writer.join()
+            self._writer = None
+        self._close_kept_connection() # Other threads' kept connections go with their threads
+        if self._anchor is not None:
+            self._anchor.close()
+            self._anchor = None
+
+    def _copy_from(self, template_path):
+        source = sqlite3.connect(template_path, uri=template_path.startswith("file:"))
+        target = self._anchor or get_db_connection(self.db_path, self.profile)
+        try:
+            source.backup(target)
+        finally:
+            source.close()
+            if target is not self._anchor:
+                target.close()
+
+    def submit_write(self, method_name, *args, **kwargs):
+        """
+        Queues a call of a write method (insert_one, update_one, ...) on a thread-safe repository without
+        waiting for it. Returns a concurrent.futures.Future of the method's result; cancelling the future
+        before the writer thread reaches the call drops the write.
+        """
+        method = getattr(type(self), method_name, None)
+        if not getattr(method, "writes", False):
+            raise ValueError(f"{method_name} is not a repository write method")
+        if self._writer is None:
+            raise RuntimeError("submit_write() needs a repository opened with thread_safe=True")
+        return self._queue_write(method.__wrapped__, args, kwargs)
+
+    def _queue_write(self, method, args, kwargs):
+        future = Future()
+        self._writes.put((method, args, kwargs, future))
+        return future
+
+    def interrupt(self, thread_id):
+        """
+        Aborts the statement running on the connection kept by thread `thread_id` (thread-safe mode),
+        e.g. a read whose caller has given up. Does nothing if that thread has no connection.
+        """
+        kept = self._kept_by_thread.get(thread_id)
+        if kept is not None:
+            kept._conn.interrupt()
+
+    def _close_kept_connection(self):
+        kept = getattr(self._local, "kept", None)
+        if kept is not None:
+            self._local.kept = None
+            self._kept_by_thread.pop(threading.get_ident(), None)
+            kept._conn.close()
+
+    def _kept_connection(self):
+        kept = getattr(self._local, "kept", None)
+        if kept is None:
+            kept = self._local.kept = _KeptConnection(get_db_connection(self.db_path, self.profile))
+            self._kept_by_thread[threading.get_ident()] = kept
+        return kept
+
+    def _connect(self):
+        pinned = getattr(self._local, "conn", None)
+        if pinned is not None:
+            return pinned.enter()
+        if getattr(self._local, "report", False):
+            conn = open_replica(self.replica)
+            if conn is not None:
+                return conn
+        if self.thread_safe:
+            return self._kept_connection().enter()
+        return get_db_connection(self.db_path, self.profile)
+
+    def _write_loop(self):
+        while True:
+            batch = [self._writes.get()]
+            while batch[-1] is not None and len(batch) < WRITE_BATCH_LIMIT:
+                try:
+                    batch.append(self._writes.get_nowait())
+                except queue.Empty:
+                    break
+            stop = batch[-1] is None
+            jobs = [job for job in batch if job is not None]
+            if jobs:
+                self._run_write_batch(jobs)
+            if stop:
+                self._close_kept_connection()
+                return
+
+    def _run_write_batch(self, jobs):
+        """Runs queued writes in one transaction, each in its own savepoint; resolves their futures after the commit."""
+        jobs = [job for job in jobs if job[3].set_running_or_notify_cancel()] # Drop writes cancelled while queued
+        if not jobs:
+            return
+        outcomes = []
+        try:
+            with self.transaction():
+                for method, args, kwargs, future in jobs:
+                    try:
+                        outcomes.append((future, method(self, *args, **kwargs), None))
+                    except Exception as e:
+                        outcomes.append((future, None, e))
+        except sqlite3.Error:
+            # The shared commit failed and nothing was written: replay one write per transaction
+            # so that every caller gets the result its own write would have had
+            self.write_stats["replayed"] += len(jobs)
+            outcomes = []
+            for method, args, kwargs, future in jobs:
+                try:
+                    outcomes.append((future, method(self, *args, **kwargs), None))
+                except Exception as e:
+                    outcomes.append((future, None, e))
+        self.write_stats["writes"] += len(jobs)
+        self.write_stats["batches"] += 1
+        for future, result, error in outcomes:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    @contextmanager
+    def transaction(self, readonly=False):
+        """
+        Runs every repository call in the block on one connection and commits them together,
+        or rolls all of them back if the block raises. Calls that report a failure (return False)
+        only undo their own changes. Nested blocks become savepoints.
+        Write transactions take the write lock up front; readonly=True only gives the block one
+        consistent snapshot of the database.
+        Example:
+            with repo.transaction():
+                grade = repo.find_one("grades", {"student_id": 7, "course_id": 3})
+                repo.update_one("grades", grade.id, {"value": 95.0})
+        """
+        pinned = getattr(self._local, "conn", None)
+        if pinned is not None:
+            name = pinned.savepoint()
+            try:
+                yield self
+            except BaseException:
+                pinned.rollback_to(name)
+                raise
+            pinned.release(name)
+            return
+
+        kept = self._kept_connection() if self.thread_safe else None
+        conn = kept._conn if kept else get_db_connection(self.db_path, self.profile)
+        try:
+            if readonly:
+                conn.execute("BEGIN")
+            else:
+                _begin_immediate(conn)
+            self._local.conn = _PinnedConnection(conn)
+            try:
+                yield self
+            except BaseException:
+                conn.rollback()
+                raise
+            if readonly:
+                conn.rollback() # Nothing to keep; also discards anything written by mistake
+            else:
+                _commit(conn)
+        finally:
+            self._local.conn = None
+            if conn.in_transaction:
+                conn.rollback() # The commit failed; a kept connection must not stay inside it
+            if kept is None:
+                conn.close()
 
     def _create_tables(self):
-        """Creates database tables if they don't exist."""
-        conn = get_db_connection()
+        """Creates database tables if they don't exist. Skipped when the stored schema version is current."""
+        conn = self._connect()
         cursor = conn.cursor()
 
-        # Users table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                surname TEXT NOT NULL,
-                username TEXT UNIQUE NOT NULL,
-                password_hash TEXT NOT NULL,
-                role TEXT NOT NULL
-            )
-        ''')
+        stored_version = cursor.execute("PRAGMA user_version").fetchone()[0]
+        if stored_version >= SCHEMA_VERSION:
+            conn.close()
+            return
 
-        # Courses table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS courses (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT UNIQUE NOT NULL,
-                lecturer_id INTEGER,
-                FOREIGN KEY (lecturer_id) REFERENCES users(id) ON DELETE SET NULL
-            )
-        ''')
+        # Another process may be upgrading the same file right now (some upgrade steps cannot run twice):
+        # take the write lock, then look at the version again
+        try:
+            _begin_immediate(conn)
+            stored_version = cursor.execute("PRAGMA user_version").fetchone()[0]
+            if stored_version >= SCHEMA_VERSION:
+                return # Upgraded by the other process while we waited for the lock
 
-        # Groups table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS groups (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT UNIQUE NOT NULL
-            )
-        ''')
+            # Users table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS users (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL,
+                    surname TEXT NOT NULL,
+                    username TEXT UNIQUE NOT NULL,
+                    password_hash TEXT NOT NULL,
+                    role TEXT NOT NULL
+                )
+            ''')
 
-        # Grades table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS grades (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                student_id INTEGER NOT NULL,
-                course_id INTEGER NOT NULL,
-                value REAL,
-                FOREIGN KEY (student_id) REFERENCES users(id) ON DELETE CASCADE,
-                FOREIGN KEY (course_id) REFERENCES courses(id) ON DELETE CASCADE,
-                UNIQUE (student_id, course_id)
-            )
-        ''')
+            # Courses table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS courses (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT UNIQUE NOT NULL,
+                    lecturer_id INTEGER,
+                    FOREIGN KEY (lecturer_id) REFERENCES users(id) ON DELETE SET NULL
+                )
+            ''')
 
-        # Linking table: group_students (Many-to-Many between Groups and Students)
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS group_students (
-                group_id INTEGER NOT NULL,
-                student_id INTEGER NOT NULL,
-                PRIMARY KEY (group_id, student_id),
-                FOREIGN KEY (group_id) REFERENCES groups(id) ON DELETE CASCADE,
-                FOREIGN KEY (student_id) REFERENCES users(id) ON DELETE CASCADE
-            )
-        ''')
+            # Groups table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS groups (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT UNIQUE NOT NULL
+                )
+            ''')
+
+            # Grades table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS grades (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    student_id INTEGER NOT NULL,
+                    course_id INTEGER NOT NULL,
+                    value REAL,
+                    FOREIGN KEY (student_id) REFERENCES users(id) ON DELETE CASCADE,
+                    FOREIGN KEY (course_id) REFERENCES courses(id) ON DELETE CASCADE,
+                    UNIQUE (student_id, course_id)
+                )
+            ''')
 
-        # Linking table: group_courses (Many-to-Many between Groups and Courses)
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS group_courses (
-                group_id INTEGER NOT NULL,
-                course_id INTEGER NOT NULL,
-                PRIMARY KEY (group_id, course_id),
-                FOREIGN KEY (group_id) REFERENCES groups(id) ON DELETE CASCADE,
-                FOREIGN KEY (course_id) REFERENCES courses(id) ON DELETE CASCADE
+            # Linking table: group_students (Many-to-Many between Groups and Students)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS group_students (
+                    group_id INTEGER NOT NULL,
+                    student_id INTEGER NOT NULL,
+                    PRIMARY KEY (group_id, student_id),
+                    FOREIGN KEY (group_id) REFERENCES groups(id) ON DELETE CASCADE,
+                    FOREIGN KEY (student_id) REFERENCES users(id) ON DELETE CASCADE
+                )
+            ''')
+
+            # Linking table: group_courses (Many-to-Many between Groups and Courses)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS group_courses (
+                    group_id INTEGER NOT NULL,
+                    course_id INTEGER NOT NULL,
+                    PRIMARY KEY (group_id, course_id),
+                    FOREIGN KEY (group_id) REFERENCES groups(id) ON DELETE CASCADE,
+                    FOREIGN KEY (course_id) REFERENCES courses(id) ON DELETE CASCADE
+                )
+            ''')
+
+            self._upgrade_schema(cursor, stored_version)
+            cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            _commit(conn)
+        finally:
+            conn.close() # Rolls back whatever is left open
+
+    def _upgrade_schema(self, cursor, stored_version):
+        """Applies the schema changes made since version 1, oldest first."""
+        if stored_version < 2:
+            # Indexes behind the sortable name columns of the paged user listing
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_users_name ON users (name)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_users_surname ON users (surname)")
+        if stored_version < 3:
+            for table, spec in SEARCHES.items():
+                self._create_search_index(cursor, table, spec["fts"], spec["columns"])
+        if stored_version < 4:
+            # Lookups behind find_course_rosters: a lecturer's courses, then the groups of each course
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_courses_lecturer ON courses (lecturer_id)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_group_courses_course ON group_courses (course_id)")
+        if stored_version < 5:
+            # Child-side indexes so cascading deletes of students and courses do not scan whole tables
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_group_students_student ON group_students (student_id)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_grades_course ON grades (course_id)")
+            # Foreign keys were not enforced before this version: clear what deletes left behind
+            for table, column, parent_table, action in ORPHAN_CHECKS:
+                if action == "set null":
+                    cursor.execute(f"UPDATE {table} SET {column} = NULL WHERE {orphan_condition(table, column, parent_table)}")
+                else:
+                    cursor.execute(f"DELETE FROM {table} WHERE {orphan_condition(table, column, parent_table)}")
+        if stored_version < 6:
+            # status is 'current' (exactly one term), 'closed', or 'archived' (rows moved to archive_path,
+            # relative to the database's directory)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS terms (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT UNIQUE NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'current',
+                    archive_path TEXT
+                )
+            ''')
+            cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_terms_current ON terms (status) WHERE status = 'current'")
+            cursor.execute("INSERT INTO terms (name) SELECT ? WHERE NOT EXISTS (SELECT 1 FROM terms)", (DEFAULT_TERM_NAME,))
+            for table in TERM_TABLES:
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN term_id INTEGER REFERENCES terms(id)")
+                cursor.execute(f"UPDATE {table} SET term_id = (SELECT id FROM terms WHERE status = 'current')")
+                # Every write path (single inserts, batches, upserts, rollovers) gets the current term without knowing about terms
+                cursor.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS {table}_term AFTER INSERT ON {table} WHEN new.term_id IS NULL BEGIN
+                        UPDATE {table} SET term_id = (SELECT id FROM terms WHERE status = 'current') WHERE rowid = new.rowid;
+                    END
+                ''')
+
+        if stored_version < 7:
+            for table, keys in TERM_TABLE_KEYS.items():
+                same_key = " AND ".join(f"t.{column} = new.{column}" for column in keys)
+                cursor.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS {table}_closed_term_insert BEFORE INSERT ON {table}
+                    WHEN EXISTS (SELECT 1 FROM {table} t JOIN terms ON terms.id = t.term_id AND terms.status = 'closed'
+                                 WHERE {same_key}) BEGIN
+                        SELECT RAISE(ABORT, '{CLOSED_TERM_ERROR}');
+                    END
+                ''')
+                # old.term_id is NULL in the update {table}_term makes right after an insert
+                cursor.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS {table}_closed_term_update BEFORE UPDATE ON {table}
+                    WHEN old.term_id IN (SELECT id FROM terms WHERE status = 'closed') BEGIN
+                        SELECT RAISE(ABORT, '{CLOSED_TERM_ERROR}');
+                    END
+                ''')
+
+    def _create_search_index(self, cursor, table, fts_table, columns):
+        """Builds an external-content FTS5 index over `columns` of `table`, plus the triggers that keep it current."""
+        column_list = ", ".join(columns)
+        new_values = ", ".join(f"new.{column}" for column in columns)
+        old_values = ", ".join(f"old.{column}" for column in columns)
+        # prefix='2 3' stores short prefixes too, so the first keystrokes do not scan the whole term list
+        cursor.execute(f'''
+            CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5(
+                {column_list}, content='{table}', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2', prefix='2 3'
             )
         ''')
-
-        conn.commit()
-        conn.close()
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {fts_table}_ai AFTER INSERT ON {table} BEGIN
+                INSERT INTO {fts_table} (rowid, {column_list}) VALUES (new.id, {new_values});
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {fts_table}_ad AFTER DELETE ON {table} BEGIN
+                INSERT INTO {fts_table} ({fts_table}, rowid, {column_list}) VALUES ('delete', old.id, {old_values});
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {fts_table}_au AFTER UPDATE OF {column_list} ON {table} BEGIN
+                INSERT INTO {fts_table} ({fts_table}, rowid, {column_list}) VALUES ('delete', old.id, {old_values});
+                INSERT INTO {fts_table} (rowid, {column_list}) VALUES (new.id, {new_values});
+            END
+        ''')
+        cursor.execute(f"INSERT INTO {fts_table} ({fts_table}) VALUES ('rebuild')") # Index the existing rows
 
     def _map_row_to_object(self, row, obj_type):
         """Helper to map a database row (sqlite3.Row) to a corresponding Python object."""
@@ -120,7 +844,7 @@ class DatabaseRepository:
             group = Group(row['id'], row['name'])
             
             # Populate linked student and course IDs
-            conn = get_db_connection()
+            conn = self._connect()
             cursor = conn.cursor()
             
             cursor.execute('SELECT student_id FROM group_students WHERE group_id = ?', (group.id,))
@@ -133,6 +857,9 @@ class DatabaseRepository:
             return group
         elif obj_type == "grades":
             return Grade(row['id'], row['student_id'], row['course_id'], row['value'])
+        elif obj_type in ("group_students", "group_courses"):
+            # Linking rows have no model class; expose them as plain dicts
+            return dict(row)
         else:
             raise ValueError(f"Unknown object type: {obj_type}")
 
@@ -141,7 +868,7 @@ class DatabaseRepository:
         Finds a single object in the database based on query.
         Example: find_one("users", {"username": "testuser"})
         """
-        conn = get_db_connection()
+        conn = self._connect()
         cursor = conn.cursor()
         
         table_name = collection_name # Table names match collection names for simplicity
@@ -165,7 +892,7 @@ class DatabaseRepository:
         Finds multiple objects in the database based on query.
         Example: find_all("users", {"role": "student"})
         """
-        conn = get_db_connection()
+        conn = self._connect()
         cursor = conn.cursor()
         
         table_name = collection_name
@@ -179,6 +906,16 @@ class DatabaseRepository:
         try:
             cursor.execute(f"SELECT * FROM {table_name}{where_clause}", values)
             rows = cursor.fetchall()
+            if collection_name == "groups":
+                # One query per linking table for all the groups, rather than two per group
+                groups = {row['id']: Group(row['id'], row['name']) for row in rows}
+                for link_table, column, attribute in (("group_students", "student_id", "student_ids"),
+                                                      ("group_courses", "course_id", "course_ids")):
+                    cursor.execute(f"SELECT group_id, {column} FROM {link_table} "
+                                   f"WHERE group_id IN (SELECT id FROM groups{where_clause})", values)
+                    for link in cursor.fetchall():
+                        getattr(groups[link['group_id']], attribute).append(link[column])
+                return list(groups.values())
             return [self._map_row_to_object(row, collection_name) for row in rows]
         except sqlite3.Error as e:
             print(f"Database error during find_all: {e}")
@@ -186,17 +923,411 @@ class DatabaseRepository:
         finally:
             conn.close()
 
+    def find_batch(self, collection_name, query={}, after=0, limit=500):
+        """
+        Returns (objects, next_after): up to `limit` matching rows stored after row `after`, in storage order.
+        Pass next_after back in to continue; it is None once there is nothing left. Every batch is its own
+        short indexed query, so walking a large table never holds a read transaction open.
+        Example: find_batch("users", {"role": "student"}, after=0, limit=500)
+        """
+        conn = self._connect()
+        cursor = conn.cursor()
+
+        conditions = [f"{key} = ?" for key in query.keys()] + ["rowid > ?"]
+        values = tuple(query.values()) + (after, limit)
+
+        try:
+            cursor.execute(f"SELECT *, rowid AS batch_rowid FROM {collection_name} "
+                           f"WHERE {' AND '.join(conditions)} ORDER BY rowid LIMIT ?", values)
+            rows = cursor.fetchall()
+        except sqlite3.Error as e:
+            print(f"Database error during find_batch: {e}")
+            return [], None
+        finally:
+            conn.close()
+
+        objects = []
+        for row in rows:
+            obj = self._map_row_to_object(row, collection_name)
+            if isinstance(obj, dict):
+                del obj["batch_rowid"]
+            objects.append(obj)
+        next_after = rows[-1]["batch_rowid"] if len(rows) == limit else None
+        return objects, next_after
+
+    def find_id_map(self, collection_name, key_column):
+        """
+        Returns {key_column value: id} for every row of a table, without building objects.
+        Example: find_id_map("users", "username")
+        """
+        conn = self._connect()
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"SELECT {key_column}, id FROM {collection_name}")
+            return {row[0]: row[1] for row in cursor.fetchall()}
+        except sqlite3.Error as e:
+            print(f"Database error during find_id_map: {e}")
+            return {}
+        finally:
+            conn.close()
+
+    def count_listing(self, listing):
+        """Returns the total number of rows in one of the paged LISTINGS."""
+        conn = self._connect()
+        try:
+            return conn.execute(LISTINGS[listing]["count"]).fetchone()[0]
+        except sqlite3.Error as e:
+            print(f"Database error during count_listing: {e}")
+            return 0
+        finally:
+            conn.close()
+
+    def find_listing_page(self, listing, offset, limit, order_by="id", descending=False):
+        """
+        Returns one page of a paged listing as a list of dicts, sorted in SQL.
+        Example: find_listing_page("users", 200, 50, order_by="surname")
+        """
+        spec = LISTINGS[listing]
+        if order_by not in spec["sortable"]:
+            raise ValueError(f"Cannot sort {listing} by {order_by}")
+        direction = "DESC" if descending else "ASC"
+        order_clause = f"{order_by} {direction}" if order_by == "id" else f"{order_by} {direction}, id {direction}"
+
+        conn = self._connect()
+        try:
+            rows = conn.execute(f"{spec['select']} ORDER BY {order_clause} LIMIT ? OFFSET ?",
+                                (limit, offset)).fetchall()
+            return [dict(row) for row in rows]
+        except sqlite3.Error as e:
+            print(f"Database error during find_listing_page: {e}")
+            return []
+        finally:
+            conn.close()
+
+    def find_group_members(self, group_id):
+        """Returns (student full names, course names) for one group, using two joined queries."""
+        conn = self._connect()
+        try:
+            students = conn.execute(
+                "SELECT u.name || ' ' || u.surname FROM group_students gs "
+                "JOIN users u ON u.id = gs.student_id WHERE gs.group_id = ? ORDER BY u.surname, u.name",
+                (group_id,)
+            ).fetchall()
+            courses = conn.execute(
+                "SELECT c.name FROM group_courses gc "
+                "JOIN courses c ON c.id = gc.course_id WHERE gc.group_id = ? ORDER BY c.name",
+                (group_id,)
+            ).fetchall()
+            return [row[0] for row in students], [row[0] for row in courses]
+        except sqlite3.Error as e:
+            print(f"Database error during find_group_members: {e}")
+            return [], []
+        finally:
+            conn.close()
+
+    def find_course_rosters(self, lecturer_id=None, course_id=None):
+        """
+        Returns {course_id: [roster row, ...]} for every course taught by a lecturer, or for the one
+        course `course_id`, in one query. Roster rows are dicts with student_id, username, name, surname,
+        grade_id and grade (None when ungraded); courses without students map to an empty list.
+        """
+        condition, value = ("c.id = ?", course_id) if course_id is not None else ("c.lecturer_id = ?", lecturer_id)
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT c.id AS course_id, u.id AS student_id, u.username AS username, u.name AS name, "
+                "u.surname AS surname, "
+                "g.id AS grade_id, g.value AS grade "
+                "FROM courses c "
+                "LEFT JOIN group_courses gc ON gc.course_id = c.id "
+                "LEFT JOIN group_students gs ON gs.group_id = gc.group_id "
+                "LEFT JOIN users u ON u.id = gs.student_id AND u.role = 'student' "
+                "LEFT JOIN grades g ON g.student_id = u.id AND g.course_id = c.id "
+                f"WHERE {condition} "
+                "GROUP BY c.id, u.id ORDER BY c.id, u.id", # A student reached through two groups is listed once
+                (value,)
+            ).fetchall()
+        except sqlite3.Error as e:
+            print(f"Database error during find_course_rosters: {e}")
+            return {}
+        finally:
+            conn.close()
+
+        rosters = {}
+        for row in rows:
+            roster = rosters.setdefault(row["course_id"], [])
+            if row["student_id"] is not None:
+                roster.append({key: row[key] for key in ("student_id", "username", "name", "surname", "grade_id",
+                                                         "grade")})
+        return rosters
+
+    def report_age(self):
+        """
+        Seconds since the snapshot the report_* methods read was taken; 0.0 when they read the live
+        database (no replica configured, or not created yet).
+        """
+        taken_at = replica_taken_at(self.replica)
+        return 0.0 if taken_at is None else max(0.0, time.time() - taken_at)
+
+    @_report_method
+    def report_course_statistics(self):
+        """
+        Term-end statistics per course, as dicts: course_id, course, lecturer (None when unassigned),
+        enrolled (students reached through the course's groups), graded, average, minimum, maximum.
+        """
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT c.id AS course_id, c.name AS course, u.name || ' ' || u.surname AS lecturer, "
+                "(SELECT COUNT(DISTINCT gs.student_id) FROM group_courses gc "
+                " JOIN group_students gs ON gs.group_id = gc.group_id WHERE gc.course_id = c.id) AS enrolled, "
+                "COUNT(g.id) AS graded, AVG(g.value) AS average, MIN(g.value) AS minimum, MAX(g.value) AS maximum "
+                "FROM courses c "
+                "LEFT JOIN users u ON u.id = c.lecturer_id "
+                "LEFT JOIN grades g ON g.course_id = c.id "
+                "GROUP BY c.id ORDER BY c.name, c.id"
+            ).fetchall()
+        except sqlite3.Error as e:
+            print(f"Database error during report_course_statistics: {e}")
+            return []
+        finally:
+            conn.close()
+        return [dict(row) for row in rows]
+
+    @_report_method
+    def report_rosters(self):
+        """
+        Every course's roster with its grades, as dicts: course_id, course, lecturer, student_id,
+        username, name, surname, grade (None when ungraded). Ordered by course, then surname.
+        """
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT c.id AS course_id, c.name AS course, l.name || ' ' || l.surname AS lecturer, "
+                "u.id AS student_id, u.username AS username, u.name AS name, u.surname AS surname, g.value AS grade "
+                "FROM courses c "
+                "JOIN group_courses gc ON gc.course_id = c.id "
+                "JOIN group_students gs ON gs.group_id = gc.group_id "
+                "JOIN users u ON u.id = gs.student_id AND u.role = 'student' "
+                "LEFT JOIN users l ON l.id = c.lecturer_id "
+                "LEFT JOIN grades g ON g.student_id = u.id AND g.course_id = c.id "
+                "GROUP BY c.id, u.id ORDER BY c.name, c.id, u.surname, u.name, u.id"
+            ).fetchall()
+        except sqlite3.Error as e:
+            print(f"Database error during report_rosters: {e}")
+            return []
+        finally:
+            conn.close()
+        return [dict(row) for row in rows]
+
+    def find_terms(self):
+        """Returns every term as a dict (id, name, status, archive_path), oldest first."""
+        conn = self._connect()
+        try:
+            return [dict(row) for row in conn.execute("SELECT * FROM terms ORDER BY id")]
+        except sqlite3.Error as e:
+            print(f"Database error during find_terms: {e}")
+            return []
+        finally:
+            conn.close()
+
+    def current_term(self):
+        """Returns the current term as a dict, or None."""
+        return next((term for term in self.find_terms() if term["status"] == "current"), None)
+
+    @_write_method
+    def start_term(self, name):
+        """
+        Makes a new term current; the previous one is closed. Its rows stay in the live tables (so groups
+        can still be rolled over from it) until term_archive.py archives it. Until then, writes that would
+        change its grades or re-add its memberships fail with CLOSED_TERM_ERROR: a student has one live
+        grade per course, and it must not be carried into the archive of the wrong term.
+        Returns (True, new_term_id) or (False, "Error message").
+        """
+        conn = self._connect()
+        try:
+            _begin_write(conn)
+            conn.execute("UPDATE terms SET status = 'closed' WHERE status = 'current'")
+            term_id = conn.execute("INSERT INTO terms (name) VALUES (?)", (name,)).lastrowid
+            _commit(conn)
+            return True, term_id
+        except sqlite3.IntegrityError:
+            conn.rollback()
+            return False, f"A term named '{name}' already exists."
+        except sqlite3.Error as e:
+            conn.rollback()
+            return False, f"Database error: {e}"
+        finally:
+            conn.close()
+
+    def term_archive_path(self, term):
+        """Absolute path of an archived term's file (archive_path is stored relative to the database)."""
+        return os.path.join(os.path.dirname(os.path.abspath(self.db_path)), term["archive_path"])
+
+    def _read_terms(self, sql, params=None, term_ids=None):
+        """
+        Runs `sql` once per term (every term, or those in `term_ids`) and returns all rows as dicts with the
+        term's id and name added, oldest term first. In `sql`, {src} is the schema holding the term's rows:
+        main for live terms, the term's archive ATTACHed for archived ones; {courses} is the courses table
+        as the term knew it (archives keep a copy, so names survive later renames and deletions).
+        `params` are named parameters, plus :term_id.
+        """
+        rows = []
+        conn = get_db_connection(self.db_path, self.profile) # Own connection: ATTACH is not allowed inside a transaction
+        try:
+            for term in self.find_terms():
+                if term_ids is not None and term["id"] not in term_ids:
+                    continue
+                src = "main"
+                if term["status"] == "archived":
+                    path = self.term_archive_path(term)
+                    if not os.path.exists(path):
+                        print(f"Archive of term '{term['name']}' not found at '{path}'")
+                        continue
+                    src = f"term_{term['id']}"
+                    conn.execute(f"ATTACH DATABASE ? AS {src}", (path,))
+                try:
+                    cursor = conn.execute(sql.format(src=src, courses=f"{src}.courses"),
+                                          dict(params or {}, term_id=term["id"]))
+                    rows += [dict(row, term_id=term["id"], term=term["name"]) for row in cursor]
+                finally:
+                    if src != "main":
+                        conn.execute(f"DETACH DATABASE {src}")
+        except sqlite3.Error as e:
+            print(f"Database error during a term history query: {e}")
+        finally:
+            conn.close()
+        return rows
+
+    def find_student_history(self, student_id):
+        """
+        A student's grades over every term, archived ones included, as dicts: term_id, term, course_id,
+        course, grade. Oldest term first.
+        """
+        return self._read_terms(
+            "SELECT g.course_id AS course_id, COALESCE(c.name, '(deleted course)') AS course, g.value AS grade "
+            "FROM {src}.grades g LEFT JOIN {courses} c ON c.id = g.course_id "
+            "WHERE g.student_id = :student_id AND g.term_id = :term_id ORDER BY course",
+            {"student_id": student_id})
+
+    def find_term_grades(self, term_id, course_id=None):
+        """
+        The grades of one term, live or archived, optionally of one course only, as dicts: student_id,
+        username, name, surname, course_id, course, grade (plus term_id and term).
+        """
+        condition = "AND g.course_id = :course_id " if course_id is not None else ""
+        return self._read_terms(
+            "SELECT g.student_id AS student_id, u.username AS username, u.name AS name, u.surname AS surname, "
+            "g.course_id AS course_id, COALESCE(c.name, '(deleted course)') AS course, g.value AS grade "
+            "FROM {src}.grades g LEFT JOIN main.users u ON u.id = g.student_id "
+            "LEFT JOIN {courses} c ON c.id = g.course_id "
+            f"WHERE g.term_id = :term_id {condition}ORDER BY course, u.surname, u.name",
+            {"course_id": course_id}, term_ids={term_id})
+
+    def find_student_courses(self, student_id):
+        """
+        Returns the courses a student takes through their groups, in one query, as dicts with
+        course_id, course, lecturer_id and lecturer (None when unassigned) and grade (None when ungraded).
+        """
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT c.id AS course_id, c.name AS course, c.lecturer_id AS lecturer_id, "
+                "u.name || ' ' || u.surname AS lecturer, "
+                "g.value AS grade "
+                "FROM group_students gs "
+                "JOIN group_courses gc ON gc.group_id = gs.group_id "
+                "JOIN courses c ON c.id = gc.course_id "
+                "LEFT JOIN users u ON u.id = c.lecturer_id "
+                "LEFT JOIN grades g ON g.student_id = gs.student_id AND g.course_id = c.id "
+                "WHERE gs.student_id = ? "
+                "GROUP BY c.id ORDER BY c.name",
+                (student_id,)
+            ).fetchall()
+            return [dict(row) for row in rows]
+        except sqlite3.Error as e:
+            print(f"Database error during find_student_courses: {e}")
+            return []
+        finally:
+            conn.close()
+
+    def find_student_grades(self, student_id):
+        """Returns a student's recorded grades as dicts with course_id, course and grade, in one query."""
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT g.course_id AS course_id, COALESCE(c.name, 'Unknown Course') AS course, g.value AS grade "
+                "FROM grades g LEFT JOIN courses c ON c.id = g.course_id "
+                "WHERE g.student_id = ? ORDER BY course",
+                (student_id,)
+            ).fetchall()
+            return [dict(row) for row in rows]
+        except sqlite3.Error as e:
+            print(f"Database error during find_student_grades: {e}")
+            return []
+        finally:
+            conn.close()
+
+    def search(self, collection_name, text, limit=20, role=None):
+        """
+        Prefix full-text search over one of the SEARCHES, best matches first (bm25), as a list of dicts.
+        `role` narrows a users search. Returns [] for empty input.
+        Example: search("users", "ali ben", limit=10, role="student")
+        """
+        match = build_match_query(text)
+        if match is None:
+            return []
+        spec = SEARCHES[collection_name]
+        if len("".join(_search_words(text))) >= RANKED_SEARCH_MIN_CHARS:
+            weights = ", ".join(str(weight) for weight in spec["weights"])
+            score = f"bm25({spec['fts']}, {weights})"
+        else:
+            score = "f.rowid"
+        # Rank and limit inside the index first, then join only the surviving rows back to the table
+        matches = f"SELECT f.rowid AS rowid, {score} AS score FROM {spec['fts']} f"
+        params = []
+        if role:
+            matches += f" JOIN {collection_name} r ON r.id = f.rowid"
+        matches += f" WHERE {spec['fts']} MATCH ?"
+        params.append(match)
+        if role:
+            matches += " AND r.role = ?"
+            params.append(role)
+        matches += " ORDER BY score LIMIT ?"
+        params.append(limit)
+        sql = (f"{spec['select']} FROM ({matches}) m JOIN {collection_name} t ON t.id = m.rowid {spec['joins']} "
+               "ORDER BY m.score, t.id")
+
+        conn = self._connect()
+        try:
+            return [dict(row) for row in conn.execute(sql, params).fetchall()]
+        except sqlite3.Error as e:
+            print(f"Database error during search: {e}")
+            return []
+        finally:
+            conn.close()
+
+    def search_users(self, text, limit=20, role=None):
+        """Searches users by name, surname and username prefixes. See search()."""
+        return self.search("users", text, limit, role)
+
+    def search_courses(self, text, limit=20):
+        """Searches courses by name prefixes. See search()."""
+        return self.search("courses", text, limit)
+
+    @_write_method
     def insert_one(self, collection_name, obj):
         """
         Inserts a single object into the database.
         Returns (True, "Success", new_id) on success, (False, "Error message", None) on failure.
         """
-        conn = get_db_connection()
+        conn = self._connect()
         cursor = conn.cursor()
         
         table_name = collection_name
 
         try:
+            _begin_write(conn)
             if collection_name == "users":
                 cursor.execute(
                     "INSERT INTO users (name, surname, username, password_hash, role) VALUES (?, ?, ?, ?, ?)",
@@ -210,10 +1341,6 @@ class DatabaseRepository:
             elif collection_name == "groups":
                 cursor.execute("INSERT INTO groups (name) VALUES (?)", (obj.name,))
             elif collection_name == "grades":
-                # Ensure unique student_id, course_id pair before inserting
-                existing_grade = self.find_one("grades", {"student_id": obj.student_id, "course_id": obj.course_id})
-                if existing_grade:
-                    return False, "A grade for this student in this course already exists.", None
                 cursor.execute(
                     "INSERT INTO grades (student_id, course_id, value) VALUES (?, ?, ?)",
                     (obj.student_id, obj.course_id, obj.value)
@@ -221,11 +1348,16 @@ class DatabaseRepository:
             else:
                 return False, f"Cannot insert into unknown collection: {collection_name}", None
             
-            conn.commit()
+            _commit(conn)
             return True, "Success", cursor.lastrowid # Return the ID of the newly inserted row
         except sqlite3.IntegrityError as e:
             # This catches UNIQUE constraint failures (e.g., duplicate username, course name, group name)
             conn.rollback()
+            if CLOSED_TERM_ERROR in str(e):
+                return False, CLOSED_TERM_ERROR, None
+            if "grades.student_id, grades.course_id" in str(e):
+                # One grade per student and course, enforced by the table's UNIQUE constraint
+                return False, "A grade for this student in this course already exists.", None
             return False, f"Integrity error: {e}", None
         except sqlite3.Error as e:
             conn.rollback()
@@ -233,13 +1365,51 @@ class DatabaseRepository:
         finally:
             conn.close()
 
+    @_write_method
+    def insert_many(self, collection_name, objs):
+        """
+        Inserts many objects with a single executemany and one commit.
+        Returns (True, "Success", inserted_count) on success, (False, "Error message", 0) on failure.
+        """
+        insert_sql = {
+            "users": "INSERT INTO users (name, surname, username, password_hash, role) VALUES (?, ?, ?, ?, ?)",
+            "courses": "INSERT INTO courses (name, lecturer_id) VALUES (?, ?)",
+            "groups": "INSERT INTO groups (name) VALUES (?)",
+            "grades": "INSERT INTO grades (student_id, course_id, value) VALUES (?, ?, ?)",
+        }
+        row_values = {
+            "users": lambda o: (o.name, o.surname, o.username, o.password_hash, o.role),
+            "courses": lambda o: (o.name, o.lecturer_id),
+            "groups": lambda o: (o.name,),
+            "grades": lambda o: (o.student_id, o.course_id, o.value),
+        }
+        if collection_name not in insert_sql:
+            return False, f"Cannot insert into unknown collection: {collection_name}", 0
+
+        conn = self._connect()
+        cursor = conn.cursor()
+        try:
+            _begin_write(conn)
+            cursor.executemany(insert_sql[collection_name], (row_values[collection_name](obj) for obj in objs))
+            _commit(conn)
+            return True, "Success", cursor.rowcount
+        except sqlite3.IntegrityError as e:
+            conn.rollback()
+            return False, f"Integrity error: {e}", 0
+        except sqlite3.Error as e:
+            conn.rollback()
+            return False, f"Database error during bulk insert: {e}", 0
+        finally:
+            conn.close()
+
+    @_write_method
     def update_one(self, collection_name, obj_id, updates):
         """
         Updates a single object in the database.
         `updates` is a dictionary of columns to update and their new values.
         Example: update_one("grades", grade_id, {"value": 95.0})
         """
-        conn = get_db_connection()
+        conn = self._connect()
         cursor = conn.cursor()
         
         table_name = collection_name
@@ -248,8 +1418,9 @@ class DatabaseRepository:
         values = tuple(updates.values()) + (obj_id,) # Add the ID for the WHERE clause
 
         try:
+            _begin_write(conn)
             cursor.execute(f"UPDATE {table_name} SET {set_clause} WHERE id = ?", values)
-            conn.commit()
+            _commit(conn)
             return cursor.rowcount > 0 # True if at least one row was updated
         except sqlite3.Error as e:
             print(f"Database error during update: {e}")
@@ -258,16 +1429,18 @@ class DatabaseRepository:
         finally:
             conn.close()
 
+    @_write_method
     def delete_one(self, collection_name, obj_id):
         """Deletes a single object from the database by its ID."""
-        conn = get_db_connection()
+        conn = self._connect()
         cursor = conn.cursor()
         
         table_name = collection_name
         
         try:
+            _begin_write(conn)
             cursor.execute(f"DELETE FROM {table_name} WHERE id = ?", (obj_id,))
-            conn.commit()
+            _commit(conn)
             return cursor.rowcount > 0 # True if a row was deleted
         except sqlite3.Error as e:
             print(f"Database error during delete: {e}")
@@ -278,18 +1451,24 @@ class DatabaseRepository:
 
     # --- Linking Table Management Methods ---
 
+    @_write_method
     def add_student_to_group(self, group_id, student_id):
-        conn = get_db_connection()
+        conn = self._connect()
         cursor = conn.cursor()
         try:
+            _begin_write(conn)
             cursor.execute(
                 "INSERT INTO group_students (group_id, student_id) VALUES (?, ?)",
                 (group_id, student_id)
             )
-            conn.commit()
+            _commit(conn)
             return True, "Student added to group successfully."
-        except sqlite3.IntegrityError:
+        except sqlite3.IntegrityError as e:
             conn.rollback()
+            if "FOREIGN KEY" in str(e):
+                return False, "Group or student does not exist."
+            if CLOSED_TERM_ERROR in str(e):
+                return False, CLOSED_TERM_ERROR
             return False, "Student is already in this group."
         except sqlite3.Error as e:
             conn.rollback()
@@ -297,15 +1476,17 @@ class DatabaseRepository:
         finally:
             conn.close()
 
+    @_write_method
     def remove_student_from_group(self, group_id, student_id):
-        conn = get_db_connection()
+        conn = self._connect()
         cursor = conn.cursor()
         try:
+            _begin_write(conn)
             cursor.execute(
                 "DELETE FROM group_students WHERE group_id = ? AND student_id = ?",
                 (group_id, student_id)
             )
-            conn.commit()
+            _commit(conn)
             return cursor.rowcount > 0
         except sqlite3.Error as e:
             conn.rollback()
@@ -314,18 +1495,24 @@ class DatabaseRepository:
         finally:
             conn.close()
 
+    @_write_method
     def add_course_to_group(self, group_id, course_id):
-        conn = get_db_connection()
+        conn = self._connect()
         cursor = conn.cursor()
         try:
+            _begin_write(conn)
             cursor.execute(
                 "INSERT INTO group_courses (group_id, course_id) VALUES (?, ?)",
                 (group_id, course_id)
             )
-            conn.commit()
+            _commit(conn)
             return True, "Course added to group successfully."
-        except sqlite3.IntegrityError:
+        except sqlite3.IntegrityError as e:
             conn.rollback()
+            if "FOREIGN KEY" in str(e):
+                return False, "Group or course does not exist."
+            if CLOSED_TERM_ERROR in str(e):
+                return False, CLOSED_TERM_ERROR
             return False, "Course is already assigned to this group."
         except sqlite3.Error as e:
             conn.rollback()
@@ -333,19 +1520,217 @@ class DatabaseRepository:
         finally:
             conn.close()
 
+    @_write_method
     def remove_course_from_group(self, group_id, course_id):
-        conn = get_db_connection()
+        conn = self._connect()
         cursor = conn.cursor()
         try:
+            _begin_write(conn)
             cursor.execute(
                 "DELETE FROM group_courses WHERE group_id = ? AND course_id = ?",
                 (group_id, course_id)
             )
-            conn.commit()
+            _commit(conn)
             return cursor.rowcount > 0
         except sqlite3.Error as e:
             conn.rollback()
             print(f"Database error: {e}")
             return False
         finally:
-            conn.close()
\ No newline at end of file
+            conn.close()
+
+    @_write_method
+    def upsert_grades_many(self, grades):
+        """
+        Writes many (student_id, course_id, value) grades in one transaction, inserting new
+        grades and updating existing ones in place (grades are unique per student and course).
+        Returns (True, written_count) on success, (False, "Error message") on failure, in which
+        case nothing is written.
+        """
+        grades = list(grades)
+        conn = self._connect()
+        cursor = conn.cursor()
+        try:
+            _begin_write(conn)
+            cursor.executemany(
+                "INSERT INTO grades (student_id, course_id, value) VALUES (?, ?, ?) "
+                "ON CONFLICT (student_id, course_id) DO UPDATE SET value = excluded.value",
+                grades
+            )
+            _commit(conn)
+            return True, len(grades)
+        except sqlite3.Error as e:
+            conn.rollback()
+            return False, f"Database error: {e}"
+        finally:
+            conn.close()
+
+    @_write_method
+    def assign_to_groups(self, link_table, member_keys, group_ids, key="id"):
+        """
+        Links every listed member to every listed group with one set-based INSERT OR IGNORE ... SELECT
+        in one transaction. Members are students for "group_students" and courses for "group_courses",
+        identified by `key` (id, or username / course name). Keys and group ids that match nothing are
+        reported back rather than failing the whole batch.
+        Returns (True, {"added", "already_present", "unknown_members", "unknown_groups"}) on success,
+        (False, "Error message") on failure.
+        Example: assign_to_groups("group_students", ["ali.benali.s1", "sara.roux.s2"], [3, 4], key="username")
+        """
+        import json
+
+        spec = GROUP_MEMBERSHIPS.get(link_table)
+        if spec is None:
+            return False, f"Unknown linking table: {link_table}"
+        if key not in spec["keys"]:
+            return False, f"Cannot identify {spec['table']} by {key}"
+        members_json = json.dumps(list(dict.fromkeys(member_keys)))
+        groups_json = json.dumps(list(dict.fromkeys(group_ids)))
+        members_sql = (f"SELECT DISTINCT t.id FROM json_each(:members) j "
+                       f"JOIN {spec['table']} t ON t.{key} = j.value WHERE {spec['where']}")
+        groups_sql = "SELECT DISTINCT g.id FROM json_each(:groups) j JOIN groups g ON g.id = j.value"
+        params = {"members": members_json, "groups": groups_json}
+
+        conn = self._connect()
+        cursor = conn.cursor()
+        try:
+            _begin_write(conn)
+            cursor.execute(
+                f"INSERT OR IGNORE INTO {link_table} (group_id, {spec['member_column']}) "
+                f"SELECT targets.id, members.id FROM ({groups_sql}) targets CROSS JOIN ({members_sql}) members",
+                params
+            )
+            added = cursor.rowcount
+            member_count, group_count = cursor.execute(
+                f"SELECT (SELECT COUNT(*) FROM ({members_sql})), (SELECT COUNT(*) FROM ({groups_sql}))", params
+            ).fetchone()
+            unknown_members = [row[0] for row in cursor.execute(
+                f"SELECT j.value FROM json_each(:members) j WHERE NOT EXISTS "
+                f"(SELECT 1 FROM {spec['table']} t WHERE t.{key} = j.value AND {spec['where']})", params)]
+            unknown_groups = [row[0] for row in cursor.execute(
+                "SELECT j.value FROM json_each(:groups) j WHERE NOT EXISTS "
+                "(SELECT 1 FROM groups g WHERE g.id = j.value)", params)]
+            _commit(conn)
+            return True, {
+                "added": added,
+                "already_present": member_count * group_count - added,
+                "unknown_members": unknown_members,
+                "unknown_groups": unknown_groups,
+            }
+        except sqlite3.Error as e:
+            conn.rollback()
+            return False, f"Database error: {e}"
+        finally:
+            conn.close()
+
+    def assign_students_to_groups(self, student_keys, group_ids, key="id"):
+        """Bulk-assigns students (by id or username) to groups. See assign_to_groups()."""
+        return self.assign_to_groups("group_students", student_keys, group_ids, key)
+
+    def assign_courses_to_groups(self, course_keys, group_ids, key="id"):
+        """Bulk-assigns courses (by id or name) to groups. See assign_to_groups()."""
+        return self.assign_to_groups("group_courses", course_keys, group_ids, key)
+
+    @_write_method
+    def rollover_groups(self, group_ids, find="", replace="", suffix="", copy_courses=True, copy_students=False,
+                        dry_run=False):
+        """
+        Clones groups for a new term with set-based SQL in a single transaction. Each new name is the
+        old one with `find` replaced by `replace` and `suffix` appended, e.g. find="2025", replace="2026".
+        The clones can take over the originals' course and/or student links.
+        With dry_run=True nothing is written and the report shows what would happen.
+        Returns (True, report) or (False, "Error message"); report is a dict with "groups"
+        ([(old_id, old_name, new_name), ...]), "conflicts" (new names that already exist or repeat),
+        "courses" and "students" (links copied, or that would be copied) and "dry_run".
+        Nothing is written when there are conflicts.
+        """
+        import json
+
+        conn = self._connect()
+        cursor = conn.cursor()
+        try:
+            _begin_write(conn)
+            # The old -> new mapping lives in a temp table, so every later step is a single join
+            cursor.execute("CREATE TEMP TABLE rollover_map (old_id INTEGER PRIMARY KEY, new_name TEXT NOT NULL, new_id INTEGER)")
+            cursor.execute(
+                "INSERT INTO temp.rollover_map (old_id, new_name) "
+                "SELECT g.id, replace(g.name, :find, :replace) || :suffix FROM groups g "
+                "WHERE g.id IN (SELECT value FROM json_each(:ids))",
+                {"find": find or "", "replace": replace or "", "suffix": suffix or "",
+                 "ids": json.dumps(list(group_ids))}
+            )
+            mapping = cursor.execute(
+                "SELECT m.old_id, g.name, m.new_name FROM temp.rollover_map m JOIN groups g ON g.id = m.old_id ORDER BY m.old_id"
+            ).fetchall()
+            conflicts = [row[0] for row in cursor.execute(
+                "SELECT new_name FROM temp.rollover_map WHERE new_name IN (SELECT name FROM groups) "
+                "UNION SELECT new_name FROM temp.rollover_map GROUP BY new_name HAVING COUNT(*) > 1"
+            )]
+            report = {
+                "groups": [tuple(row) for row in mapping],
+                "conflicts": conflicts,
+                "courses": 0,
+                "students": 0,
+                "dry_run": dry_run,
+            }
+            link_copies = [("courses", "group_courses", "course_id", copy_courses),
+                           ("students", "group_students", "student_id", copy_students)]
+
+            if dry_run or conflicts:
+                for label, link_table, member_column, wanted in link_copies:
+                    if wanted:
+                        report[label] = cursor.execute(
+                            f"SELECT COUNT(*) FROM {link_table} l JOIN temp.rollover_map m ON m.old_id = l.group_id"
+                        ).fetchone()[0]
+                conn.rollback()
+                if conflicts and not dry_run:
+                    return False, f"{len(conflicts)} new group name(s) already exist or repeat, e.g. '{conflicts[0]}'"
+                return True, report
+
+            cursor.execute("INSERT INTO groups (name) SELECT new_name FROM temp.rollover_map ORDER BY old_id")
+            cursor.execute("UPDATE temp.rollover_map SET new_id = (SELECT g.id FROM groups g WHERE g.name = new_name)")
+            for label, link_table, member_column, wanted in link_copies:
+                if wanted:
+                    cursor.execute(
+                        f"INSERT OR IGNORE INTO {link_table} (group_id, {member_column}) "
+                        f"SELECT m.new_id, l.{member_column} FROM {link_table} l "
+                        "JOIN temp.rollover_map m ON m.old_id = l.group_id"
+                    )
+                    report[label] = cursor.rowcount
+            cursor.execute("DROP TABLE temp.rollover_map") # The connection may live on inside repo.transaction()
+            _commit(conn)
+            return True, report
+        except sqlite3.Error as e:
+            conn.rollback()
+            return False, f"Database error: {e}"
+        finally:
+            conn.close()
+
+    @_write_method
+    def add_links_many(self, link_table, pairs):
+        """
+        Bulk-inserts (group_id, student_id) or (group_id, course_id) pairs into a linking table
+        in one transaction. Pairs that already exist are skipped.
+        Returns (True, added_count) on success, (False, "Error message") on failure.
+        """
+        link_columns = {
+            "group_students": ("group_id", "student_id"),
+            "group_courses": ("group_id", "course_id"),
+        }
+        if link_table not in link_columns:
+            return False, f"Unknown linking table: {link_table}"
+
+        conn = self._connect()
+        cursor = conn.cursor()
+        try:
+            _begin_write(conn)
+            cursor.executemany(
+                f"INSERT OR IGNORE INTO {link_table} ({', '.join(link_columns[link_table])}) VALUES (?, ?)",
+                pairs
+            )
+            _commit(conn)
+            return True, cursor.rowcount
+        except sqlite3.Error as e:
+            conn.rollback()
+            return False, f"Database error: {e}"
+        finally:
+            conn.close()
@@ -0,0 +1,226 @@
+import argparse
+import os
+import random
+import time
+
+import auth
+from models import Lecturer, Student, Course, Group, Grade
+from database_repository import DatabaseRepository, is_memory_database
+
+# Preset sizes used by the benchmarks: (students, lecturers, courses, groups)
+PRESETS = {
+    "small": {"students": 200, "lecturers": 10, "courses": 30, "groups": 8},
+    "department": {"students": 2000, "lecturers": 60, "courses": 150, "groups": 60},
+    "university": {"students": 50000, "lecturers": 1500, "courses": 3000, "groups": 1500},
+}
+
+# Password shared by every generated user when pre-hashed passwords are used
+PREHASHED_PASSWORD = "password"
+
+FIRST_NAMES = [
+    "Amina", "Yacine", "Sara", "Karim", "Lina", "Omar", "Nadia", "Samir", "Ines", "Walid",
+    "Emma", "Lucas", "Chloe", "Hugo", "Lea", "Adam", "Maya", "Noah", "Zoe", "Ilyes",
+    "Rania", "Mehdi", "Salma", "Anis", "Yasmine", "Riad", "Meriem", "Farid", "Dounia", "Bilal",
+]
+SURNAMES = [
+    "Benali", "Haddad", "Mansouri", "Bouzid", "Saidi", "Kaci", "Brahimi", "Cherif", "Amrani", "Taleb",
+    "Martin", "Bernard", "Dubois", "Moreau", "Laurent", "Simon", "Michel", "Lefebvre", "Garcia", "Roux",
+    "Meziane", "Hamidi", "Ziani", "Belkacem", "Ouali", "Rahmani", "Djebbar", "Khelifi", "Slimani", "Ferhat",
+]
+COURSE_SUBJECTS = [
+    "Algorithms", "Databases", "Operating Systems", "Networks", "Compilers", "Linear Algebra",
+    "Calculus", "Statistics", "Software Engineering", "Machine Learning", "Computer Graphics",
+    "Distributed Systems", "Security", "Physics", "Discrete Mathematics", "Web Development",
+]
+COURSE_LEVELS = ["I", "II", "III", "Advanced", "Lab", "Seminar"]
+
+
+def _course_name(index):
+    subject = COURSE_SUBJECTS[index % len(COURSE_SUBJECTS)]
+    level = COURSE_LEVELS[(index // len(COURSE_SUBJECTS)) % len(COURSE_LEVELS)]
+    return f"{subject} {level} #{index + 1}"
+
+
+def _generated_users(rng, count, role_class, prefix, password_hash):
+    users = []
+    for i in range(count):
+        name = rng.choice(FIRST_NAMES)
+        surname = rng.choice(SURNAMES)
+        # Same name.surname convention as the admin screens, made unique with a role prefix and index
+        username = f"{name.lower()}.{surname.lower()}.{prefix}{i + 1}"
+        hashed_pw = password_hash if password_hash else auth.hash_password(surname.lower())
+        users.append(role_class(None, name, surname, username, hashed_pw))
+    return users
+
+
+def _insert_all(repository, collection_name, objs):
+    success, msg, _ = repository.insert_many(collection_name, objs)
+    if not success:
+        raise RuntimeError(f"Could not insert the generated {collection_name}: {msg}")
+
+
+def _link_all(repository, link_table, pairs):
+    success, result = repository.add_links_many(link_table, pairs)
+    if not success:
+        raise RuntimeError(f"Could not write the generated {link_table} links: {result}")
+
+
+def _ids_for(repository, collection_name, key_column, keys):
+    id_map = repository.find_id_map(collection_name, key_column)
+    return [id_map[key] for key in keys]
+
+
+def generate_dataset(repository, students, lecturers, courses, groups, seed=0,
+                     prehashed_passwords=True, password_hash=None, graded_ratio=0.8,
+                     unassigned_course_ratio=0.05, second_group_ratio=0.1):
+    """
+    Fills `repository` with a reproducible synthetic academic dataset.
+    The same arguments and seed always produce the same rows. Returns a dict of row counts.
+    With `prehashed_passwords`, PREHASHED_PASSWORD is hashed once and shared by every user;
+    pass `password_hash` to skip bcrypt entirely and make the users table byte-identical too.
+    Raises RuntimeError if any bulk write fails (e.g. the repository already holds some of the rows).
+    """
+    rng = random.Random(seed)
+    if prehashed_passwords and password_hash is None:
+        password_hash = auth.hash_password(PREHASHED_PASSWORD)
+    elif not prehashed_passwords:
+        password_hash = None
+
+    # Users: lecturers then students, one bulk insert each
+    lecturer_objs = _generated_users(rng, lecturers, Lecturer, "l", password_hash)
+    student_objs = _generated_users(rng, students, Student, "s", password_hash)
+    _insert_all(repository, "users", lecturer_objs)
+    _insert_all(repository, "users", student_objs)
+    lecturer_ids = _ids_for(repository, "users", "username", [u.username for u in lecturer_objs])
+    student_ids = _ids_for(repository, "users", "username", [u.username for u in student_objs])
+
+    # Courses: spread across lecturers with a long tail, a few left unassigned
+    course_objs = []
+    for i in range(courses):
+        lecturer_id = None
+        if lecturer_ids and rng.random() >= unassigned_course_ratio:
+            # Squaring the uniform draw gives some lecturers noticeably heavier loads
+            lecturer_id = lecturer_ids[int(rng.random() ** 2 * len(lecturer_ids))]
+        course_objs.append(Course(None, _course_name(i), lecturer_id))
+    _insert_all(repository, "courses", course_objs)
+    course_ids = _ids_for(repository, "courses", "name", [c.name for c in course_objs])
+
+    # Groups: one per cohort, each following a programme of 4-8 courses
+    group_objs = [Group(None, f"Group {i + 1:04d}") for i in range(groups)]
+    _insert_all(repository, "groups", group_objs)
+    group_ids = _ids_for(repository, "groups", "name", [g.name for g in group_objs])
+
+    group_course_pairs = []
+    courses_by_group = {}
+    for group_id in group_ids:
+        programme = rng.sample(course_ids, min(len(course_ids), rng.randint(4, 8))) if course_ids else []
+        courses_by_group[group_id] = programme
+        group_course_pairs.extend((group_id, course_id) for course_id in programme)
+    _link_all(repository, "group_courses", group_course_pairs)
+
+    # Memberships: every student in one group, some also in an elective second group
+    group_student_pairs = []
+    groups_by_student = {}
+    for student_id in student_ids:
+        if not group_ids:
+            break
+        memberships = {rng.choice(group_ids)}
+        if len(group_ids) > 1 and rng.random() < second_group_ratio:
+            memberships.add(rng.choice(group_ids))
+        groups_by_student[student_id] = sorted(memberships)
+        group_student_pairs.extend((group_id, student_id) for group_id in groups_by_student[student_id])
+    _link_all(repository, "group_students", group_student_pairs)
+
+    # Grades: most enrolled (student, course) pairs are graded, roughly normally distributed
+    grade_objs = []
+    for student_id in student_ids:
+        enrolled = set()
+        for group_id in groups_by_student.get(student_id, []):
+            enrolled.update(courses_by_group[group_id])
+        for course_id in sorted(enrolled):
+            if rng.random() < graded_ratio:
+                value = round(min(100.0, max(0.0, rng.gauss(68, 14))) * 2) / 2
+                grade_objs.append(Grade(None, student_id, course_id, value))
+    _insert_all(repository, "grades", grade_objs)
+
+    return {
+        "students": len(student_ids),
+        "lecturers": len(lecturer_ids),
+        "courses": len(course_ids),
+        "groups": len(group_ids),
+        "group_courses": len(group_course_pairs),
+        "group_students": len(group_student_pairs),
+        "grades": len(grade_objs),
+    }
+
+
+def remove_database(db_path):
+    """Deletes a database file along with any WAL and shared-memory files left next to it."""
+    if is_memory_database(db_path):
+        return
+    for path in (db_path, db_path + "-wal", db_path + "-shm"):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def generate_preset(db_path, preset="small", seed=0, prehashed_passwords=True, password_hash=None):
+    """Creates `db_path` from scratch and fills it with one of the PRESETS."""
+    remove_database(db_path)
+    repository = DatabaseRepository(db_path, profile="bulk")
+    return generate_dataset(repository, seed=seed, prehashed_passwords=prehashed_passwords,
+                            password_hash=password_hash, **PRESETS[preset])
+
+
+# In-memory repositories holding a generated preset, by (preset, seed); kept for the life of the process
+_templates = {}
+
+
+def fresh_repository(preset="small", seed=0, profile=None, thread_safe=False):
+    """
+    A new in-memory repository holding one of the PRESETS, private to the caller: meant for tests.
+    The preset is generated once per process, then each call copies it with the backup API, which takes
+    milliseconds and never touches disk, so test processes can run side by side. close() drops the copy.
+    """
+    key = (preset, seed)
+    if key not in _templates:
+        template = DatabaseRepository(":memory:", profile="bulk")
+        generate_dataset(template, seed=seed, **PRESETS[preset])
+        _templates[key] = template
+    return DatabaseRepository(":memory:", profile, thread_safe=thread_safe, template=_templates[key])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic academic dataset for scale testing.")
+    parser.add_argument("--db", required=True, help="Path of the SQLite database to create (overwritten).")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="small")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--students", type=int, help="Override the preset's student count.")
+    parser.add_argument("--lecturers", type=int, help="Override the preset's lecturer count.")
+    parser.add_argument("--courses", type=int, help="Override the preset's course count.")
+    parser.add_argument("--groups", type=int, help="Override the preset's group count.")
+    parser.add_argument("--hash-passwords", action="store_true",
+                        help="Hash each user's own password (surname) instead of sharing one pre-hashed password.")
+    parser.add_argument("--password-hash", help="Use this bcrypt hash verbatim for every user (no hashing at all).")
+    args = parser.parse_args()
+
+    sizes = dict(PRESETS[args.preset])
+    for key in sizes:
+        if getattr(args, key) is not None:
+            sizes[key] = getattr(args, key)
+
+    remove_database(args.db)
+    start = time.perf_counter()
+    counts = generate_dataset(DatabaseRepository(args.db, profile="bulk"), seed=args.seed,
+                              prehashed_passwords=not args.hash_passwords,
+                              password_hash=args.password_hash, **sizes)
+    elapsed = time.perf_counter() - start
+
+    print(f"Generated '{args.db}' (preset: {args.preset}, seed: {args.seed}) in {elapsed:.2f}s")
+    for table, count in counts.items():
+        print(f"  {table}: {count}")
+    if not args.hash_passwords and not args.password_hash:
+        print(f"All generated users share the password '{PREHASHED_PASSWORD}'.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+import argparse
+import glob
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime
+from urllib.parse import quote
+
+from database_repository import (DATABASE_NAME, DB_PATH_ENV, ORPHAN_CHECKS, default_database, get_db_connection,
+                                 orphan_condition)
+
+# Rows changed per transaction when repairing, so the write lock is only ever held briefly
+DEFAULT_REPAIR_BATCH = 10000
+DEFAULT_SAMPLE_SIZE = 5
+
+# Online backups: pages copied per step, the pause after each step (when other sessions may write),
+# how many backups of a database are kept, and how many times a copy racing writers is restarted
+# before it holds them off until it is done
+DEFAULT_BACKUP_DIR = "backups"
+DEFAULT_BACKUP_PAGES = 1024
+DEFAULT_BACKUP_PAUSE = 0.005
+DEFAULT_BACKUP_KEEP = 7
+MAX_BACKUP_RESTARTS = 3
+
+
+class _BackupRestarted(Exception):
+    pass
+
+
+def open_read_only(db_path):
+    """Opens an existing database read-only, so a check can never migrate or modify it."""
+    if not os.path.exists(db_path):
+        raise FileNotFoundError(f"No database at '{db_path}'")
+    return sqlite3.connect(f"file:{quote(os.path.abspath(db_path))}?mode=ro", uri=True)
+
+
+def integrity_check(conn, full=False, max_errors=100):
+    """
+    Runs PRAGMA quick_check (or the much slower integrity_check with full=True).
+    Returns the list of problems reported by SQLite; an empty list means the file is sound.
+    """
+    pragma = "integrity_check" if full else "quick_check"
+    messages = [row[0] for row in conn.execute(f"PRAGMA {pragma}({int(max_errors)})")]
+    return [] if messages == ["ok"] else messages
+
+
+def scan_orphans(conn, sample_size=DEFAULT_SAMPLE_SIZE):
+    """
+    Counts, with one anti-join per foreign key in ORPHAN_CHECKS, the rows pointing at a parent that
+    no longer exists, and collects a few of them as samples.
+    Returns a list of dicts: table, column, parent, action, count, samples [(rowid, dangling id), ...].
+    """
+    results = []
+    for table, column, parent_table, action in ORPHAN_CHECKS:
+        condition = orphan_condition(table, column, parent_table)
+        count = conn.execute(f"SELECT COUNT(*) FROM {table} WHERE {condition}").fetchone()[0]
+        samples = []
+        if count:
+            samples = [tuple(row) for row in conn.execute(
+                f"SELECT rowid, {column} FROM {table} WHERE {condition} LIMIT ?", (sample_size,))]
+        results.append({"table": table, "column": column, "parent": parent_table, "action": action,
+                        "count": count, "samples": samples})
+    return results
+
+
+def repair_orphans(db_path, batch_size=DEFAULT_REPAIR_BATCH, progress=None):
+    """
+    Deletes orphaned rows (or clears dangling "set null" references) in transactions of at most
+    `batch_size` rows. `progress(table, column, fixed_so_far)` is called after every batch.
+    Returns {(table, column): rows fixed}.
+    """
+    fixed = {}
+    conn = get_db_connection(db_path)
+    try:
+        for table, column, parent_table, action in ORPHAN_CHECKS:
+            condition = orphan_condition(table, column, parent_table)
+            if action == "set null":
+                statement = f"UPDATE {table} SET {column} = NULL WHERE rowid IN (SELECT rowid FROM {table} WHERE {condition} LIMIT ?)"
+            else:
+                statement = f"DELETE FROM {table} WHERE rowid IN (SELECT rowid FROM {table} WHERE {condition} LIMIT ?)"
+            total = 0
+            while True:
+                changed = conn.execute(statement, (batch_size,)).rowcount
+                conn.commit()
+                total += changed
+                if progress and changed:
+                    progress(table, column, total)
+                if changed < batch_size:
+                    break
+            fixed[(table, column)] = total
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    return fixed
+
+
+def run_check(db_path, full=False, sample_size=DEFAULT_SAMPLE_SIZE):
+    """Prints an integrity and orphan report for `db_path`. Returns True when no problem was found."""
+    conn = open_read_only(db_path)
+    try:
+        start = time.perf_counter()
+        problems = integrity_check(conn, full=full)
+        print(f"{'integrity_check' if full else 'quick_check'}: "
+              f"{'ok' if not problems else f'{len(problems)} problem(s)'} ({time.perf_counter() - start:.2f}s)")
+        for message in problems:
+            print(f"  {message}")
+
+        start = time.perf_counter()
+        orphans = scan_orphans(conn, sample_size)
+        print(f"Orphan scan ({time.perf_counter() - start:.2f}s):")
+        for result in orphans:
+            line = f"  {result['table']}.{result['column']} -> {result['parent']}: {result['count']} orphan(s)"
+            if result["samples"]:
+                samples = ", ".join(f"rowid {rowid} ({result['column']}={value})" for rowid, value in result["samples"])
+                line += f", e.g. {samples}"
+            print(line)
+    finally:
+        conn.close()
+    return not problems and not any(result["count"] for result in orphans)
+
+
+def copy_pages(source, target, pages=DEFAULT_BACKUP_PAGES, pause=DEFAULT_BACKUP_PAUSE, progress=None):
+    """
+    Copies database `source` into `target` (open connections) with the SQLite backup API, `pages` pages
+    per step. The result is always one consistent snapshot of the source:
+    - in WAL mode the copy reads one snapshot held from start to end; writers are not blocked
+      and what they commit meanwhile is simply not in the copy;
+    - in rollback-journal mode a held snapshot would block every writer, so the source is only locked
+      during each step, with a `pause` after it. A write in between makes SQLite restart the copy; after
+      MAX_BACKUP_RESTARTS restarts it holds the snapshot after all, making writers wait for one full copy.
+    `progress(remaining, total)` is called after every step.
+    Returns {"pages", "bytes", "steps", "restarts", "seconds"}.
+    """
+    stats = {"pages": 0, "steps": 0, "restarts": 0}
+    snapshot = source.execute("PRAGMA journal_mode").fetchone()[0].lower() == "wal"
+    last_remaining = [None]
+
+    def on_step(status, remaining, total):
+        stats["steps"] += 1
+        stats["pages"] = total
+        if progress:
+            progress(remaining, total)
+        if last_remaining[0] is not None and remaining >= last_remaining[0]:
+            stats["restarts"] += 1
+            if stats["restarts"] >= MAX_BACKUP_RESTARTS:
+                raise _BackupRestarted()
+        last_remaining[0] = remaining
+        if remaining and pause and not snapshot:
+            time.sleep(pause)
+
+    start = time.perf_counter()
+    while True:
+        if snapshot:
+            source.execute("BEGIN")
+            source.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchall() # Takes the read snapshot now
+        try:
+            source.backup(target, pages=pages, progress=on_step)
+            break
+        except _BackupRestarted:
+            snapshot = True
+            last_remaining[0] = None
+        finally:
+            if source.in_transaction:
+                source.rollback()
+    stats["seconds"] = time.perf_counter() - start
+    stats["bytes"] = stats["pages"] * target.execute("PRAGMA page_size").fetchone()[0]
+    return stats
+
+
+def backup_name(db_path, when=None):
+    """Backup file name for `db_path`: its name plus a timestamp, e.g. academic_system-20250131-184502.db."""
+    stem = os.path.splitext(os.path.basename(db_path))[0]
+    return f"{stem}-{(when or datetime.now()).strftime('%Y%m%d-%H%M%S')}.db"
+
+
+def list_backups(backup_dir, db_path):
+    """Backups of `db_path` in `backup_dir`, oldest first (the timestamps in the names sort by date)."""
+    stem = os.path.splitext(os.path.basename(db_path))[0]
+    return sorted(glob.glob(os.path.join(glob.escape(backup_dir), f"{glob.escape(stem)}-????????-??????.db")))
+
+
+def backup_database(db_path, backup_dir=DEFAULT_BACKUP_DIR, keep=DEFAULT_BACKUP_KEEP, pages=DEFAULT_BACKUP_PAGES,
+                    pause=DEFAULT_BACKUP_PAUSE, progress=None):
+    """
+    Takes an online backup of `db_path` into `backup_dir` while other sessions keep working, checks it
+    with quick_check, then deletes the oldest backups beyond `keep` (0 keeps them all).
+    The copy is written under a temporary name and renamed once complete, so a backup directory never
+    holds a partial file under a backup name. Returns the copy_pages() stats plus "path" and "removed".
+    """
+    os.makedirs(backup_dir, exist_ok=True)
+    path = os.path.join(backup_dir, backup_name(db_path))
+    partial = path + ".part"
+    source = open_read_only(db_path)
+    target = sqlite3.connect(partial)
+    try:
+        stats = copy_pages(source, target, pages, pause, progress)
+        target.execute("PRAGMA journal_mode = DELETE") # A single self-contained file, without -wal/-shm
+        problems = integrity_check(target)
+    finally:
+        source.close()
+        target.close()
+    if problems:
+        os.remove(partial)
+        raise sqlite3.DatabaseError(f"The backup failed its integrity check: {problems[0]}")
+    os.replace(partial, path)
+
+    removed = []
+    backups = list_backups(backup_dir, db_path)
+    if keep > 0:
+        for old_backup in backups[:-keep]:
+            os.remove(old_backup)
+            removed.append(old_backup)
+    return dict(stats, path=path, removed=removed)
+
+
+def restore_database(backup_path, db_path, pages=DEFAULT_BACKUP_PAGES, progress=None):
+    """
+    Replaces the contents of `db_path` with a backup, through SQLite (the backup API again), so sessions
+    that have the database open see the restored data instead of a file swapped under them.
+    The backup is checked with quick_check first. Returns the copy_pages() stats.
+    """
+    source = open_read_only(backup_path)
+    try:
+        problems = integrity_check(source)
+        if problems:
+            raise sqlite3.DatabaseError(f"The backup is damaged: {problems[0]}")
+        target = get_db_connection(db_path)
+        try:
+            return copy_pages(source, target, pages, pause=0, progress=progress)
+        finally:
+            target.close()
+    finally:
+        source.close()
+
+
+def _print_copy_stats(verb, stats):
+    megabytes = stats["bytes"] / (1024 * 1024)
+    rate = megabytes / stats["seconds"] if stats["seconds"] else float("inf")
+    restarts = f", {stats['restarts']} restart(s)" if stats["restarts"] else ""
+    print(f"{verb} {megabytes:.1f} MiB ({stats['pages']} pages, {stats['steps']} steps{restarts}) "
+          f"in {stats['seconds']:.2f}s: {rate:.1f} MiB/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Integrity checks, repairs and backups for the academic system database.")
+    parser.add_argument("--db", default=default_database(), help=f"Database file (default: ${DB_PATH_ENV}, or {DATABASE_NAME}).")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    check_parser = commands.add_parser("check", help="Report file corruption and orphaned rows (read-only).")
+    check_parser.add_argument("--full", action="store_true", help="Run integrity_check instead of quick_check.")
+    check_parser.add_argument("--samples", type=int, default=DEFAULT_SAMPLE_SIZE, help="Orphan rows shown per foreign key.")
+
+    repair_parser = commands.add_parser("repair", help="Delete orphaned rows and clear dangling references.")
+    repair_parser.add_argument("--batch-size", type=int, default=DEFAULT_REPAIR_BATCH,
+                               help="Rows changed per transaction.")
+    repair_parser.add_argument("--yes", action="store_true", help="Do not ask for confirmation.")
+
+    backup_parser = commands.add_parser("backup", help="Copy the database while it is in use, keeping the last few copies.")
+    backup_parser.add_argument("--dir", default=DEFAULT_BACKUP_DIR, help=f"Backup directory (default: {DEFAULT_BACKUP_DIR}).")
+    backup_parser.add_argument("--keep", type=int, default=DEFAULT_BACKUP_KEEP,
+                               help="Backups to keep; older ones are deleted (0 keeps all).")
+    backup_parser.add_argument("--pages", type=int, default=DEFAULT_BACKUP_PAGES, help="Pages copied per step.")
+    backup_parser.add_argument("--pause-ms", type=float, default=DEFAULT_BACKUP_PAUSE * 1000,
+                               help="Pause after each step, letting other sessions write.")
+
+    restore_parser = commands.add_parser("restore", help="Replace the database's contents with a backup.")
+    restore_parser.add_argument("backup", nargs="?", help="Backup file (default: the latest one in --dir).")
+    restore_parser.add_argument("--dir", default=DEFAULT_BACKUP_DIR, help=f"Backup directory (default: {DEFAULT_BACKUP_DIR}).")
+    restore_parser.add_argument("--pages", type=int, default=DEFAULT_BACKUP_PAGES, help="Pages copied per step.")
+    restore_parser.add_argument("--yes", action="store_true", help="Do not ask for confirmation.")
+    args = parser.parse_args()
+
+    try:
+        run_command(args)
+    except (FileNotFoundError, sqlite3.Error) as e:
+        print(f"Error: {e}")
+        sys.exit(2)
+
+
+def run_command(args):
+    if args.command == "check":
+        sys.exit(0 if run_check(args.db, args.full, args.samples) else 1)
+
+    if args.command == "repair":
+        clean = run_check(args.db)
+        if clean:
+            print("Nothing to repair.")
+            return
+        if not args.yes and input("Repair the orphaned rows listed above? (y/n): ").strip().lower() != "y":
+            print("Repair cancelled.")
+            return
+        start = time.perf_counter()
+        fixed = repair_orphans(args.db, args.batch_size,
+                               progress=lambda table, column, total: print(f"  {table}.{column}: {total} fixed", flush=True))
+        print(f"Repaired {sum(fixed.values())} row(s) in {time.perf_counter() - start:.2f}s.")
+
+    if args.command == "backup":
+        stats = backup_database(args.db, args.dir, args.keep, args.pages, args.pause_ms / 1000)
+        _print_copy_stats(f"Backed up '{args.db}' to '{stats['path']}':", stats)
+        for path in stats["removed"]:
+            print(f"  removed old backup '{path}'")
+
+    if args.command == "restore":
+        backup_path = args.backup
+        if not backup_path:
+            backups = list_backups(args.dir, args.db)
+            if not backups:
+                raise FileNotFoundError(f"No backup of '{args.db}' in '{args.dir}'")
+            backup_path = backups[-1]
+        if not args.yes and input(f"Replace everything in '{args.db}' with '{backup_path}'? (y/n): ").strip().lower() != "y":
+            print("Restore cancelled.")
+            return
+        stats = restore_database(backup_path, args.db, args.pages)
+        _print_copy_stats(f"Restored '{args.db}' from '{backup_path}':", stats)
+
+
+if __name__ == "__main__":
+    main()
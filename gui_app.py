@@ -2,8 +2,15 @@ import tkinter as tk
 from tkinter import messagebox, simpledialog
 from database_repository import DatabaseRepository
 from auth import hash_password, check_password, get_user_by_username
+from profiling import profiler_from_command_line, install_tk_callback_profiling
+from gui_widgets import PagedTreeview, EditableGrid
+from gui_tasks import TaskExecutor
 from models import Administrator, Lecturer, Student, User, Course, Group, Grade # Import User, Course, Group, Grade for general mapping
 
+# Search-as-you-type: wait this long after the last keystroke, then show at most this many matches
+SEARCH_DEBOUNCE_MS = 150
+SEARCH_RESULT_LIMIT = 200
+
 class AcademicSystemGUI:
     def __init__(self, master):
         self.master = master
@@ -11,12 +18,16 @@ class AcademicSystemGUI:
         master.geometry("400x300") # Set initial window size
 
         self.repo = DatabaseRepository()
+        # Heavy reads run on worker threads, each with its own repository, and report back via master.after()
+        self.tasks = TaskExecutor(master, lambda: DatabaseRepository(self.repo.db_path, self.repo.profile))
         self.current_user = None
+        self._admin_seed_checked = False
 
         self._create_login_widgets()
 
     def _clear_widgets(self):
         """Clears all widgets from the current window."""
+        self.tasks.cancel_all() # Results still in flight belong to the screen being left
         for widget in self.master.winfo_children():
             widget.destroy()
 
@@ -35,42 +46,69 @@ class AcademicSystemGUI:
         self.password_entry = tk.Entry(self.login_frame, show="*", width=30)
         self.password_entry.grid(row=1, column=1, pady=5, padx=5)
 
-        tk.Button(self.login_frame, text="Login", command=self._attempt_login).grid(row=2, column=1, pady=10, sticky="e")
+        self.login_button = tk.Button(self.login_frame, text="Login", command=self._attempt_login)
+        self.login_button.grid(row=2, column=1, pady=10, sticky="e")
 
         # Seed initial admin if needed (should only run once on first app launch)
         # This is here so that when you first run the GUI, the admin is created.
-        # In a real app, you might have a separate setup script for this.
-        self._seed_initial_admin_if_needed_gui()
+        # It runs after the window has been drawn so the check does not delay the first frame.
+        if not self._admin_seed_checked:
+            self._admin_seed_checked = True
+            self.master.after_idle(self._seed_initial_admin_if_needed_gui)
 
     def _seed_initial_admin_if_needed_gui(self):
         """Seeds an initial admin user if the database is empty of admins."""
-        admin_exists = self.repo.find_one("users", {"role": "admin"})
-        if not admin_exists:
-            username = "admin.user"
-            password = "user"
+        username = "admin.user"
+        password = "user"
+
+        def seed(repo, task):
+            if repo.find_one("users", {"role": "admin"}):
+                return None
             hashed_pw = hash_password(password)
             admin_user = Administrator(None, "Admin", "System", username, hashed_pw)
-            success, msg, _ = self.repo.insert_one("users", admin_user)
+            success, msg, _ = repo.insert_one("users", admin_user)
+            return success, msg
+
+        def finish(outcome):
+            if outcome is None:
+                return # An administrator already exists
+            success, msg = outcome
             if success:
                 messagebox.showinfo("Admin Created",
                                      f"Initial Administrator created:\nUsername: {username}\nPassword: {password}")
             else:
                 messagebox.showerror("Admin Creation Failed", f"Could not create initial admin: {msg}")
 
+        self._submit_write(seed, finish)
+
     def _attempt_login(self):
         """Handles the login attempt."""
         username = self.username_entry.get().strip()
         password = self.password_entry.get().strip()
+        self.login_button.config(state=tk.DISABLED)
+
+        # The lookup and the bcrypt check run in the background so the window keeps repainting
+        def authenticate(repo, task):
+            user_obj = get_user_by_username(repo, username)
+            if user_obj and check_password(user_obj.password_hash, password):
+                return user_obj
+            return None
+
+        def finish(user_obj):
+            if user_obj:
+                self.current_user = user_obj
+                messagebox.showinfo("Login Success", f"Welcome, {self.current_user.get_full_name()}!")
+                self._show_dashboard()
+            else:
+                messagebox.showerror("Login Failed", "Invalid username or password.")
+                self.login_button.config(state=tk.NORMAL)
+                self.password_entry.delete(0, tk.END) # Clear password field
 
-        user_obj = get_user_by_username(self.repo, username)
+        def failed(error):
+            messagebox.showerror("Login Failed", f"Could not log in: {error}")
+            self.login_button.config(state=tk.NORMAL)
 
-        if user_obj and check_password(user_obj.password_hash, password):
-            self.current_user = user_obj
-            messagebox.showinfo("Login Success", f"Welcome, {self.current_user.get_full_name()}!")
-            self._show_dashboard()
-        else:
-            messagebox.showerror("Login Failed", "Invalid username or password.")
-            self.password_entry.delete(0, tk.END) # Clear password field
+        self.tasks.submit(authenticate, on_result=finish, on_error=failed)
 
     def _show_dashboard(self):
         """Displays the appropriate dashboard based on the user's role."""
@@ -90,6 +128,129 @@ class AcademicSystemGUI:
         
         tk.Button(dashboard_frame, text="Logout", command=self._logout).pack(pady=10)
 
+    def _stream_into_text(self, info_text, status_label, work, empty_message):
+        """
+        Runs the generator `work(repo, task)` in the background and appends each text chunk
+        it yields to `info_text` as it arrives. `empty_message` is shown if nothing was yielded.
+        """
+        received = []
+
+        def append(chunk):
+            received.append(True)
+            info_text.config(state=tk.NORMAL)
+            info_text.insert(tk.END, chunk)
+            info_text.config(state=tk.DISABLED)
+
+        def done():
+            if not received:
+                append(empty_message)
+            status_label.config(text="")
+
+        self.tasks.submit(work, on_chunk=append, on_error=self._show_load_error, on_done=done)
+
+    def _show_load_error(self, error):
+        """on_error handler for background loads."""
+        messagebox.showerror("Error", f"Could not load data: {error}")
+
+    def _submit_write(self, work, on_result, buttons=(), parent=None):
+        """
+        Runs the write `work(repo, task)` in the background with `buttons` disabled until it is done,
+        then hands its return value to `on_result`. Leaving the screen meanwhile drops the result but
+        never the write; so does closing the dialog `parent` the result would be shown in.
+        """
+        for button in buttons:
+            button.config(state=tk.DISABLED)
+
+        def still_shown():
+            return parent is None or parent.winfo_exists()
+
+        def finish(result):
+            if still_shown():
+                on_result(result)
+
+        def failed(error):
+            if still_shown():
+                messagebox.showerror("Error", f"An unexpected error occurred: {error}", parent=parent)
+
+        def done():
+            for button in buttons:
+                if button.winfo_exists():
+                    button.config(state=tk.NORMAL)
+
+        return self.tasks.submit(work, on_result=finish, on_error=failed, on_done=done, run_if_stale=True)
+
+    def _run_and_refresh(self, work, refresh):
+        """
+        Runs the write `work(repo, task)`, which returns (success, message), in the background,
+        reports the outcome and calls `refresh` to redraw the listing on success.
+        """
+        def finish(outcome):
+            success, message = outcome
+            if success:
+                messagebox.showinfo("Success", message)
+                refresh()
+            else:
+                messagebox.showerror("Error", message)
+
+        self._submit_write(work, finish)
+
+    def _create_search_box(self, parent):
+        """Packs a labelled search entry into `parent` and returns it (see _attach_search)."""
+        search_frame = tk.Frame(parent)
+        search_frame.pack(fill="x")
+        tk.Label(search_frame, text="Search:").pack(side="left")
+        search_entry = tk.Entry(search_frame)
+        search_entry.pack(side="left", fill="x", expand=True, padx=5)
+        search_entry.focus_set()
+        return search_entry
+
+    def _attach_search(self, search_entry, tree, count_label, noun, search):
+        """
+        Turns `search_entry` into a search-as-you-type filter for the PagedTreeview `tree`.
+        Keystrokes are debounced, then `search(repo, text)` runs in the background and its
+        ranked rows replace the listing; an empty box brings the full listing back.
+        """
+        full_listing = (tree.fetch_page, tree.count_rows)
+        state = {"pending": None, "task": None, "searching": False}
+
+        def show_count(total, searching):
+            if searching:
+                capped = " (best matches only)" if total >= SEARCH_RESULT_LIMIT else ""
+                count_label.config(text=f"{total} matching {noun}{capped}")
+            else:
+                count_label.config(text=f"{total} {noun}" if total else f"No {noun} found.")
+
+        def show_results(rows):
+            def fetch_page(repo, offset, limit, order_by, descending):
+                ordered = rows
+                if order_by in (key for key, _, _ in tree.columns):
+                    ordered = sorted(rows, key=lambda row: (row[order_by] is None, row[order_by]), reverse=descending)
+                return ordered[offset:offset + limit]
+            state["searching"] = True
+            tree.set_source(fetch_page, lambda repo: len(rows), order_by="rank")
+
+        def run_search():
+            state["pending"] = None
+            if not search_entry.winfo_exists():
+                return # The view was left while the timer was pending
+            if state["task"]:
+                state["task"].cancel() # An older, slower search must not overwrite this one
+            text = search_entry.get().strip()
+            if not text:
+                state["task"] = None
+                state["searching"] = False
+                tree.set_source(*full_listing)
+                return
+            state["task"] = self.tasks.submit(lambda repo, task: search(repo, text), on_result=show_results)
+
+        def on_key(event):
+            if state["pending"]:
+                self.master.after_cancel(state["pending"])
+            state["pending"] = self.master.after(SEARCH_DEBOUNCE_MS, run_search)
+
+        search_entry.bind("<KeyRelease>", on_key)
+        tree.on_count = lambda total: show_count(total, state["searching"])
+
     def _logout(self):
         """Logs out the current user and returns to the login screen."""
         self.current_user = None
@@ -147,28 +308,31 @@ class AcademicSystemGUI:
 
             username = f"{name.lower()}.{surname.lower()}"
             password = surname.lower() # Automatic password
-            hashed_password = hash_password(password)
-
-            new_user = None
-            if role == 'admin':
-                new_user = Administrator(None, name, surname, username, hashed_password)
-            elif role == 'lecturer':
-                new_user = Lecturer(None, name, surname, username, hashed_password)
-            elif role == 'student':
-                new_user = Student(None, name, surname, username, hashed_password)
-            else:
+
+            user_class = {"admin": Administrator, "lecturer": Lecturer, "student": Student}.get(role)
+            if user_class is None:
                 messagebox.showerror("Error", "Invalid role selected.", parent=dialog)
                 return
 
-            success, msg, _ = self.repo.insert_one("users", new_user)
-            if success:
-                messagebox.showinfo("Success", f"Added {role}: {name} {surname}.\nUsername: {username}\nPassword: {password}", parent=dialog)
-                dialog.destroy()
-                self._admin_view_users() # Refresh user list
-            else:
-                messagebox.showerror("Error", f"Failed to add user: {msg}", parent=dialog)
+            def insert(repo, task):
+                # Hashing is deliberately slow, so it runs in the background along with the insert
+                new_user = user_class(None, name, surname, username, hash_password(password))
+                success, msg, _ = repo.insert_one("users", new_user)
+                return success, msg
 
-        tk.Button(dialog, text="Add User", command=save_user).grid(row=3, column=1, pady=10, sticky="e")
+            def finish(outcome):
+                success, msg = outcome
+                if success:
+                    messagebox.showinfo("Success", f"Added {role}: {name} {surname}.\nUsername: {username}\nPassword: {password}", parent=dialog)
+                    dialog.destroy()
+                    self._admin_view_users() # Refresh user list
+                else:
+                    messagebox.showerror("Error", f"Failed to add user: {msg}", parent=dialog)
+
+            self._submit_write(insert, finish, buttons=[add_button], parent=dialog)
+
+        add_button = tk.Button(dialog, text="Add User", command=save_user)
+        add_button.grid(row=3, column=1, pady=10, sticky="e")
         tk.Button(dialog, text="Cancel", command=dialog.destroy).grid(row=3, column=0, pady=10, sticky="w")
 
 
@@ -178,28 +342,34 @@ class AcademicSystemGUI:
         view_users_frame.pack(expand=True, fill="both")
 
         tk.Label(view_users_frame, text="Admin: All Users", font=("Arial", 12, "bold")).pack(pady=10)
-
-        # Create a Text widget to display users
-        user_list_text = tk.Text(view_users_frame, wrap=tk.WORD, height=15, width=60)
-        user_list_text.pack(pady=10)
-        user_list_text.config(state=tk.DISABLED) # Make it read-only
-
-        users = self.repo.find_all("users")
-        if users:
-            display_text = ""
-            for user in users:
-                display_text += f"ID: {user.id}, Name: {user.get_full_name()}, Username: {user.username}, Role: {user.get_role().capitalize()}\n"
-            user_list_text.config(state=tk.NORMAL)
-            user_list_text.delete(1.0, tk.END)
-            user_list_text.insert(tk.END, display_text)
-            user_list_text.config(state=tk.DISABLED)
-        else:
-            user_list_text.config(state=tk.NORMAL)
-            user_list_text.delete(1.0, tk.END)
-            user_list_text.insert(tk.END, "No users found.")
-            user_list_text.config(state=tk.DISABLED)
-
-        tk.Button(view_users_frame, text="Back to Manage Users", command=self._admin_manage_users).pack(pady=20)
+        search_entry = self._create_search_box(view_users_frame)
+
+        # Only the rows on screen are fetched and drawn; click a heading to sort in SQL
+        user_list = PagedTreeview(
+            view_users_frame,
+            columns=[("id", "ID", 50), ("name", "Name", 80), ("surname", "Surname", 80),
+                     ("username", "Username", 120), ("role", "Role", 60)],
+            fetch_page=lambda repo, offset, limit, order_by, descending: repo.find_listing_page(
+                "users", offset, limit, order_by, descending),
+            count_rows=lambda repo: repo.count_listing("users"),
+            tasks=self.tasks,
+        )
+        user_list.pack(pady=10, fill="both", expand=True)
+        count_label = tk.Label(view_users_frame)
+        count_label.pack()
+        self._attach_search(search_entry, user_list, count_label, "users",
+                            lambda repo, text: repo.search_users(text, limit=SEARCH_RESULT_LIMIT))
+
+        def delete_selected():
+            row = user_list.selected_row()
+            if not row:
+                messagebox.showerror("Error", "Select a user first.")
+            elif messagebox.askyesno("Delete User", f"Delete {row['name']} {row['surname']} ({row['username']})?"):
+                self._delete_user(row["id"])
+
+        tk.Button(view_users_frame, text="Delete Selected User", command=delete_selected).pack(pady=5)
+
+        tk.Button(view_users_frame, text="Back to Manage Users", command=self._admin_manage_users).pack(pady=10)
         tk.Button(view_users_frame, text="Back to Dashboard", command=self._show_dashboard).pack(pady=5) # Added
 
 
@@ -208,23 +378,23 @@ class AcademicSystemGUI:
         user_id_str = simpledialog.askstring("Delete User", "Enter ID of user to delete:")
         if user_id_str:
             try:
-                user_id_to_delete = int(user_id_str)
-                user_obj = self.repo.find_one("users", {"id": user_id_to_delete})
-
-                if not user_obj:
-                    messagebox.showerror("Error", "User not found.")
-                elif user_obj.get_role() == 'admin' and user_obj.username == 'admin.user':
-                    messagebox.showerror("Error", "Cannot delete the primary administrator.")
-                else:
-                    if self.repo.delete_one("users", user_id_to_delete):
-                        messagebox.showinfo("Success", "User deleted successfully.")
-                        self._admin_view_users() # Refresh the list
-                    else:
-                        messagebox.showerror("Error", "Failed to delete user.")
+                self._delete_user(int(user_id_str))
             except ValueError:
                 messagebox.showerror("Input Error", "Invalid ID. Please enter a number.")
-            except Exception as e:
-                messagebox.showerror("Error", f"An unexpected error occurred: {e}")
+
+    def _delete_user(self, user_id_to_delete):
+        """Deletes a user (never the primary administrator) and refreshes the user list."""
+        def delete(repo, task):
+            user_obj = repo.find_one("users", {"id": user_id_to_delete})
+            if not user_obj:
+                return False, "User not found."
+            if user_obj.get_role() == 'admin' and user_obj.username == 'admin.user':
+                return False, "Cannot delete the primary administrator."
+            if repo.delete_one("users", user_id_to_delete):
+                return True, "User deleted successfully."
+            return False, "Failed to delete user."
+
+        self._run_and_refresh(delete, self._admin_view_users)
 
     def _admin_manage_courses(self):
         self._clear_widgets()
@@ -247,13 +417,13 @@ class AcademicSystemGUI:
                 messagebox.showerror("Input Error", "Course name cannot be empty.")
                 return
 
-            new_course = Course(None, course_name)
-            success, msg, _ = self.repo.insert_one("courses", new_course)
-            if success:
-                messagebox.showinfo("Success", f"Course '{course_name}' added successfully.")
-                self._admin_view_courses() # Refresh course list
-            else:
-                messagebox.showerror("Error", f"Failed to add course: {msg}")
+            def insert(repo, task):
+                success, msg, _ = repo.insert_one("courses", Course(None, course_name))
+                if success:
+                    return True, f"Course '{course_name}' added successfully."
+                return False, f"Failed to add course: {msg}"
+
+            self._run_and_refresh(insert, self._admin_view_courses) # Refresh course list
 
     def _admin_view_courses(self):
         self._clear_widgets()
@@ -261,30 +431,21 @@ class AcademicSystemGUI:
         view_courses_frame.pack(expand=True, fill="both")
 
         tk.Label(view_courses_frame, text="Admin: All Courses", font=("Arial", 12, "bold")).pack(pady=10)
-
-        course_list_text = tk.Text(view_courses_frame, wrap=tk.WORD, height=15, width=60)
-        course_list_text.pack(pady=10)
-        course_list_text.config(state=tk.DISABLED)
-
-        courses = self.repo.find_all("courses")
-        if courses:
-            display_text = ""
-            for course in courses:
-                lecturer_name = "N/A"
-                if course.lecturer_id:
-                    lecturer = self.repo.find_one("users", {"id": course.lecturer_id})
-                    if lecturer:
-                        lecturer_name = lecturer.get_full_name()
-                display_text += f"ID: {course.id}, Name: {course.name}, Lecturer: {lecturer_name}\n"
-            course_list_text.config(state=tk.NORMAL)
-            course_list_text.delete(1.0, tk.END)
-            course_list_text.insert(tk.END, display_text)
-            course_list_text.config(state=tk.DISABLED)
-        else:
-            course_list_text.config(state=tk.NORMAL)
-            course_list_text.delete(1.0, tk.END)
-            course_list_text.insert(tk.END, "No courses found.")
-            course_list_text.config(state=tk.DISABLED)
+        search_entry = self._create_search_box(view_courses_frame)
+
+        course_list = PagedTreeview(
+            view_courses_frame,
+            columns=[("id", "ID", 50), ("name", "Name", 200), ("lecturer", "Lecturer", 140)],
+            fetch_page=lambda repo, offset, limit, order_by, descending: repo.find_listing_page(
+                "courses", offset, limit, order_by, descending),
+            count_rows=lambda repo: repo.count_listing("courses"),
+            tasks=self.tasks,
+        )
+        course_list.pack(pady=10, fill="both", expand=True)
+        count_label = tk.Label(view_courses_frame)
+        count_label.pack()
+        self._attach_search(search_entry, course_list, count_label, "courses",
+                            lambda repo, text: repo.search_courses(text, limit=SEARCH_RESULT_LIMIT))
 
         tk.Button(view_courses_frame, text="Back to Manage Courses", command=self._admin_manage_courses).pack(pady=20)
         tk.Button(view_courses_frame, text="Back to Dashboard", command=self._show_dashboard).pack(pady=5) # Added
@@ -294,33 +455,37 @@ class AcademicSystemGUI:
         if course_id_str:
             try:
                 course_id_to_delete = int(course_id_str)
-                if self.repo.delete_one("courses", course_id_to_delete):
-                    messagebox.showinfo("Success", "Course deleted successfully.")
-                    self._admin_view_courses()
-                else:
-                    messagebox.showerror("Error", "Failed to delete course or course not found.")
             except ValueError:
                 messagebox.showerror("Input Error", "Invalid ID. Please enter a number.")
-            except Exception as e:
-                messagebox.showerror("Error", f"An unexpected error occurred: {e}")
+                return
+
+            def delete(repo, task):
+                if repo.delete_one("courses", course_id_to_delete):
+                    return True, "Course deleted successfully."
+                return False, "Failed to delete course or course not found."
+
+            self._run_and_refresh(delete, self._admin_view_courses)
 
     def _admin_assign_lecturer_dialog(self):
-        dialog = tk.Toplevel(self.master)
-        dialog.title("Assign Lecturer to Course")
-        dialog.geometry("400x300")
+        """Loads the courses and lecturers in the background, then opens the assignment dialog."""
+        def load(repo, task):
+            return repo.find_all("courses"), repo.find_all("users", {"role": "lecturer"})
 
-        courses = self.repo.find_all("courses")
-        lecturers = self.repo.find_all("users", {"role": "lecturer"})
+        self.tasks.submit(load, on_result=lambda loaded: self._show_assign_lecturer_dialog(*loaded),
+                          on_error=self._show_load_error)
 
+    def _show_assign_lecturer_dialog(self, courses, lecturers):
         if not courses:
-            messagebox.showerror("Error", "No courses available to assign lecturers.", parent=dialog)
-            dialog.destroy()
+            messagebox.showerror("Error", "No courses available to assign lecturers.")
             return
         if not lecturers:
-            messagebox.showerror("Error", "No lecturers available to assign.", parent=dialog)
-            dialog.destroy()
+            messagebox.showerror("Error", "No lecturers available to assign.")
             return
 
+        dialog = tk.Toplevel(self.master)
+        dialog.title("Assign Lecturer to Course")
+        dialog.geometry("400x300")
+
         tk.Label(dialog, text="Select Course:").pack(pady=5)
         course_names = [f"ID: {c.id} - {c.name}" for c in courses]
         course_var = tk.StringVar(dialog)
@@ -347,15 +512,19 @@ class AcademicSystemGUI:
             else:
                 lecturer_id = int(selected_lecturer_str.split(" - ")[0].replace("ID: ", ""))
 
-            success = self.repo.update_one("courses", course_id, {"lecturer_id": lecturer_id})
-            if success:
-                messagebox.showinfo("Success", "Assignment updated successfully.", parent=dialog)
-                dialog.destroy()
-                self._admin_view_courses() # Refresh view
-            else:
-                messagebox.showerror("Error", "Failed to update assignment.", parent=dialog)
+            def finish(success):
+                if success:
+                    messagebox.showinfo("Success", "Assignment updated successfully.", parent=dialog)
+                    dialog.destroy()
+                    self._admin_view_courses() # Refresh view
+                else:
+                    messagebox.showerror("Error", "Failed to update assignment.", parent=dialog)
+
+            self._submit_write(lambda repo, task: repo.update_one("courses", course_id, {"lecturer_id": lecturer_id}),
+                               finish, buttons=[assign_button], parent=dialog)
 
-        tk.Button(dialog, text="Assign", command=assign).pack(pady=10)
+        assign_button = tk.Button(dialog, text="Assign", command=assign)
+        assign_button.pack(pady=10)
         tk.Button(dialog, text="Cancel", command=dialog.destroy).pack(pady=5)
 
 
@@ -369,8 +538,9 @@ class AcademicSystemGUI:
         tk.Button(manage_groups_frame, text="Add New Group", command=self._admin_add_group_dialog).pack(pady=5)
         tk.Button(manage_groups_frame, text="View All Groups", command=self._admin_view_groups).pack(pady=5)
         tk.Button(manage_groups_frame, text="Delete Group (by ID)", command=self._admin_delete_group_dialog).pack(pady=5)
-        tk.Button(manage_groups_frame, text="Assign Student to Group", command=self._admin_assign_student_to_group_dialog).pack(pady=5)
-        tk.Button(manage_groups_frame, text="Assign Course to Group", command=self._admin_assign_course_to_group_dialog).pack(pady=5)
+        tk.Button(manage_groups_frame, text="Assign Students to Groups", command=self._admin_assign_student_to_group_dialog).pack(pady=5)
+        tk.Button(manage_groups_frame, text="Assign Courses to Groups", command=self._admin_assign_course_to_group_dialog).pack(pady=5)
+        tk.Button(manage_groups_frame, text="Term Rollover (clone groups)", command=self._admin_rollover_groups_dialog).pack(pady=5)
         tk.Button(manage_groups_frame, text="Back to Dashboard", command=self._show_dashboard).pack(pady=20) # Added
 
     def _admin_add_group_dialog(self):
@@ -380,13 +550,14 @@ class AcademicSystemGUI:
             if not group_name:
                 messagebox.showerror("Input Error", "Group name cannot be empty.")
                 return
-            new_group = Group(None, group_name)
-            success, msg, _ = self.repo.insert_one("groups", new_group)
-            if success:
-                messagebox.showinfo("Success", f"Group '{group_name}' added successfully.")
-                self._admin_view_groups()
-            else:
-                messagebox.showerror("Error", f"Failed to add group: {msg}")
+
+            def insert(repo, task):
+                success, msg, _ = repo.insert_one("groups", Group(None, group_name))
+                if success:
+                    return True, f"Group '{group_name}' added successfully."
+                return False, f"Failed to add group: {msg}"
+
+            self._run_and_refresh(insert, self._admin_view_groups)
 
     def _admin_view_groups(self):
         self._clear_widgets()
@@ -395,38 +566,47 @@ class AcademicSystemGUI:
 
         tk.Label(view_groups_frame, text="Admin: All Groups", font=("Arial", 12, "bold")).pack(pady=10)
 
-        group_list_text = tk.Text(view_groups_frame, wrap=tk.WORD, height=15, width=60)
-        group_list_text.pack(pady=10)
-        group_list_text.config(state=tk.DISABLED)
-
-        groups = self.repo.find_all("groups")
-        if groups:
-            display_text = ""
-            for group in groups:
-                # Need to refresh group object from repo to get updated student/course lists
-                full_group = self.repo.find_one("groups", {"id": group.id}) # Re-fetch to get linked IDs
-                student_names = []
-                for s_id in full_group.student_ids:
-                    s = self.repo.find_one("users", {"id": s_id})
-                    if s: student_names.append(s.get_full_name())
-                
-                course_names = []
-                for c_id in full_group.course_ids:
-                    c = self.repo.find_one("courses", {"id": c_id})
-                    if c: course_names.append(c.name)
-
-                display_text += f"ID: {group.id}, Name: {group.name}\n" \
-                                f"   Students: {', '.join(student_names) or 'None'}\n" \
-                                f"   Courses: {', '.join(course_names) or 'None'}\n\n"
-            group_list_text.config(state=tk.NORMAL)
-            group_list_text.delete(1.0, tk.END)
-            group_list_text.insert(tk.END, display_text)
-            group_list_text.config(state=tk.DISABLED)
-        else:
-            group_list_text.config(state=tk.NORMAL)
-            group_list_text.delete(1.0, tk.END)
-            group_list_text.insert(tk.END, "No groups found.")
-            group_list_text.config(state=tk.DISABLED)
+        # Members are only loaded for the selected group instead of for every group up front
+        group_details_text = tk.Text(view_groups_frame, wrap=tk.WORD, height=6, width=60)
+
+        members_task = {"task": None}
+
+        def show_details_text(text):
+            group_details_text.config(state=tk.NORMAL)
+            group_details_text.delete(1.0, tk.END)
+            group_details_text.insert(tk.END, text)
+            group_details_text.config(state=tk.DISABLED)
+
+        def show_group_details(row):
+            if members_task["task"]:
+                members_task["task"].cancel() # Only the last selected group's members are shown
+            show_details_text(f"ID: {row['id']}, Name: {row['name']}\n   Loading members...\n")
+
+            def show_members(members):
+                student_names, course_names = members
+                show_details_text(f"ID: {row['id']}, Name: {row['name']}\n"
+                                  f"   Students: {', '.join(student_names) or 'None'}\n"
+                                  f"   Courses: {', '.join(course_names) or 'None'}\n")
+
+            members_task["task"] = self.tasks.submit(lambda repo, task: repo.find_group_members(row["id"]),
+                                                     on_result=show_members, on_error=self._show_load_error)
+
+        group_list = PagedTreeview(
+            view_groups_frame,
+            columns=[("id", "ID", 50), ("name", "Name", 180), ("students", "Students", 80), ("courses", "Courses", 80)],
+            fetch_page=lambda repo, offset, limit, order_by, descending: repo.find_listing_page(
+                "groups", offset, limit, order_by, descending),
+            count_rows=lambda repo: repo.count_listing("groups"),
+            tasks=self.tasks,
+            visible_rows=10,
+            on_select=show_group_details,
+            on_count=lambda total: show_details_text(
+                "Select a group to see its students and courses." if total else "No groups found."),
+        )
+        group_list.pack(pady=10, fill="both", expand=True)
+
+        group_details_text.pack(pady=5)
+        group_details_text.config(state=tk.DISABLED)
 
         tk.Button(view_groups_frame, text="Back to Manage Groups", command=self._admin_manage_groups).pack(pady=20)
         tk.Button(view_groups_frame, text="Back to Dashboard", command=self._show_dashboard).pack(pady=5) # Added
@@ -437,131 +617,237 @@ class AcademicSystemGUI:
         if group_id_str:
             try:
                 group_id_to_delete = int(group_id_str)
-                if self.repo.delete_one("groups", group_id_to_delete):
-                    messagebox.showinfo("Success", "Group deleted successfully.")
-                    self._admin_view_groups()
-                else:
-                    messagebox.showerror("Error", "Failed to delete group or group not found.")
             except ValueError:
                 messagebox.showerror("Input Error", "Invalid ID. Please enter a number.")
-            except Exception as e:
-                messagebox.showerror("Error", f"An unexpected error occurred: {e}")
+                return
 
-    def _admin_assign_student_to_group_dialog(self):
-        dialog = tk.Toplevel(self.master)
-        dialog.title("Assign Student to Group")
-        dialog.geometry("400x300")
+            def delete(repo, task):
+                if repo.delete_one("groups", group_id_to_delete):
+                    return True, "Group deleted successfully."
+                return False, "Failed to delete group or group not found."
 
-        students = self.repo.find_all("users", {"role": "student"})
-        groups = self.repo.find_all("groups")
+            self._run_and_refresh(delete, self._admin_view_groups)
 
-        if not students:
-            messagebox.showerror("Error", "No students available.", parent=dialog)
-            dialog.destroy()
+    def _admin_assign_student_to_group_dialog(self):
+        self._bulk_assign_to_groups_dialog(
+            "Assign Students to Groups", "group_students", lambda repo: repo.find_all("users", {"role": "student"}),
+            "Students", "username",
+            describe=lambda s: f"{s.get_full_name()} ({s.username})", member_key=lambda s: s.username)
+
+    def _admin_assign_course_to_group_dialog(self):
+        self._bulk_assign_to_groups_dialog(
+            "Assign Courses to Groups", "group_courses", lambda repo: repo.find_all("courses"), "Courses", "name",
+            describe=lambda c: c.name, member_key=lambda c: c.name)
+
+    def _bulk_assign_to_groups_dialog(self, title, link_table, find_members, member_label, key, describe, member_key):
+        """
+        Multi-select assignment dialog: pick any number of members and groups (Ctrl/Shift-click),
+        and/or paste or load a CSV of usernames/names; every pair is linked in one transaction.
+        The members (`find_members(repo)`) and groups are loaded in the background before it opens.
+        """
+        def load(repo, task):
+            return find_members(repo), repo.find_all("groups")
+
+        def show(loaded):
+            self._show_bulk_assign_dialog(title, link_table, *loaded, member_label, key, describe, member_key)
+
+        self.tasks.submit(load, on_result=show, on_error=self._show_load_error)
+
+    def _show_bulk_assign_dialog(self, title, link_table, members, groups, member_label, key, describe, member_key):
+        if not members:
+            messagebox.showerror("Error", f"No {member_label.lower()} available.")
             return
         if not groups:
-            messagebox.showerror("Error", "No groups available.", parent=dialog)
-            dialog.destroy()
+            messagebox.showerror("Error", "No groups available.")
             return
-        
-        tk.Label(dialog, text="Select Student:").pack(pady=5)
-        student_names = [f"ID: {s.id} - {s.get_full_name()}" for s in students]
-        student_var = tk.StringVar(dialog)
-        student_var.set(student_names[0])
-        student_menu = tk.OptionMenu(dialog, student_var, *student_names)
-        student_menu.pack(pady=5, fill="x", padx=10)
 
-        tk.Label(dialog, text="Select Group:").pack(pady=5)
-        group_names = [f"ID: {g.id} - {g.name}" for g in groups]
-        group_var = tk.StringVar(dialog)
-        group_var.set(group_names[0])
-        group_menu = tk.OptionMenu(dialog, group_var, *group_names)
-        group_menu.pack(pady=5, fill="x", padx=10)
+        dialog = tk.Toplevel(self.master)
+        dialog.title(title)
+        dialog.geometry("560x480")
+
+        lists_frame = tk.Frame(dialog)
+        lists_frame.pack(fill="both", expand=True, padx=10, pady=5)
+
+        def make_listbox(column, label, entries):
+            tk.Label(lists_frame, text=label).grid(row=0, column=column * 2, sticky="w")
+            listbox = tk.Listbox(lists_frame, selectmode=tk.EXTENDED, exportselection=False, height=12)
+            scrollbar = tk.Scrollbar(lists_frame, orient="vertical", command=listbox.yview)
+            listbox.config(yscrollcommand=scrollbar.set)
+            listbox.grid(row=1, column=column * 2, sticky="nsew")
+            scrollbar.grid(row=1, column=column * 2 + 1, sticky="ns")
+            lists_frame.grid_columnconfigure(column * 2, weight=1)
+            listbox.insert(tk.END, *entries)
+            return listbox
+
+        member_listbox = make_listbox(0, f"Select {member_label} (Ctrl/Shift-click):", [describe(m) for m in members])
+        group_listbox = make_listbox(1, "Select Groups:", [g.name for g in groups])
+        lists_frame.grid_rowconfigure(1, weight=1)
+
+        tk.Label(dialog, text=f"...and/or paste {key}s, one per line or comma-separated:").pack(anchor="w", padx=10)
+        pasted_text = tk.Text(dialog, height=4)
+        pasted_text.pack(fill="x", padx=10)
+
+        def load_csv():
+            from tkinter import filedialog
+            import csv
+            path = filedialog.askopenfilename(parent=dialog, title=f"CSV of {key}s",
+                                              filetypes=[("CSV files", "*.csv"), ("All files", "*")])
+            if not path:
+                return
+            with open(path, newline="", encoding="utf-8") as keys_file:
+                keys = [row[0].strip() for row in csv.reader(keys_file) if row and row[0].strip()]
+            if keys and keys[0].lower() in ("id", "username", "name"):
+                keys = keys[1:] # Header row
+            pasted_text.insert(tk.END, "\n".join(keys) + "\n")
+
+        tk.Button(dialog, text="Load CSV...", command=load_csv).pack(anchor="e", padx=10, pady=2)
 
         def assign():
-            selected_student_str = student_var.get()
-            selected_group_str = group_var.get()
-
-            student_id = int(selected_student_str.split(" - ")[0].replace("ID: ", ""))
-            group_id = int(selected_group_str.split(" - ")[0].replace("ID: ", ""))
+            member_keys = [member_key(members[i]) for i in member_listbox.curselection()]
+            pasted = pasted_text.get("1.0", tk.END).replace(",", "\n").splitlines()
+            member_keys += [k.strip() for k in pasted if k.strip()]
+            group_ids = [groups[i].id for i in group_listbox.curselection()]
+            if not member_keys or not group_ids:
+                messagebox.showerror("Input Error", f"Select at least one of the {member_label.lower()} and one group.", parent=dialog)
+                return
 
-            success, msg = self.repo.add_student_to_group(group_id, student_id)
-            if success:
-                messagebox.showinfo("Success", f"Student assigned to group: {msg}", parent=dialog)
+            def finish(outcome):
+                success, result = outcome
+                if not success:
+                    messagebox.showerror("Error", f"Nothing was assigned: {result}", parent=dialog)
+                    return
+                message = f"Added {result['added']} assignment(s); {result['already_present']} were already in place."
+                if result["unknown_members"]:
+                    unknown = ", ".join(str(k) for k in result["unknown_members"][:10])
+                    more = "..." if len(result["unknown_members"]) > 10 else ""
+                    message += f"\nNot found ({len(result['unknown_members'])}): {unknown}{more}"
+                messagebox.showinfo("Success", message, parent=dialog)
                 dialog.destroy()
                 self._admin_view_groups() # Refresh view
-            else:
-                messagebox.showerror("Error", f"Failed to assign student: {msg}", parent=dialog)
 
-        tk.Button(dialog, text="Assign", command=assign).pack(pady=10)
-        tk.Button(dialog, text="Cancel", command=dialog.destroy).pack(pady=5)
+            self._submit_write(lambda repo, task: repo.assign_to_groups(link_table, member_keys, group_ids, key),
+                               finish, buttons=[assign_button], parent=dialog)
 
-    def _admin_assign_course_to_group_dialog(self):
-        dialog = tk.Toplevel(self.master)
-        dialog.title("Assign Course to Group")
-        dialog.geometry("400x300")
+        assign_button = tk.Button(dialog, text="Assign", command=assign)
+        assign_button.pack(pady=5)
+        tk.Button(dialog, text="Cancel", command=dialog.destroy).pack(pady=5)
 
-        courses = self.repo.find_all("courses")
-        groups = self.repo.find_all("groups")
+    def _admin_rollover_groups_dialog(self):
+        """Clones the selected groups under new names, with a preview before anything is written."""
+        self.tasks.submit(lambda repo, task: repo.find_all("groups"), on_result=self._show_rollover_groups_dialog,
+                          on_error=self._show_load_error)
 
-        if not courses:
-            messagebox.showerror("Error", "No courses available.", parent=dialog)
-            dialog.destroy()
-            return
+    def _show_rollover_groups_dialog(self, groups):
         if not groups:
-            messagebox.showerror("Error", "No groups available.", parent=dialog)
-            dialog.destroy()
+            messagebox.showerror("Error", "No groups available.")
             return
-        
-        tk.Label(dialog, text="Select Course:").pack(pady=5)
-        course_names = [f"ID: {c.id} - {c.name}" for c in courses]
-        course_var = tk.StringVar(dialog)
-        course_var.set(course_names[0])
-        course_menu = tk.OptionMenu(dialog, course_var, *course_names)
-        course_menu.pack(pady=5, fill="x", padx=10)
-
-        tk.Label(dialog, text="Select Group:").pack(pady=5)
-        group_names = [f"ID: {g.id} - {g.name}" for g in groups]
-        group_var = tk.StringVar(dialog)
-        group_var.set(group_names[0])
-        group_menu = tk.OptionMenu(dialog, group_var, *group_names)
-        group_menu.pack(pady=5, fill="x", padx=10)
-
-        def assign():
-            selected_course_str = course_var.get()
-            selected_group_str = group_var.get()
-
-            course_id = int(selected_course_str.split(" - ")[0].replace("ID: ", ""))
-            group_id = int(selected_group_str.split(" - ")[0].replace("ID: ", ""))
 
-            success, msg = self.repo.add_course_to_group(group_id, course_id)
-            if success:
-                messagebox.showinfo("Success", f"Course assigned to group: {msg}", parent=dialog)
-                dialog.destroy()
-                self._admin_view_groups() # Refresh view
-            else:
-                messagebox.showerror("Error", f"Failed to assign course: {msg}", parent=dialog)
+        dialog = tk.Toplevel(self.master)
+        dialog.title("Term Rollover")
+        dialog.geometry("520x560")
+
+        tk.Label(dialog, text="Groups to clone (Ctrl/Shift-click):").pack(anchor="w", padx=10, pady=(10, 0))
+        list_frame = tk.Frame(dialog)
+        list_frame.pack(fill="both", expand=True, padx=10)
+        group_listbox = tk.Listbox(list_frame, selectmode=tk.EXTENDED, exportselection=False, height=10)
+        scrollbar = tk.Scrollbar(list_frame, orient="vertical", command=group_listbox.yview)
+        group_listbox.config(yscrollcommand=scrollbar.set)
+        group_listbox.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+        group_listbox.insert(tk.END, *[g.name for g in groups])
+        tk.Button(dialog, text="Select All", command=lambda: group_listbox.select_set(0, tk.END)).pack(anchor="e", padx=10)
+
+        options_frame = tk.Frame(dialog)
+        options_frame.pack(fill="x", padx=10, pady=5)
+        entries = {}
+        for row, (option, label) in enumerate([("find", "Replace text:"), ("replace", "With:"), ("suffix", "Append suffix:")]):
+            tk.Label(options_frame, text=label).grid(row=row, column=0, sticky="w")
+            entries[option] = tk.Entry(options_frame)
+            entries[option].grid(row=row, column=1, sticky="ew", padx=5)
+        options_frame.grid_columnconfigure(1, weight=1)
+        copy_courses_var = tk.BooleanVar(dialog, value=True)
+        copy_students_var = tk.BooleanVar(dialog, value=False)
+        tk.Checkbutton(dialog, text="Copy course assignments", variable=copy_courses_var).pack(anchor="w", padx=10)
+        tk.Checkbutton(dialog, text="Copy student memberships", variable=copy_students_var).pack(anchor="w", padx=10)
+
+        preview_text = tk.Text(dialog, height=8, wrap=tk.WORD, state=tk.DISABLED)
+        preview_text.pack(fill="both", padx=10, pady=5)
+
+        def show_report(report, preview_rows=50):
+            lines = [f"{old_name} -> {new_name}" for _, old_name, new_name in report["groups"][:preview_rows]]
+            if len(report["groups"]) > preview_rows:
+                lines.append(f"... and {len(report['groups']) - preview_rows} more")
+            verb = "would be" if report["dry_run"] else "were"
+            lines.append(f"\n{len(report['groups'])} group(s) {verb} cloned with {report['courses']} course "
+                         f"and {report['students']} student assignment(s).")
+            if report["conflicts"]:
+                lines.append(f"Name conflicts ({len(report['conflicts'])}): {', '.join(report['conflicts'][:preview_rows])}")
+            preview_text.config(state=tk.NORMAL)
+            preview_text.delete("1.0", tk.END)
+            preview_text.insert(tk.END, "\n".join(lines))
+            preview_text.config(state=tk.DISABLED)
+
+        def run(dry_run):
+            group_ids = [groups[i].id for i in group_listbox.curselection()]
+            if not group_ids:
+                messagebox.showerror("Input Error", "Select at least one group.", parent=dialog)
+                return
+            if not dry_run and not messagebox.askyesno("Term Rollover", f"Clone {len(group_ids)} group(s) now?", parent=dialog):
+                return
+            options = {option: entry.get() for option, entry in entries.items()}
+            copy_courses, copy_students = copy_courses_var.get(), copy_students_var.get()
 
-        tk.Button(dialog, text="Assign", command=assign).pack(pady=10)
-        tk.Button(dialog, text="Cancel", command=dialog.destroy).pack(pady=5)
+            def finish(outcome):
+                success, result = outcome
+                if not success:
+                    messagebox.showerror("Error", f"Nothing was cloned: {result}", parent=dialog)
+                    return
+                show_report(result)
+                if not dry_run:
+                    messagebox.showinfo("Success", f"Cloned {len(result['groups'])} group(s).", parent=dialog)
+                    dialog.destroy()
+                    self._admin_view_groups() # Refresh view
+
+            self._submit_write(lambda repo, task: repo.rollover_groups(group_ids, copy_courses=copy_courses,
+                                                                       copy_students=copy_students, dry_run=dry_run,
+                                                                       **options),
+                               finish, buttons=[preview_button, rollover_button], parent=dialog)
+
+        buttons_frame = tk.Frame(dialog)
+        buttons_frame.pack(pady=5)
+        preview_button = tk.Button(buttons_frame, text="Preview", command=lambda: run(True))
+        preview_button.pack(side="left", padx=5)
+        rollover_button = tk.Button(buttons_frame, text="Roll Over", command=lambda: run(False))
+        rollover_button.pack(side="left", padx=5)
+        tk.Button(buttons_frame, text="Cancel", command=dialog.destroy).pack(side="left", padx=5)
 
     # --- Lecturer Dashboard Functions ---
     def _create_lecturer_dashboard(self, parent_frame):
         tk.Button(parent_frame, text="Enter/Edit Grades", command=self._lecturer_enter_grade_dialog).pack(pady=5)
+        tk.Button(parent_frame, text="Grade Sheet (whole course)", command=self._lecturer_grade_sheet).pack(pady=5)
         tk.Button(parent_frame, text="View My Courses & Students", command=self._lecturer_view_courses_and_students).pack(pady=5)
         # Add more lecturer buttons
 
     def _lecturer_enter_grade_dialog(self):
-        dialog = tk.Toplevel(self.master)
-        dialog.title("Enter/Edit Grade")
-        dialog.geometry("400x350")
+        lecturer_id = self.current_user.id
+
+        # Dialog-scoped roster cache: every course's students and current grades, fetched once in one
+        # query and patched in place after each save, so switching courses and saving never re-query.
+        def load(repo, task):
+            return repo.find_all("courses", {"lecturer_id": lecturer_id}), repo.find_course_rosters(lecturer_id)
+
+        self.tasks.submit(load, on_result=lambda loaded: self._show_enter_grade_dialog(*loaded),
+                          on_error=self._show_load_error)
 
-        lecturer_courses = self.repo.find_all("courses", {"lecturer_id": self.current_user.id})
+    def _show_enter_grade_dialog(self, lecturer_courses, rosters):
         if not lecturer_courses:
-            messagebox.showerror("Error", "You are not assigned to any courses.", parent=dialog)
-            dialog.destroy()
+            messagebox.showerror("Error", "You are not assigned to any courses.")
             return
 
+        dialog = tk.Toplevel(self.master)
+        dialog.title("Enter/Edit Grade")
+        dialog.geometry("400x350")
+
         tk.Label(dialog, text="Select Course:").pack(pady=5)
         course_display_names = [f"ID: {c.id} - {c.name}" for c in lecturer_courses]
         course_var = tk.StringVar(dialog)
@@ -569,7 +855,7 @@ class AcademicSystemGUI:
         course_menu = tk.OptionMenu(dialog, course_var, *course_display_names)
         course_menu.pack(pady=5, fill="x", padx=10)
 
-        students_for_selected_course = [] # Will be populated dynamically
+        students_for_selected_course = [] # Roster rows of the selected course
 
         tk.Label(dialog, text="Select Student:").pack(pady=5)
         student_var = tk.StringVar(dialog)
@@ -580,42 +866,30 @@ class AcademicSystemGUI:
         grade_entry = tk.Entry(dialog)
         grade_entry.pack(pady=5, fill="x", padx=10)
 
-        def update_students_dropdown(*args):
+        def student_display_name(entry):
+            current_grade = entry["grade"] if entry["grade"] is not None else "N/A"
+            return f"ID: {entry['student_id']} - {entry['name']} {entry['surname']} (Current: {current_grade})"
+
+        def update_students_dropdown(*args, keep_student_id=None):
             selected_course_id = int(course_var.get().split(" - ")[0].replace("ID: ", ""))
-            
-            # Find students for this course via groups
-            students_in_course_ids = set()
-            for group in self.repo.find_all("groups"):
-                # Check if this group is associated with the selected course
-                group_course_link = self.repo.find_one("group_courses", {"group_id": group.id, "course_id": selected_course_id})
-                if group_course_link:
-                    # If the group is linked to the course, find all students in that group
-                    group_students_links = self.repo.find_all("group_students", {"group_id": group.id})
-                    for link in group_students_links:
-                        # Ensure 'student_id' attribute exists, if not, try direct dict key
-                        students_in_course_ids.add(link.get('student_id') if isinstance(link, dict) else link.student_id)
-            
+
             nonlocal students_for_selected_course
-            students_for_selected_course = []
-            for student_id in students_in_course_ids:
-                student_obj = self.repo.find_one("users", {"id": student_id, "role": "student"})
-                if student_obj:
-                    students_for_selected_course.append(student_obj)
+            students_for_selected_course = rosters.get(selected_course_id, [])
 
-            student_display_names = []
+            student_display_names = [student_display_name(entry) for entry in students_for_selected_course]
             if students_for_selected_course:
-                for student in students_for_selected_course:
-                    grade_obj = self.repo.find_one("grades", {"student_id": student.id, "course_id": selected_course_id})
-                    current_grade = grade_obj.value if grade_obj else "N/A"
-                    student_display_names.append(f"ID: {student.id} - {student.get_full_name()} (Current: {current_grade})")
-                student_var.set(student_display_names[0])
+                selected_name = student_display_names[0]
+                for entry, name in zip(students_for_selected_course, student_display_names):
+                    if entry["student_id"] == keep_student_id:
+                        selected_name = name # Stay on the student just graded
+                student_var.set(selected_name)
             else:
                 student_var.set("No students for this course")
-            
+
             student_menu['menu'].delete(0, 'end')
             for name in student_display_names:
                 student_menu['menu'].add_command(label=name, command=tk._set_menu_value(student_var, name))
-            
+
             if not students_for_selected_course:
                 grade_entry.delete(0, tk.END) # Clear grade entry if no students
                 grade_entry.config(state=tk.DISABLED) # Disable grade entry
@@ -633,7 +907,8 @@ class AcademicSystemGUI:
 
             selected_course_id = int(course_var.get().split(" - ")[0].replace("ID: ", ""))
             selected_student_id = int(student_var.get().split(" - ")[0].replace("ID: ", ""))
-            
+            entry = next(e for e in students_for_selected_course if e["student_id"] == selected_student_id)
+
             try:
                 grade_value = float(grade_entry.get().strip())
                 if not (0 <= grade_value <= 100):
@@ -642,77 +917,178 @@ class AcademicSystemGUI:
             except ValueError:
                 messagebox.showerror("Input Error", "Please enter a valid number for the grade.", parent=dialog)
                 return
-            
-            existing_grade = self.repo.find_one("grades", {"student_id": selected_student_id, "course_id": selected_course_id})
-            if existing_grade:
-                success = self.repo.update_one("grades", existing_grade.id, {"value": grade_value})
-                if success:
-                    messagebox.showinfo("Success", "Grade updated successfully.", parent=dialog)
-                    update_students_dropdown() # Refresh current grades in dropdown
-                else:
-                    messagebox.showerror("Error", "Failed to update grade.", parent=dialog)
-            else:
+
+            grade_id = entry["grade_id"]
+
+            def write(repo, task):
+                if grade_id is not None:
+                    success = repo.update_one("grades", grade_id, {"value": grade_value})
+                    return success, "Grade updated successfully." if success else "Failed to update grade.", grade_id
                 new_grade = Grade(None, selected_student_id, selected_course_id, grade_value)
-                success, msg, _ = self.repo.insert_one("grades", new_grade)
+                success, msg, new_grade_id = repo.insert_one("grades", new_grade)
+                return success, "Grade entered successfully." if success else f"Failed to enter grade: {msg}", new_grade_id
+
+            def finish(outcome):
+                success, message, saved_grade_id = outcome
                 if success:
-                    messagebox.showinfo("Success", "Grade entered successfully.", parent=dialog)
-                    update_students_dropdown() # Refresh current grades in dropdown
+                    # Patch the cached roster instead of reloading it
+                    entry["grade_id"], entry["grade"] = saved_grade_id, grade_value
+                    messagebox.showinfo("Success", message, parent=dialog)
+                    update_students_dropdown(keep_student_id=selected_student_id) # Refresh current grades in dropdown
                 else:
-                    messagebox.showerror("Error", f"Failed to enter grade: {msg}", parent=dialog)
+                    messagebox.showerror("Error", message, parent=dialog)
+
+            self._submit_write(write, finish, buttons=[save_button], parent=dialog)
 
-        tk.Button(dialog, text="Save Grade", command=save_grade).pack(pady=10)
+        save_button = tk.Button(dialog, text="Save Grade", command=save_grade)
+        save_button.pack(pady=10)
         tk.Button(dialog, text="Back to Dashboard", command=lambda: [dialog.destroy(), self._show_dashboard()]).pack(pady=5) # Added
 
+    def _lecturer_grade_sheet(self):
+        """Spreadsheet-style grade entry for a whole course, saved in one transaction."""
+        lecturer_id = self.current_user.id
+
+        # Every roster of the lecturer in one query; kept up to date locally after each save
+        def load(repo, task):
+            return repo.find_all("courses", {"lecturer_id": lecturer_id}), repo.find_course_rosters(lecturer_id)
+
+        self.tasks.submit(load, on_result=lambda loaded: self._show_grade_sheet(*loaded),
+                          on_error=self._show_load_error)
+
+    def _show_grade_sheet(self, lecturer_courses, rosters):
+        if not lecturer_courses:
+            messagebox.showerror("Error", "You are not assigned to any courses.")
+            return
+
+        self._clear_widgets()
+        sheet_frame = tk.Frame(self.master, padx=20, pady=20)
+        sheet_frame.pack(expand=True, fill="both")
+
+        tk.Label(sheet_frame, text="Lecturer: Grade Sheet", font=("Arial", 12, "bold")).pack(pady=10)
+        tk.Label(sheet_frame, text="Type a grade on a row, Enter moves to the next student. Nothing is saved until you click Save.").pack()
+
+        course_display_names = [f"ID: {c.id} - {c.name}" for c in lecturer_courses]
+        course_var = tk.StringVar(sheet_frame)
+        course_var.set(course_display_names[0])
+        tk.OptionMenu(sheet_frame, course_var, *course_display_names).pack(pady=5, fill="x")
+
+        status_label = tk.Label(sheet_frame)
+        grid = EditableGrid(
+            sheet_frame,
+            columns=[("student_id", "ID", 60), ("student", "Student", 220), ("grade", "Grade", 80)],
+            editable="grade",
+            validate=Grade.parse_value,
+            height=15,
+            on_change=lambda dirty: status_label.config(
+                text=f"{dirty} unsaved change(s)" if dirty else "No unsaved changes."),
+        )
+        grid.pack(pady=5, fill="both", expand=True)
+        status_label.pack()
+
+        shown = {"course_id": None}
+
+        def selected_course_id():
+            return int(course_var.get().split(" - ")[0].replace("ID: ", ""))
+
+        def load_course(*args):
+            course_id = selected_course_id()
+            if course_id == shown["course_id"]:
+                return
+            if shown["course_id"] is not None and grid.has_changes():
+                if not messagebox.askyesno("Unsaved Grades", "Discard the unsaved grades of the current course?"):
+                    # Put the previous course back; load_course runs again and returns early
+                    course_var.set(next(name for name in course_display_names
+                                        if name.startswith(f"ID: {shown['course_id']} - ")))
+                    return
+            shown["course_id"] = course_id
+            grid.load([dict(entry, student=f"{entry['name']} {entry['surname']}")
+                       for entry in rosters.get(course_id, [])], key="student_id")
+            if not rosters.get(course_id):
+                status_label.config(text="No students for this course.")
+
+        def save():
+            values, errors = grid.dirty_values()
+            if errors:
+                messagebox.showerror("Input Error", f"{len(errors)} grade(s) are invalid (highlighted in red).\n"
+                                     f"{next(iter(errors.values()))}")
+                return
+            if not values:
+                messagebox.showinfo("Nothing to Save", "No grades were changed.")
+                return
+            course_id = shown["course_id"]
+            grades = [(int(student_id), course_id, value) for student_id, value in values.items()]
+
+            def finish(outcome):
+                success, result = outcome
+                if not success:
+                    messagebox.showerror("Error", f"No grades were saved: {result}")
+                    return
+                for entry in rosters.get(course_id, []):
+                    if str(entry["student_id"]) in values:
+                        entry["grade"] = values[str(entry["student_id"])]
+                if shown["course_id"] == course_id: # The lecturer may have switched courses meanwhile
+                    grid.mark_saved(values)
+                messagebox.showinfo("Success", f"Saved {result} grade(s).")
+
+            self._submit_write(lambda repo, task: repo.upsert_grades_many(grades), finish, buttons=[save_button])
+
+        def back():
+            if grid.has_changes() and not messagebox.askyesno("Unsaved Grades", "Leave without saving the changed grades?"):
+                return
+            self._show_dashboard()
+
+        course_var.trace("w", load_course)
+        load_course()
+
+        save_button = tk.Button(sheet_frame, text="Save", command=save)
+        save_button.pack(pady=5)
+        tk.Button(sheet_frame, text="Back to Dashboard", command=back).pack(pady=5)
+
     def _lecturer_view_courses_and_students(self):
         self._clear_widgets()
         view_frame = tk.Frame(self.master, padx=20, pady=20)
         view_frame.pack(expand=True, fill="both")
 
         tk.Label(view_frame, text=f"Lecturer: My Courses and Students", font=("Arial", 12, "bold")).pack(pady=10)
+        status_label = tk.Label(view_frame, text="Loading...")
+        status_label.pack()
 
         info_text = tk.Text(view_frame, wrap=tk.WORD, height=20, width=80)
         info_text.pack(pady=10)
         info_text.config(state=tk.DISABLED)
 
-        lecturer_courses = self.repo.find_all("courses", {"lecturer_id": self.current_user.id})
-        
-        display_content = ""
-        if lecturer_courses:
-            for course in lecturer_courses:
-                display_content += f"Course ID: {course.id}, Name: {course.name}\n"
+        lecturer_id = self.current_user.id
+
+        def load_courses(repo, task):
+            # Three set-based reads up front, then one chunk per course so the text fills in progressively
+            courses = repo.find_all("courses", {"lecturer_id": lecturer_id})
+            rosters = repo.find_course_rosters(lecturer_id)
+            groups = repo.find_all("groups")
+            for course in courses:
+                if task.cancelled:
+                    return
+                display_content = f"Course ID: {course.id}, Name: {course.name}\n"
                 display_content += "  Assigned Groups & Students:\n"
 
-                students_in_course_ids = set()
-                groups_for_course = self.repo.find_all("group_courses", {"course_id": course.id})
-                
+                roster = {entry["student_id"]: entry for entry in rosters.get(course.id, [])}
+                groups_for_course = [group for group in groups if course.id in group.course_ids]
                 if groups_for_course:
-                    for gc_link in groups_for_course:
-                        group_obj = self.repo.find_one("groups", {"id": gc_link.group_id})
-                        if group_obj:
-                            display_content += f"    - Group ID: {group_obj.id}, Name: {group_obj.name}\n"
-                            
-                            students_in_group_links = self.repo.find_all("group_students", {"group_id": group_obj.id})
-                            if students_in_group_links:
-                                display_content += "      Students:\n"
-                                for gs_link in students_in_group_links:
-                                    student = self.repo.find_one("users", {"id": gs_link.student_id, "role": "student"})
-                                    if student:
-                                        students_in_course_ids.add(student.id) # Track unique students in this course
-                                        grade = self.repo.find_one("grades", {"student_id": student.id, "course_id": course.id})
-                                        grade_val = grade.value if grade else "N/A"
-                                        display_content += f"        - ID: {student.id}, {student.get_full_name()} (Grade: {grade_val})\n"
-                            else:
-                                display_content += "      No students in this group.\n"
+                    for group in groups_for_course:
+                        display_content += f"    - Group ID: {group.id}, Name: {group.name}\n"
+                        students = [roster[student_id] for student_id in group.student_ids if student_id in roster]
+                        if group.student_ids:
+                            display_content += "      Students:\n"
+                            for entry in students:
+                                grade_val = entry["grade"] if entry["grade_id"] is not None else "N/A"
+                                display_content += (f"        - ID: {entry['student_id']}, {entry['name']} "
+                                                    f"{entry['surname']} (Grade: {grade_val})\n")
+                        else:
+                            display_content += "      No students in this group.\n"
                 else:
                     display_content += "    No groups assigned to this course.\n"
-                display_content += "\n" # Add a newline for separation between courses
-        else:
-            display_content = "You are not assigned to any courses."
-        
-        info_text.config(state=tk.NORMAL)
-        info_text.delete(1.0, tk.END)
-        info_text.insert(tk.END, display_content)
-        info_text.config(state=tk.DISABLED)
+                yield display_content + "\n" # Add a newline for separation between courses
+
+        self._stream_into_text(info_text, status_label, load_courses, "You are not assigned to any courses.")
 
         tk.Button(view_frame, text="Back to Dashboard", command=self._show_dashboard).pack(pady=20) # Added
 
@@ -728,46 +1104,22 @@ class AcademicSystemGUI:
         view_frame.pack(expand=True, fill="both")
 
         tk.Label(view_frame, text=f"Student: My Courses and Grades", font=("Arial", 12, "bold")).pack(pady=10)
+        status_label = tk.Label(view_frame, text="Loading...")
+        status_label.pack()
 
         info_text = tk.Text(view_frame, wrap=tk.WORD, height=15, width=60)
         info_text.pack(pady=10)
         info_text.config(state=tk.DISABLED)
 
         student_id = self.current_user.id
-        
-        # Find all groups the student belongs to
-        student_groups_links = self.repo.find_all("group_students", {"student_id": student_id})
-        
-        courses_attended_ids = set()
-        for gs_link in student_groups_links:
-            group_id = gs_link.group_id
-            course_group_links = self.repo.find_all("group_courses", {"group_id": group_id})
-            for gc_link in course_group_links:
-                courses_attended_ids.add(gc_link.course_id)
-        
-        display_content = ""
-        if courses_attended_ids:
-            for course_id in courses_attended_ids:
-                course = self.repo.find_one("courses", {"id": course_id})
-                if course:
-                    grade_obj = self.repo.find_one("grades", {"student_id": student_id, "course_id": course_id})
-                    grade_value = grade_obj.value if grade_obj else "N/A"
-                    
-                    lecturer_name = "N/A"
-                    if course.lecturer_id:
-                        lecturer = self.repo.find_one("users", {"id": course.lecturer_id, "role": "lecturer"})
-                        if lecturer:
-                            lecturer_name = lecturer.get_full_name()
-
-                    display_content += f"Course: {course.name} (Lecturer: {lecturer_name})\n"
-                    display_content += f"  Grade: {grade_value}\n\n"
-        else:
-            display_content = "You are not enrolled in any courses yet."
-
-        info_text.config(state=tk.NORMAL)
-        info_text.delete(1.0, tk.END)
-        info_text.insert(tk.END, display_content)
-        info_text.config(state=tk.DISABLED)
+
+        def load_courses(repo, task):
+            # Courses, lecturers and grades in one query
+            for row in repo.find_student_courses(student_id):
+                grade_value = row["grade"] if row["grade"] is not None else "N/A"
+                yield f"Course: {row['course']} (Lecturer: {row['lecturer'] or 'N/A'})\n  Grade: {grade_value}\n\n"
+
+        self._stream_into_text(info_text, status_label, load_courses, "You are not enrolled in any courses yet.")
 
         tk.Button(view_frame, text="Back to Dashboard", command=self._show_dashboard).pack(pady=20) # Added
 
@@ -777,40 +1129,34 @@ class AcademicSystemGUI:
         view_frame.pack(expand=True, fill="both")
 
         tk.Label(view_frame, text=f"Student: My Groups", font=("Arial", 12, "bold")).pack(pady=10)
+        status_label = tk.Label(view_frame, text="Loading...")
+        status_label.pack()
 
         info_text = tk.Text(view_frame, wrap=tk.WORD, height=15, width=60)
         info_text.pack(pady=10)
         info_text.config(state=tk.DISABLED)
 
         student_id = self.current_user.id
-        
-        # Find all groups the student belongs to
-        student_groups_links = self.repo.find_all("group_students", {"student_id": student_id})
-        
-        display_content = ""
-        if student_groups_links:
-            for gs_link in student_groups_links:
-                group = self.repo.find_one("groups", {"id": gs_link.group_id})
-                if group:
-                    display_content += f"Group ID: {group.id}, Name: {group.name}\n"
-                    display_content += "  Courses in this Group:\n"
-                    
-                    group_courses_links = self.repo.find_all("group_courses", {"group_id": group.id})
-                    if group_courses_links:
-                        for gc_link in group_courses_links:
-                            course = self.repo.find_one("courses", {"id": gc_link.course_id})
-                            if course:
-                                display_content += f"    - {course.name}\n"
-                    else:
-                        display_content += "    No courses assigned to this group.\n"
-                    display_content += "\n" # Add a newline for separation between groups
-        else:
-            display_content = "You are not part of any groups yet."
-
-        info_text.config(state=tk.NORMAL)
-        info_text.delete(1.0, tk.END)
-        info_text.insert(tk.END, display_content)
-        info_text.config(state=tk.DISABLED)
+
+        def load_groups(repo, task):
+            # Find all groups the student belongs to, then each group's course names in one joined query
+            for group in repo.find_all("groups"):
+                if student_id not in group.student_ids:
+                    continue
+                if task.cancelled:
+                    return
+                display_content = f"Group ID: {group.id}, Name: {group.name}\n"
+                display_content += "  Courses in this Group:\n"
+
+                _, course_names = repo.find_group_members(group.id)
+                if course_names:
+                    for course_name in course_names:
+                        display_content += f"    - {course_name}\n"
+                else:
+                    display_content += "    No courses assigned to this group.\n"
+                yield display_content + "\n" # Add a newline for separation between groups
+
+        self._stream_into_text(info_text, status_label, load_groups, "You are not part of any groups yet.")
 
         tk.Button(view_frame, text="Back to Dashboard", command=self._show_dashboard).pack(pady=20) # Added
 
@@ -818,9 +1164,14 @@ class AcademicSystemGUI:
 
 # --- Main application execution ---
 if __name__ == "__main__":
+    profiler = profiler_from_command_line("Academic System GUI")
+    if profiler:
+        install_tk_callback_profiling(profiler) # Every button/trace/timer callback becomes a profiled action
+
     root = tk.Tk()
     app = AcademicSystemGUI(root)
     root.mainloop()
+    app.tasks.shutdown()
 
 
 
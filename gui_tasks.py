@@ -0,0 +1,134 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from query_counter import QueryCounter, query_debug_enabled
+
+
+class Task:
+    """Handle for one piece of background work submitted to a TaskExecutor."""
+    def __init__(self, executor, generation, label, on_result, on_chunk, on_error, on_done, run_if_stale=False):
+        self._executor = executor
+        self.label = label
+        self.run_if_stale = run_if_stale
+        self._generation = generation
+        self._cancelled = False
+        self.on_result = on_result
+        self.on_chunk = on_chunk
+        self.on_error = on_error
+        self.on_done = on_done
+
+    @property
+    def cancelled(self):
+        """True once the task was cancelled or the view that started it was left."""
+        return self._cancelled or self._generation != self._executor.generation
+
+    def cancel(self):
+        """Stops delivering results; generator work also stops at its next chunk."""
+        self._cancelled = True
+
+
+class TaskExecutor:
+    """
+    Runs repository work on a small thread pool so the Tk mainloop never blocks on SQLite.
+
+    Each worker thread gets its own repository from `repo_factory`, so no connection is
+    ever shared across threads. Results travel back through a queue that the Tk thread
+    drains with master.after() polling; callbacks therefore always run on the Tk thread.
+    Work functions take (repo, task). A plain function's return value goes to on_result;
+    a generator's yielded values go to on_chunk one by one so views can render progressively.
+    """
+    def __init__(self, master, repo_factory, max_workers=4, poll_ms=30, max_messages_per_poll=50):
+        self.master = master
+        self.repo_factory = repo_factory
+        self.poll_ms = poll_ms
+        self.max_messages_per_poll = max_messages_per_poll
+        self.generation = 0
+        self._local = threading.local()
+        self._messages = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="gui-worker")
+        self._closed = False
+        self._poll_id = master.after(poll_ms, self._poll)
+
+    def submit(self, work, on_result=None, on_chunk=None, on_error=None, on_done=None, label=None, run_if_stale=False):
+        """
+        Schedules work(repo, task) on a worker thread and returns its Task.
+        Work that has not started when its view is left is skipped, unless `run_if_stale` is set:
+        writes set it so that navigating away only drops their result, never the write itself.
+        """
+        label = label or getattr(work, "__qualname__", "task")
+        task = Task(self, self.generation, label, on_result, on_chunk, on_error, on_done, run_if_stale)
+        self._executor.submit(self._run, work, task)
+        return task
+
+    def cancel_all(self):
+        """Marks every pending and running task stale (call when navigating to another screen)."""
+        self.generation += 1
+
+    def shutdown(self):
+        """Cancels outstanding work and stops the worker threads and the poller."""
+        self._closed = True
+        self.cancel_all()
+        if self._poll_id is not None:
+            try:
+                self.master.after_cancel(self._poll_id)
+            except Exception:
+                pass # The Tk interpreter may already be gone
+            self._poll_id = None
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _worker_repo(self):
+        if getattr(self._local, "repo", None) is None:
+            self._local.repo = self.repo_factory()
+        return self._local.repo
+
+    def _run(self, work, task):
+        if task.cancelled and not task.run_if_stale:
+            return
+        if not query_debug_enabled():
+            self._run_work(work, task)
+            return
+        # Background queries do not show up in the Tk-side counters, so count them per task here
+        with QueryCounter(task.label, current_thread_only=True):
+            self._run_work(work, task)
+
+    def _run_work(self, work, task):
+        try:
+            result = work(self._worker_repo(), task)
+            if hasattr(result, "__next__"):
+                for chunk in result:
+                    if task.cancelled:
+                        result.close()
+                        return
+                    self._messages.put((task, "chunk", chunk))
+                result = None
+            self._messages.put((task, "result", result))
+        except Exception as e:
+            self._messages.put((task, "error", e))
+
+    def _poll(self):
+        self._poll_id = None
+        for _ in range(self.max_messages_per_poll):
+            try:
+                task, kind, payload = self._messages.get_nowait()
+            except queue.Empty:
+                break
+            if task.cancelled:
+                continue # Stale: the user has moved on and the target widgets may be gone
+            self._deliver(task, kind, payload)
+        if not self._closed:
+            self._poll_id = self.master.after(self.poll_ms, self._poll)
+
+    def _deliver(self, task, kind, payload):
+        if kind == "chunk":
+            if task.on_chunk:
+                task.on_chunk(payload)
+            return
+        if kind == "result" and task.on_result:
+            task.on_result(payload)
+        elif kind == "error":
+            if task.on_error:
+                task.on_error(payload)
+            else:
+                print(f"Background task failed: {payload}")
+        if task.on_done:
+            task.on_done()
@@ -0,0 +1,403 @@
+import tkinter as tk
+from collections import OrderedDict
+from tkinter import ttk
+
+# Item id of the row shown while a page is being fetched; real rows use their numeric ids
+_PLACEHOLDER_IID = "loading"
+
+
+class PagedTreeview(tk.Frame):
+    """
+    A read-only ttk.Treeview that only ever holds the rows currently on screen.
+
+    Rows are fetched a page at a time through `fetch_page(repo, offset, limit, order_by, descending)`
+    as the user scrolls, and clicking a column heading re-sorts through the same callback, so
+    sorting happens in SQL. A small LRU of pages keeps scrolling smooth while memory and render
+    time stay the same whatever the size of the table.
+
+    `fetch_page` and `count_rows(repo)` run on the TaskExecutor `tasks`, never on the Tk thread;
+    a placeholder row stands in for a page until it arrives, and `on_count(total)` is called
+    each time the rows have been counted.
+    """
+    def __init__(self, parent, columns, fetch_page, count_rows, tasks, visible_rows=15, page_size=100,
+                 cached_pages=5, on_select=None, on_count=None, order_by="id"):
+        super().__init__(parent)
+        self.columns = columns # [(key, heading, width), ...]
+        self.fetch_page = fetch_page
+        self.count_rows = count_rows
+        self.tasks = tasks
+        self.visible_rows = visible_rows
+        self.page_size = page_size
+        self.cached_pages = cached_pages
+        self.on_select = on_select
+        self.on_count = on_count
+        self.order_by = order_by
+        self.descending = False
+
+        self.top = 0 # Index of the first row on screen
+        self.total = 0
+        self.counted = False # False until count_rows has answered for the current source
+        self._pages = OrderedDict()
+        self._loading = {} # page number -> Task still fetching it
+        self._count_task = None
+        self._rows_on_screen = {}
+        self._selected_id = None
+
+        keys = [key for key, _, _ in columns]
+        self.tree = ttk.Treeview(self, columns=keys, show="headings", height=visible_rows, selectmode="browse")
+        for key, heading, width in columns:
+            self.tree.heading(key, text=heading, command=lambda k=key: self.sort_by(k))
+            self.tree.column(key, width=width, anchor="w")
+        self.tree.tag_configure("placeholder", foreground="gray")
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self._on_scrollbar)
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+        self.grid_rowconfigure(0, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+
+        self.tree.bind("<<TreeviewSelect>>", self._on_tree_select)
+        self.tree.bind("<MouseWheel>", lambda e: self.scroll_rows(-3 if e.delta > 0 else 3))
+        self.tree.bind("<Button-4>", lambda e: self.scroll_rows(-3))
+        self.tree.bind("<Button-5>", lambda e: self.scroll_rows(3))
+        self.tree.bind("<Prior>", lambda e: self.scroll_rows(-self.visible_rows))
+        self.tree.bind("<Next>", lambda e: self.scroll_rows(self.visible_rows))
+        self.tree.bind("<Up>", self._on_arrow_key)
+        self.tree.bind("<Down>", self._on_arrow_key)
+
+        self.refresh()
+
+    def refresh(self):
+        """Re-counts the rows in the background, drops cached pages and redraws once the count is in."""
+        self._drop_pages()
+        if self._count_task:
+            self._count_task.cancel()
+        self.counted = False
+        self._render()
+
+        def counted(total):
+            self._count_task = None
+            self.total, self.counted = total, True
+            self.top = max(0, min(self.top, self.total - self.visible_rows))
+            self._render()
+            if self.on_count:
+                self.on_count(total)
+
+        count_rows = self.count_rows
+        self._count_task = self.tasks.submit(lambda repo, task: count_rows(repo), on_result=counted,
+                                             label="paged listing count")
+
+    def set_source(self, fetch_page, count_rows, order_by="id"):
+        """
+        Points the view at different rows (e.g. search results) and redraws from the top.
+        An `order_by` that is not one of the columns keeps the source's own order until a heading is clicked.
+        """
+        self.fetch_page = fetch_page
+        self.count_rows = count_rows
+        self.order_by, self.descending = order_by, False
+        for column_key, heading, _ in self.columns:
+            self.tree.heading(column_key, text=heading)
+        self.top = 0
+        self._selected_id = None
+        self.refresh()
+
+    def sort_by(self, key):
+        """Sorts by a column (toggling direction on repeated clicks) and jumps back to the top."""
+        if self.order_by == key:
+            self.descending = not self.descending
+        else:
+            self.order_by, self.descending = key, False
+        for column_key, heading, _ in self.columns:
+            marker = (" ▼" if self.descending else " ▲") if column_key == key else ""
+            self.tree.heading(column_key, text=heading + marker)
+        self.top = 0
+        self._drop_pages()
+        self._render()
+
+    def scroll_rows(self, delta):
+        """Moves the window by `delta` rows."""
+        self._move_to(self.top + delta)
+        return "break"
+
+    def selected_row(self):
+        """Returns the selected row dict, or None."""
+        return self._rows_on_screen.get(self._selected_id)
+
+    def _move_to(self, top):
+        top = max(0, min(int(top), max(0, self.total - self.visible_rows)))
+        if top != self.top:
+            self.top = top
+            self._render()
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self._move_to(float(amount) * self.total)
+        elif action == "scroll":
+            step = self.visible_rows if unit == "pages" else 1
+            self._move_to(self.top + int(amount) * step)
+
+    def _on_arrow_key(self, event):
+        items = self.tree.get_children()
+        focus = self.tree.focus()
+        if not items or focus not in items:
+            return None
+        # Scroll the window instead of leaving it when the selection is on the first/last visible row
+        if event.keysym == "Up" and focus == items[0] and self.top > 0:
+            self.scroll_rows(-1)
+            return "break"
+        if event.keysym == "Down" and focus == items[-1] and self.top + self.visible_rows < self.total:
+            self.scroll_rows(1)
+            return "break"
+        return None
+
+    def _drop_pages(self):
+        # Pages in flight were asked for under the old order or source and must not land in the cache
+        for task in self._loading.values():
+            task.cancel()
+        self._loading.clear()
+        self._pages.clear()
+
+    def _page(self, page_number):
+        """Returns a cached page, or None after asking a worker for it."""
+        if page_number in self._pages:
+            self._pages.move_to_end(page_number)
+            return self._pages[page_number]
+        if page_number not in self._loading:
+            fetch_page, order_by, descending = self.fetch_page, self.order_by, self.descending
+            offset = page_number * self.page_size
+
+            def loaded(rows):
+                del self._loading[page_number]
+                self._pages[page_number] = rows
+                while len(self._pages) > self.cached_pages:
+                    self._pages.popitem(last=False)
+                self._render()
+
+            self._loading[page_number] = self.tasks.submit(
+                lambda repo, task: fetch_page(repo, offset, self.page_size, order_by, descending),
+                on_result=loaded, label="paged listing page")
+        return None
+
+    def _visible(self):
+        """Returns (rows on screen, True if a page they need is still loading)."""
+        rows = []
+        index = self.top
+        end = min(self.top + self.visible_rows, self.total)
+        while index < end:
+            page_number, position = divmod(index, self.page_size)
+            page = self._page(page_number)
+            if page is None:
+                return rows, True
+            if position >= len(page):
+                break # The table shrank since it was counted
+            take = page[position:position + (end - index)]
+            rows.extend(take)
+            index += len(take)
+        return rows, False
+
+    def _render(self):
+        self.tree.delete(*self.tree.get_children())
+        self._rows_on_screen = {}
+        rows, loading = self._visible() if self.counted else ([], True)
+        for row in rows:
+            item_id = str(row["id"])
+            self._rows_on_screen[item_id] = row
+            self.tree.insert("", "end", iid=item_id, values=[row[key] for key, _, _ in self.columns])
+        if loading:
+            self.tree.insert("", "end", iid=_PLACEHOLDER_IID, values=["Loading..."], tags=("placeholder",))
+        if self._selected_id in self._rows_on_screen:
+            self.tree.selection_set(self._selected_id)
+            self.tree.focus(self._selected_id)
+
+        if self.total:
+            first = self.top / self.total
+            last = min(1.0, (self.top + self.visible_rows) / self.total)
+        else:
+            first, last = 0.0, 1.0
+        self.scrollbar.set(first, last)
+
+    def _on_tree_select(self, event):
+        selection = self.tree.selection()
+        if not selection or selection[0] == self._selected_id:
+            return # Nothing new: re-selecting the same row after a scroll redraw
+        if selection[0] not in self._rows_on_screen:
+            self.tree.selection_remove(selection[0]) # The loading placeholder is not a row
+            return
+        self._selected_id = selection[0]
+        if self.on_select:
+            self.on_select(self._rows_on_screen.get(self._selected_id))
+
+
+class EditableGrid(tk.Frame):
+    """
+    A ttk.Treeview with one editable column, edited in place like a spreadsheet.
+
+    Double-click a row, press Enter, or just start typing to edit its cell. Enter/Tab/Down save
+    the cell and move to the next row, Shift-Tab/Up to the previous one, Escape cancels.
+    Edited cells are checked with `validate(text)`, which returns the parsed value or raises
+    ValueError, and are tracked by value against what was loaded, so retyping "85" over 85.0 is
+    not a change; dirty and invalid rows are highlighted. An empty cell holds None.
+    """
+    def __init__(self, parent, columns, editable, validate, height=15, on_change=None):
+        super().__init__(parent)
+        self.columns = columns # [(key, heading, width), ...]
+        self.editable = editable
+        self.validate = validate
+        self.on_change = on_change
+
+        self._original = {} # iid -> parsed value as loaded or last saved
+        self._edits = {} # iid -> cell text typed by the user, only where its value differs from the original
+        self._editor = None
+        self._editing = None
+
+        keys = [key for key, _, _ in columns]
+        self.tree = ttk.Treeview(self, columns=keys, show="headings", height=height, selectmode="browse")
+        for key, heading, width in columns:
+            self.tree.heading(key, text=heading)
+            self.tree.column(key, width=width, anchor="w")
+        self.tree.tag_configure("dirty", background="#fff3c4")
+        self.tree.tag_configure("invalid", background="#f8c7c7")
+        scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        scrollbar.grid(row=0, column=1, sticky="ns")
+        self.grid_rowconfigure(0, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+
+        self.tree.bind("<Double-1>", lambda e: self.edit(self.tree.identify_row(e.y)))
+        self.tree.bind("<Return>", lambda e: self.edit(self.tree.focus()))
+        self.tree.bind("<Key>", self._on_tree_key)
+
+    def load(self, rows, key="id"):
+        """Replaces the grid contents with `rows` (dicts), dropping any unsaved edits."""
+        self._close_editor(save=False)
+        self.tree.delete(*self.tree.get_children())
+        self._original = {}
+        self._edits = {}
+        for row in rows:
+            iid = str(row[key])
+            text = "" if row[self.editable] is None else str(row[self.editable])
+            self._original[iid] = self._baseline(text)
+            self.tree.insert("", "end", iid=iid, values=[row[k] if k != self.editable else text for k, _, _ in self.columns])
+        children = self.tree.get_children()
+        if children:
+            self.tree.selection_set(children[0])
+            self.tree.focus(children[0])
+        self._changed()
+
+    def has_changes(self):
+        """True when any cell differs from what was loaded."""
+        self._close_editor(save=True)
+        return bool(self._edits)
+
+    def dirty_values(self):
+        """Returns ({iid: parsed value} for valid edits, {iid: error message} for invalid ones)."""
+        self._close_editor(save=True)
+        values, errors = {}, {}
+        for iid, text in self._edits.items():
+            try:
+                values[iid] = self.validate(text)
+            except ValueError as e:
+                errors[iid] = str(e)
+        return values, errors
+
+    def mark_saved(self, values=None):
+        """
+        Makes saved values the new baseline. `values` is {iid: parsed value} as returned by dirty_values()
+        (default: every valid edit); a row edited again while its save was running stays dirty.
+        """
+        if values is None:
+            values, _ = self.dirty_values()
+        for iid, value in values.items():
+            if iid in self._original:
+                self._original[iid] = value
+                if iid in self._edits:
+                    self._set_cell(iid, self._edits[iid])
+        self._changed()
+
+    def edit(self, iid, initial_text=None):
+        """Opens the in-place editor on a row's editable cell."""
+        if not iid:
+            return "break"
+        self._close_editor(save=True)
+        self.tree.see(iid)
+        self.tree.selection_set(iid)
+        self.tree.focus(iid)
+        self.tree.update_idletasks()
+        bbox = self.tree.bbox(iid, self.editable)
+        if not bbox:
+            return "break"
+        x, y, width, height = bbox
+        self._editing = iid
+        self._editor = tk.Entry(self.tree)
+        self._editor.place(x=x, y=y, width=width, height=height)
+        self._editor.insert(0, self.tree.set(iid, self.editable) if initial_text is None else initial_text)
+        if initial_text is None:
+            self._editor.select_range(0, tk.END)
+        self._editor.focus_set()
+        self._editor.bind("<Return>", lambda e: self._move(1))
+        self._editor.bind("<Tab>", lambda e: self._move(1))
+        self._editor.bind("<Down>", lambda e: self._move(1))
+        self._editor.bind("<Shift-Tab>", lambda e: self._move(-1))
+        self._editor.bind("<ISO_Left_Tab>", lambda e: self._move(-1))
+        self._editor.bind("<Up>", lambda e: self._move(-1))
+        self._editor.bind("<Escape>", lambda e: self._close_editor(save=False) or "break")
+        self._editor.bind("<FocusOut>", lambda e: self._close_editor(save=True))
+        return "break"
+
+    def _on_tree_key(self, event):
+        # Typing a value on a selected row starts editing it with that first character
+        if event.char and event.char.isprintable() and self.tree.focus():
+            return self.edit(self.tree.focus(), initial_text=event.char)
+        return None
+
+    def _move(self, step):
+        iid = self._editing
+        self._close_editor(save=True)
+        children = self.tree.get_children()
+        index = children.index(iid) + step
+        if 0 <= index < len(children):
+            self.edit(children[index])
+        else:
+            self.tree.focus_set()
+        return "break"
+
+    def _close_editor(self, save):
+        if self._editor is None:
+            return
+        editor, iid = self._editor, self._editing
+        self._editor = self._editing = None
+        if save:
+            self._set_cell(iid, editor.get().strip())
+        editor.destroy()
+        self.tree.focus_set()
+
+    def _baseline(self, text):
+        # A loaded value that does not parse is kept as text, so any edit of it counts as a change
+        if not text:
+            return None
+        try:
+            return self.validate(text)
+        except ValueError:
+            return text
+
+    def _set_cell(self, iid, text):
+        self.tree.set(iid, self.editable, text)
+        original = self._original[iid]
+        if not text and original is None:
+            tag = None # Still empty
+        else:
+            try:
+                tag = None if self.validate(text) == original else "dirty"
+            except ValueError:
+                tag = "invalid" # Includes clearing a cell that had a value
+        if tag is None:
+            self._edits.pop(iid, None)
+            self.tree.item(iid, tags=())
+        else:
+            self._edits[iid] = text
+            self.tree.item(iid, tags=(tag,))
+        self._changed()
+
+    def _changed(self):
+        if self.on_change:
+            self.on_change(len(self._edits))
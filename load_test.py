@@ -0,0 +1,254 @@
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import dataset_generator
+import main
+from database_repository import DatabaseRepository, busy_retry_stats
+
+# Share of the simulated users per role on results day
+ROLE_SHARES = {"student": 0.85, "lecturer": 0.12, "admin": 0.03}
+# Admin listings page through this many users
+ADMIN_PAGE_SIZE = 50
+# Error messages kept per operation for the report
+ERROR_SAMPLES = 3
+
+
+def _pick_targets(repo):
+    """Ids the simulated sessions act on: every student, and the lecturers who have students to grade."""
+    lecturers = [lecturer.id for lecturer in repo.find_all("users", {"role": "lecturer"})
+                 if any(repo.find_course_rosters(lecturer.id).values())]
+    return {
+        "students": [student.id for student in repo.find_all("users", {"role": "student"})],
+        "lecturers": lecturers,
+        "user_count": repo.count_listing("users"),
+    }
+
+
+class _Session:
+    """
+    One simulated user, with its own repository like a separate CLI session, doing what its role does
+    on results day: students read their transcript, lecturers open their rosters (the one-query version
+    the GUI and API use) and save grades from them the way lecturer_enter_grade does, admins page through listings. next_operation() returns (name, callable) for the next step.
+    """
+    def __init__(self, role, db_path, profile, targets, rng):
+        self.role = role
+        self.repo = DatabaseRepository(db_path, profile)
+        self.rng = rng
+        self.targets = targets
+        self.student_id = rng.choice(targets["students"]) if targets["students"] else None
+        self.lecturer_id = rng.choice(targets["lecturers"]) if targets["lecturers"] else None
+        self.course_id = None
+        self.roster = [] # Student ids of the roster the lecturer has open
+
+    def next_operation(self):
+        rng = self.rng
+        if self.role == "student":
+            if rng.random() < 0.7:
+                return "student grades", lambda: main.fetch_student_grades(self.repo, self.student_id)
+            return "student courses", lambda: main.fetch_student_courses(self.repo, self.student_id)
+        if self.role == "lecturer":
+            if not self.roster or rng.random() < 0.2:
+                return "lecturer rosters", self._open_roster
+            student_id = rng.choice(self.roster)
+            value = float(rng.randint(0, 100))
+            return "lecturer save grade", lambda: main.save_student_grade(self.repo, student_id, self.course_id, value)
+        if rng.random() < 0.7:
+            offset = rng.randrange(max(1, self.targets["user_count"] - ADMIN_PAGE_SIZE))
+            return "admin users page", lambda: self.repo.find_listing_page("users", offset, ADMIN_PAGE_SIZE,
+                                                                           order_by="surname")
+        return "admin course listing", lambda: main.fetch_course_listing(self.repo)
+
+    def _open_roster(self):
+        rosters = {course_id: rows for course_id, rows in self.repo.find_course_rosters(self.lecturer_id).items()
+                   if rows}
+        if rosters:
+            self.course_id = self.rng.choice(sorted(rosters))
+            self.roster = [row["student_id"] for row in rosters[self.course_id]]
+        return bool(rosters)
+
+
+def _run_session(session, start_at, deadline, think_seconds, record):
+    time.sleep(max(0.0, start_at - time.time()))
+    while time.time() < deadline:
+        name, operation = session.next_operation()
+        waits_before = busy_retry_stats(current_thread=True)
+        started = time.perf_counter()
+        error = None
+        try:
+            outcome = operation()
+            if isinstance(outcome, tuple) and outcome and outcome[0] is False:
+                error = str(outcome[1])
+        except (sqlite3.Error, ValueError) as e:
+            error = repr(e)
+        elapsed = time.perf_counter() - started
+        waits_after = busy_retry_stats(current_thread=True)
+        record(name, elapsed, error, waits_after["lock_waits"] - waits_before["lock_waits"],
+               waits_after["retries"] - waits_before["retries"])
+        if think_seconds:
+            time.sleep(session.rng.uniform(0, 2 * think_seconds))
+
+
+def run_process(db_path, profile, roles, targets, start_at, seconds, think_seconds, seed):
+    """
+    Runs one thread per entry of `roles` in this process until `start_at` + `seconds` (wall clock, so
+    that every process starts and stops together). Returns {operation: {"times", "errors", "lock_waits",
+    "busy_retries", "error_samples"}}.
+    """
+    results = {}
+    lock = threading.Lock()
+
+    def record(name, elapsed, error, lock_waits, retries):
+        with lock:
+            entry = results.setdefault(name, {"times": [], "errors": 0, "lock_waits": 0, "busy_retries": 0,
+                                              "error_samples": []})
+            entry["times"].append(elapsed)
+            entry["lock_waits"] += lock_waits
+            entry["busy_retries"] += retries
+            if error is not None:
+                entry["errors"] += 1
+                if len(entry["error_samples"]) < ERROR_SAMPLES:
+                    entry["error_samples"].append(error)
+
+    sessions = [_Session(role, db_path, profile, targets, random.Random(seed + i)) for i, role in enumerate(roles)]
+    threads = [threading.Thread(target=_run_session, args=(session, start_at, start_at + seconds, think_seconds,
+                                                           record))
+               for session in sessions]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def _assign_roles(users, rng):
+    roles = []
+    for role, share in ROLE_SHARES.items():
+        roles += [role] * max(1, round(users * share))
+    rng.shuffle(roles)
+    return roles[:users]
+
+
+def _percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def run_load_test(db_path, users=200, processes=1, seconds=10.0, think_seconds=0.0, profile=None, seed=0):
+    """
+    Simulates `users` concurrent sessions (see ROLE_SHARES) spread over `processes` processes, each
+    running its share as threads, against the database at `db_path` (which gets written to).
+    Returns {operation: stats} plus an "overall" entry; times are in milliseconds.
+    """
+    targets = _pick_targets(DatabaseRepository(db_path, profile))
+    roles = _assign_roles(users, random.Random(seed))
+    shares = [roles[i::processes] for i in range(processes)]
+    start_at = time.time() + 1.0 + 0.01 * users # Time for every process to start and open its sessions
+
+    if processes == 1:
+        outcomes = [run_process(db_path, profile, roles, targets, start_at, seconds, think_seconds, seed)]
+    else:
+        with ProcessPoolExecutor(processes) as pool:
+            futures = [pool.submit(run_process, db_path, profile, share, targets, start_at, seconds, think_seconds,
+                                   seed + 1000 * i)
+                       for i, share in enumerate(shares) if share]
+            outcomes = [future.result() for future in futures]
+
+    merged = {}
+    for outcome in outcomes:
+        for name, entry in outcome.items():
+            total = merged.setdefault(name, {"times": [], "errors": 0, "lock_waits": 0, "busy_retries": 0,
+                                             "error_samples": []})
+            total["times"] += entry["times"]
+            for key in ("errors", "lock_waits", "busy_retries"):
+                total[key] += entry[key]
+            total["error_samples"] = (total["error_samples"] + entry["error_samples"])[:ERROR_SAMPLES]
+
+    results = {}
+    for name, entry in sorted(merged.items()):
+        times = sorted(t * 1000 for t in entry["times"])
+        results[name] = {
+            "operations": len(times),
+            "ops_per_s": round(len(times) / seconds, 1),
+            "p50_ms": round(_percentile(times, 0.50), 2),
+            "p95_ms": round(_percentile(times, 0.95), 2),
+            "p99_ms": round(_percentile(times, 0.99), 2),
+            "errors": entry["errors"],
+            "error_rate": round(entry["errors"] / len(times), 4),
+            "lock_waits": entry["lock_waits"],
+            "busy_retries": entry["busy_retries"],
+            "error_samples": entry["error_samples"],
+        }
+    total = sum(stats["operations"] for stats in results.values())
+    errors = sum(stats["errors"] for stats in results.values())
+    results["overall"] = {"operations": total, "ops_per_s": round(total / seconds, 1), "errors": errors,
+                          "error_rate": round(errors / total, 4) if total else 0.0,
+                          "lock_waits": sum(stats["lock_waits"] for stats in results.values())}
+    return results
+
+
+def copy_database(source_path, target_path):
+    """Copies a database with SQLite's backup API, so a copy taken while it is in use is consistent."""
+    if not os.path.exists(source_path):
+        raise FileNotFoundError(f"No database at '{source_path}'")
+    source = sqlite3.connect(f"file:{source_path}?mode=ro", uri=True)
+    target = sqlite3.connect(target_path)
+    try:
+        source.backup(target)
+    finally:
+        source.close()
+        target.close()
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(
+        description="Simulate many concurrent students, lecturers and admins on a copy of a database.")
+    parser.add_argument("--db", help="Database to copy and load (it is not modified). Default: a generated one.")
+    parser.add_argument("--preset", choices=sorted(dataset_generator.PRESETS), default="department",
+                        help="Dataset preset when --db is not given.")
+    parser.add_argument("--users", type=int, default=200, help="Concurrent simulated users.")
+    parser.add_argument("--processes", type=int, default=1,
+                        help="Processes to spread the users over (each runs its share as threads).")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--think-ms", type=float, default=0.0, help="Mean pause between a user's operations.")
+    parser.add_argument("--profile", help="Connection profile (default: ACADEMIC_DB_PROFILE or 'default').")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        db_path = os.path.join(work_dir, "load_test.db")
+        try:
+            if args.db:
+                copy_database(args.db, db_path)
+            else:
+                print(f"Generating '{args.preset}' dataset...", flush=True)
+                dataset_generator.generate_preset(db_path, preset=args.preset)
+        except (FileNotFoundError, sqlite3.Error) as e:
+            print(f"Error: {e}")
+            sys.exit(2)
+        print(f"{args.users} simulated users in {args.processes} process(es) for {args.seconds:.0f}s...", flush=True)
+        results = run_load_test(db_path, args.users, args.processes, args.seconds, args.think_ms / 1000,
+                                args.profile, args.seed)
+
+    for name, stats in results.items():
+        if name == "overall":
+            continue
+        print(f"  {name:<22} {stats['ops_per_s']:>8.1f} ops/s  p50 {stats['p50_ms']:>8.2f} ms  "
+              f"p95 {stats['p95_ms']:>8.2f} ms  p99 {stats['p99_ms']:>8.2f} ms  "
+              f"errors {stats['errors']:>4} ({stats['error_rate']:.1%})  lock waits {stats['lock_waits']:>4}  "
+              f"busy retries {stats['busy_retries']}")
+        for sample in stats["error_samples"]:
+            print(f"      e.g. {sample}")
+    overall = results["overall"]
+    print(f"Overall: {overall['ops_per_s']} operations/s ({overall['operations']} operations, "
+          f"{overall['errors']} errors, {overall['lock_waits']} lock waits)")
+    sys.exit(1 if overall["errors"] else 0)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -3,12 +3,20 @@ import os
 import auth # I
 from models import User, Administrator, Lecturer, Student, Course, Group, Grade
 from database_repository import DatabaseRepository 
+from query_counter import count_queries
+from profiling import profiler_from_command_line
 
 
 current_user = None
 
 system_repo = None 
 
+profiler = None # ActionProfiler when started with --profile (see profiling.py)
+
+admin_seed_checked = False # The initial-admin check is deferred until the first login
+
+CLI_SEARCH_LIMIT = 25 # Matches printed by the Search Users / Search Courses menu entries
+
 # --- Utility Functions ---
 def clear_screen():
     """Clears the terminal screen."""
@@ -32,12 +40,76 @@ def get_choice(max_choice):
         except ValueError:
             print("Invalid input. Please enter a number.")
 
+def parse_bulk_selection(text, items):
+    """
+    Parses a bulk selection typed at a prompt. Numbers and ranges such as "1, 4, 7-9" pick from
+    `items` by their position in the printed list; anything else is kept as a key (a username or a name).
+    A path to an existing file is read instead, taking the first column of each CSV row (a header row is skipped).
+    Returns (picked items, other keys).
+    """
+    text = text.strip()
+    if text and os.path.isfile(text):
+        import csv
+        with open(text, newline="", encoding="utf-8") as keys_file:
+            tokens = [row[0] for row in csv.reader(keys_file) if row and row[0].strip()]
+        if tokens and tokens[0].strip().lower() in ("id", "username", "name"):
+            tokens = tokens[1:]
+    else:
+        tokens = text.replace(";", ",").split(",")
+
+    picked, keys = [], []
+    for token in (token.strip() for token in tokens):
+        if not token:
+            continue
+        bounds = token.split("-")
+        if all(bound.strip().isdigit() for bound in bounds) and len(bounds) <= 2:
+            first, last = int(bounds[0]), int(bounds[-1])
+            picked.extend(items[i - 1] for i in range(first, last + 1) if 1 <= i <= len(items))
+        else:
+            keys.append(token)
+    return picked, keys
+
+def bulk_assign_to_groups(link_table, members, groups, key, member_key, member_label):
+    """Prompts for many members and many groups, then links them all in one transaction."""
+    picked, keys = parse_bulk_selection(
+        input(f"{member_label}: list numbers (e.g. 1,4,7-9), {key}s separated by commas, or a CSV file of {key}s: "),
+        members)
+    member_keys = [member_key(member) for member in picked] + keys
+
+    print("\nAvailable Groups:")
+    for i, group in enumerate(groups, 1):
+        print(f"{i}. {group.name}")
+    picked_groups, ignored = parse_bulk_selection(input("Groups: list numbers (e.g. 1,3-5): "), groups)
+    if ignored:
+        print(f"Ignoring: {', '.join(ignored)}")
+
+    if not member_keys or not picked_groups:
+        print("Nothing to assign.")
+        return
+    success, result = system_repo.assign_to_groups(link_table, member_keys, [g.id for g in picked_groups], key)
+    if not success:
+        print(f"Error: {result}")
+        return
+    print(f"Added {result['added']} assignment(s); {result['already_present']} were already in place.")
+    if result["unknown_members"]:
+        print(f"Not found: {', '.join(str(k) for k in result['unknown_members'])}")
+
+def run_action(action):
+    """Runs a menu action, under the profiler when profiling is enabled (prompt waits excluded)."""
+    if profiler:
+        return profiler.run(action.__name__, action)
+    return action()
+
 def login():
     """Handles user login for the CLI."""
-    global current_user, system_repo # Access the global repository
+    global current_user, system_repo, admin_seed_checked # Access the global repository
     while True:
         clear_screen()
         print("--- Login ---")
+        if not admin_seed_checked:
+            # Pass the repository instance to the auth module's functions for setup
+            auth.seed_initial_admin_if_needed(system_repo) # Pass repository for seeding
+            admin_seed_checked = True
         username = input("Username: ").strip()
         password = input("Password: ").strip()
 
@@ -67,13 +139,93 @@ def logout():
 
 ###################################################################
 
+# --- Data fetching helpers ---
+# These hold the database side of each service without any terminal I/O, so the same
+# code path can be timed headlessly (see benchmark.py and load_test.py).
+
+def fetch_all_users(repo):
+    """Returns every user, as listed by 'View All Users'."""
+    return repo.find_all("users")
+
+def fetch_course_listing(repo, unassigned_label="N/A"):
+    """Returns (course, lecturer_name) pairs for every course."""
+    lecturer_names = {lecturer.id: lecturer.get_full_name() for lecturer in repo.find_all("users", {"role": "lecturer"})}
+    return [(course, lecturer_names.get(course.lecturer_id, unassigned_label)) for course in repo.find_all("courses")]
+
+def fetch_group_listing(repo):
+    """Returns (group, student_names, course_names) for every group."""
+    # Students and courses are listed in the order find_all returns them, as the screens always have
+    students = {student.id: student for student in repo.find_all("users", {"role": "student"})}
+    courses = {course.id: course for course in repo.find_all("courses")}
+    student_order = {student_id: i for i, student_id in enumerate(students)}
+    course_order = {course_id: i for i, course_id in enumerate(courses)}
+    listing = []
+    for group in repo.find_all("groups"): # Comes with its student_ids and course_ids
+        student_ids = sorted((i for i in set(group.student_ids) if i in students), key=student_order.get)
+        course_ids = sorted((i for i in set(group.course_ids) if i in courses), key=course_order.get)
+        listing.append((group, [students[i].get_full_name() for i in student_ids], [courses[i].name for i in course_ids]))
+    return listing
+
+def fetch_group_names_by_member(repo, members, groups, link_table, member_column):
+    """Returns {member.id: [group names]} for the students or courses shown in the assignment menus."""
+    group_order = {group.id: i for i, group in enumerate(groups)}
+    group_ids = {member.id: [] for member in members}
+    for link in repo.find_all(link_table):
+        if link[member_column] in group_ids and link['group_id'] in group_order:
+            group_ids[link[member_column]].append(link['group_id'])
+    return {member_id: [groups[group_order[group_id]].name for group_id in sorted(ids, key=group_order.get)]
+            for member_id, ids in group_ids.items()}
+
+def _roster_pairs(rows):
+    # Roster rows carry what the screens show; the students' password hashes are not read
+    return [(Student(row["student_id"], row["name"], row["surname"], row["username"], None),
+             row["grade"] if row["grade_id"] is not None else "N/A")
+            for row in rows]
+
+def fetch_course_roster(repo, course_id):
+    """Returns (student, current_grade) pairs for the students enrolled in a course via their groups."""
+    return _roster_pairs(repo.find_course_rosters(course_id=course_id).get(course_id, []))
+
+def fetch_lecturer_overview(repo, lecturer_id):
+    """Returns (course, [(student, grade)]) for every course taught by a lecturer."""
+    rosters = repo.find_course_rosters(lecturer_id)
+    return [(course_obj, _roster_pairs(rosters.get(course_obj.id, [])))
+            for course_obj in repo.find_all("courses", {"lecturer_id": lecturer_id})]
+
+def fetch_student_grades(repo, student_id):
+    """Returns (course_name, grade_value) pairs for a student's recorded grades."""
+    return [(row["course"], row["grade"]) for row in repo.find_student_grades(student_id)]
+
+def fetch_student_courses(repo, student_id):
+    """Returns (course, lecturer_name) pairs for the courses a student takes through their groups."""
+    return [(Course(row["course_id"], row["course"], row["lecturer_id"]), row["lecturer"] or "N/A")
+            for row in repo.find_student_courses(student_id)]
+
+def save_student_grade(repo, student_id, course_id, value):
+    """Enters or updates a student's grade in a course. Returns (success, message)."""
+    # Read and write in one transaction, so another session cannot grade the student in between
+    with repo.transaction():
+        existing_grade = repo.find_one("grades", {"student_id": student_id, "course_id": course_id})
+        if existing_grade:
+            # Update existing grade
+            if repo.update_one("grades", existing_grade.id, {"value": value}):
+                return True, "Grade updated successfully."
+            return False, "Failed to update grade."
+        # Insert new grade
+        new_grade = Grade(None, student_id, course_id, value) # ID is None for new insert
+        success, msg, _ = repo.insert_one("grades", new_grade) # Use repository
+        if success:
+            return True, "Grade entered successfully."
+        return False, msg
+
 # --- Admin services ---
+@count_queries()
 def admin_manage_users():
     global system_repo
     while True:
         clear_screen()
         print("--- Admin: Manage Users ---")
-        options = ["Add New User", "View All Users", "Delete User"]
+        options = ["Add New User", "View All Users", "Delete User", "Search Users"]
         display_menu(options)
         choice = get_choice(len(options))
 
@@ -113,7 +265,7 @@ def admin_manage_users():
 
         elif choice == 2: # View All Users
             print("\n--- All Users ---")
-            users_to_display = system_repo.find_all("users") # Use repository
+            users_to_display = fetch_all_users(system_repo)
             if users_to_display:
                 for user in users_to_display:
                     print(f"ID: {user.id}, Name: {user.get_full_name()}, Username: {user.username}, Role: {user.get_role().capitalize()}")
@@ -137,29 +289,34 @@ def admin_manage_users():
             elif user_obj.get_role() == 'admin' and user_obj.username == 'admin.user':
                 print("Cannot delete the primary administrator.")
             else:
-                # Due to CASCADE DELETE rules in the DB, linked grades and group_students
-                # records are handled automatically when a user (student) is deleted.
-                # We only need to handle explicit unassignment for lecturers from courses.
-                if user_obj.get_role() == 'lecturer':
-                    lecturer_courses = system_repo.find_all("courses", {"lecturer_id": user_id_to_delete})
-                    for course in lecturer_courses:
-                        system_repo.update_one("courses", course.id, {"lecturer_id": None})
-
+                # Foreign keys are enforced on every connection, so the database itself removes the
+                # user's grades and group memberships and unassigns them from the courses they taught.
                 if system_repo.delete_one("users", user_id_to_delete): # Use repository
                     print("User deleted successfully.")
                 else:
                     print("Failed to delete user.")
             input("Press Enter to continue...")
 
+        elif choice == 4: # Search Users
+            text = input("Search by name, surname or username (prefixes work): ").strip()
+            matches = system_repo.search_users(text, limit=CLI_SEARCH_LIMIT)
+            if matches:
+                for row in matches:
+                    print(f"ID: {row['id']}, Name: {row['name']} {row['surname']}, Username: {row['username']}, Role: {row['role'].capitalize()}")
+            else:
+                print("No matching users.")
+            input("Press Enter to continue...")
+
         elif choice == 0:
             break
 
+@count_queries()
 def admin_manage_courses():
     global system_repo
     while True:
         clear_screen()
         print("--- Admin: Manage Courses ---")
-        options = ["Add New Course", "View All Courses", "Delete Course"]
+        options = ["Add New Course", "View All Courses", "Delete Course", "Search Courses"]
         display_menu(options)
         choice = get_choice(len(options))
 
@@ -176,14 +333,9 @@ def admin_manage_courses():
 
         elif choice == 2: # View All Courses
             print("\n--- All Courses ---")
-            courses_to_display = system_repo.find_all("courses") # Use repository
+            courses_to_display = fetch_course_listing(system_repo)
             if courses_to_display:
-                for course in courses_to_display:
-                    lecturer_name = "N/A"
-                    if course.lecturer_id:
-                        lecturer = system_repo.find_one("users", {"id": course.lecturer_id}) # Use repository
-                        if lecturer:
-                            lecturer_name = lecturer.get_full_name()
+                for course, lecturer_name in courses_to_display:
                     print(f"ID: {course.id}, Name: {course.name}, Lecturer: {lecturer_name}")
             else:
                 print("No courses found.")
@@ -206,15 +358,26 @@ def admin_manage_courses():
                 print("Failed to delete course or course not found.")
             input("Press Enter to continue...")
 
+        elif choice == 4: # Search Courses
+            text = input("Search by course name (prefixes work): ").strip()
+            matches = system_repo.search_courses(text, limit=CLI_SEARCH_LIMIT)
+            if matches:
+                for row in matches:
+                    print(f"ID: {row['id']}, Name: {row['name']}, Lecturer: {row['lecturer']}")
+            else:
+                print("No matching courses.")
+            input("Press Enter to continue...")
+
         elif choice == 0:
             break
 
+@count_queries()
 def admin_manage_groups():
     global system_repo
     while True:
         clear_screen()
         print("--- Admin: Manage Groups ---")
-        options = ["Add New Group", "View All Groups", "Delete Group"]
+        options = ["Add New Group", "View All Groups", "Delete Group", "Term Rollover (clone groups)"]
         display_menu(options)
         choice = get_choice(len(options))
 
@@ -231,18 +394,9 @@ def admin_manage_groups():
 
         elif choice == 2: # View All Groups
             print("\n--- All Groups ---")
-            groups_to_display = system_repo.find_all("groups") # Use repository
+            groups_to_display = fetch_group_listing(system_repo)
             if groups_to_display:
-                for group in groups_to_display:
-                    # Dynamically get associated students and courses via repository
-                    students_in_group = system_repo.find_all("users", {"role": "student"})
-                    students_in_group_filtered = [s for s in students_in_group if system_repo.find_one("group_students", {"group_id": group.id, "student_id": s.id})] # Check linking table
-                    student_names = [s.get_full_name() for s in students_in_group_filtered]
-
-                    courses_in_group = system_repo.find_all("courses")
-                    courses_in_group_filtered = [c for c in courses_in_group if system_repo.find_one("group_courses", {"group_id": group.id, "course_id": c.id})] # Check linking table
-                    course_names = [c.name for c in courses_in_group_filtered]
-
+                for group, student_names, course_names in groups_to_display:
                     print(f"ID: {group.id}, Name: {group.name}, Students: {', '.join(student_names) or 'None'}, Courses: {', '.join(course_names) or 'None'}")
             else:
                 print("No groups found.")
@@ -265,15 +419,74 @@ def admin_manage_groups():
                 print("Failed to delete group or group not found.")
             input("Press Enter to continue...")
 
+        elif choice == 4: # Term Rollover
+            rollover_groups_prompt()
+            input("Press Enter to continue...")
+
         elif choice == 0:
             break
 
+def print_rollover_report(report, preview_rows=10):
+    """Prints the outcome (or dry-run preview) of DatabaseRepository.rollover_groups."""
+    for _, old_name, new_name in report["groups"][:preview_rows]:
+        print(f"  {old_name} -> {new_name}")
+    if len(report["groups"]) > preview_rows:
+        print(f"  ... and {len(report['groups']) - preview_rows} more")
+    verb = "would be" if report["dry_run"] else "were"
+    print(f"{len(report['groups'])} group(s) {verb} cloned with {report['courses']} course and "
+          f"{report['students']} student assignment(s).")
+    if report["conflicts"]:
+        print(f"Name conflicts ({len(report['conflicts'])}): {', '.join(report['conflicts'][:preview_rows])}")
+
+def rollover_groups_prompt():
+    """Asks which groups to clone and how to rename them, previews the rollover, then applies it."""
+    groups = system_repo.find_all("groups")
+    if not groups:
+        print("No groups found.")
+        return
+    for i, group in enumerate(groups, 1):
+        print(f"{i}. {group.name}")
+    selection = input("Groups to roll over (list numbers e.g. 1,3-5; leave empty for all): ")
+    picked = parse_bulk_selection(selection, groups)[0] if selection.strip() else groups
+    if not picked:
+        print("No groups selected.")
+        return
+
+    find = input("Text to replace in the names (e.g. 2025; leave empty for none): ")
+    replace = input("Replace it with: ") if find else ""
+    suffix = input("Suffix to append (optional): ")
+    copy_courses = input("Copy course assignments? (y/n) [y]: ").strip().lower() != "n"
+    copy_students = input("Copy student memberships? (y/n) [n]: ").strip().lower() == "y"
+    options = dict(find=find, replace=replace, suffix=suffix, copy_courses=copy_courses, copy_students=copy_students)
+    group_ids = [group.id for group in picked]
+
+    success, report = system_repo.rollover_groups(group_ids, dry_run=True, **options)
+    if not success:
+        print(f"Error: {report}")
+        return
+    print("\n--- Preview ---")
+    print_rollover_report(report)
+    if report["conflicts"]:
+        print("Choose names that do not exist yet and try again.")
+        return
+    if input("Apply this rollover? (y/n): ").strip().lower() != "y":
+        print("Rollover cancelled.")
+        return
+
+    success, report = system_repo.rollover_groups(group_ids, **options)
+    if success:
+        print_rollover_report(report)
+    else:
+        print(f"Error: {report}")
+
+@count_queries()
 def admin_assign_lecturer():
     global system_repo
     while True:
         clear_screen()
         print("--- Admin: Assign Lecturer to Course ---")
-        courses = system_repo.find_all("courses") # Use repository
+        course_listing = fetch_course_listing(system_repo, unassigned_label="Unassigned")
+        courses = [course for course, _ in course_listing]
         lecturers = system_repo.find_all("users", {"role": "lecturer"}) # Use repository
 
         if not courses:
@@ -286,9 +499,7 @@ def admin_assign_lecturer():
             break
 
         print("\nAvailable Courses:")
-        for i, course in enumerate(courses, 1):
-            current_lecturer = system_repo.find_one("users", {"id": course.lecturer_id}) # Use repository
-            lecturer_info = current_lecturer.get_full_name() if current_lecturer else "Unassigned"
+        for i, (course, lecturer_info) in enumerate(course_listing, 1):
             print(f"{i}. {course.name} (Current Lecturer: {lecturer_info})")
 
         course_choice = get_choice(len(courses))
@@ -317,6 +528,7 @@ def admin_assign_lecturer():
 
         input("Press Enter to continue...")
 
+@count_queries()
 def admin_assign_student_to_group():
     global system_repo
     while True:
@@ -335,14 +547,19 @@ def admin_assign_student_to_group():
             break
 
         print("\nAvailable Students:")
+        # Check if student is already in a group for clearer UI
+        groups_by_student = fetch_group_names_by_member(system_repo, students, groups, "group_students", "student_id")
         for i, student in enumerate(students, 1):
-            # Check if student is already in a group for clearer UI
-            student_groups = [g for g in groups if system_repo.find_one("group_students", {"group_id": g.id, "student_id": student.id})]
-            group_names = ', '.join([g.name for g in student_groups])
+            group_names = ', '.join(groups_by_student[student.id])
             print(f"{i}. {student.get_full_name()} (Currently in: {group_names or 'None'})")
-        student_choice = get_choice(len(students))
+        print(f"{len(students) + 1}. Bulk: assign several students to one or more groups")
+        student_choice = get_choice(len(students) + 1)
         if student_choice == 0:
             break
+        if student_choice == len(students) + 1:
+            bulk_assign_to_groups("group_students", students, groups, "username", lambda s: s.username, "Students")
+            input("Press Enter to continue...")
+            continue
         selected_student = students[student_choice - 1]
 
         print("\nAvailable Groups:")
@@ -360,6 +577,7 @@ def admin_assign_student_to_group():
             print(f"Error: {msg}")
         input("Press Enter to continue...")
 
+@count_queries()
 def admin_assign_course_to_group():
     global system_repo
     while True:
@@ -378,14 +596,19 @@ def admin_assign_course_to_group():
             break
 
         print("\nAvailable Courses:")
+        # Check if course is already assigned to a group for clearer UI
+        groups_by_course = fetch_group_names_by_member(system_repo, courses, groups, "group_courses", "course_id")
         for i, course in enumerate(courses, 1):
-            # Check if course is already assigned to a group for clearer UI
-            course_groups = [g for g in groups if system_repo.find_one("group_courses", {"group_id": g.id, "course_id": course.id})]
-            group_names = ', '.join([g.name for g in course_groups])
+            group_names = ', '.join(groups_by_course[course.id])
             print(f"{i}. {course.name} (Currently assigned to: {group_names or 'None'})")
-        course_choice = get_choice(len(courses))
+        print(f"{len(courses) + 1}. Bulk: assign several courses to one or more groups")
+        course_choice = get_choice(len(courses) + 1)
         if course_choice == 0:
             break
+        if course_choice == len(courses) + 1:
+            bulk_assign_to_groups("group_courses", courses, groups, "name", lambda c: c.name, "Courses")
+            input("Press Enter to continue...")
+            continue
         selected_course = courses[course_choice - 1]
 
         print("\nAvailable Groups:")
@@ -403,6 +626,23 @@ def admin_assign_course_to_group():
             print(f"Error: {msg}")
         input("Press Enter to continue...")
 
+@count_queries()
+def admin_course_statistics():
+    from reporting_replica import describe_report_source # Only needed for reports; kept off the startup path
+    clear_screen()
+    print("--- Admin: Course Statistics Report ---")
+    rows = system_repo.report_course_statistics()
+    print(describe_report_source(system_repo))
+    if not rows:
+        print("No courses found.")
+    else:
+        print(f"\n{'Course':<30} {'Lecturer':<22} {'Enrolled':>8} {'Graded':>7} {'Average':>8}")
+        for row in rows:
+            average = f"{row['average']:.1f}" if row["average"] is not None else "-"
+            print(f"{row['course'][:30]:<30} {(row['lecturer'] or 'N/A')[:22]:<22} {row['enrolled']:>8} "
+                  f"{row['graded']:>7} {average:>8}")
+    input("Press Enter to continue...")
+
 def admin_menu():
     while True:
         clear_screen()
@@ -410,27 +650,31 @@ def admin_menu():
         print(f"Welcome, {current_user.get_full_name()}!")
         options = [
             "Manage Users", "Manage Courses", "Manage Groups",
-            "Assign Lecturers to Courses", "Assign Students to Groups", "Assign Courses to Groups"
+            "Assign Lecturers to Courses", "Assign Students to Groups", "Assign Courses to Groups",
+            "Course Statistics Report"
         ]
         display_menu(options)
         choice = get_choice(len(options))
 
         if choice == 1:
-            admin_manage_users()
+            run_action(admin_manage_users)
         elif choice == 2:
-            admin_manage_courses()
+            run_action(admin_manage_courses)
         elif choice == 3:
-            admin_manage_groups()
+            run_action(admin_manage_groups)
         elif choice == 4:
-            admin_assign_lecturer()
+            run_action(admin_assign_lecturer)
         elif choice == 5:
-            admin_assign_student_to_group()
+            run_action(admin_assign_student_to_group)
         elif choice == 6:
-            admin_assign_course_to_group()
+            run_action(admin_assign_course_to_group)
+        elif choice == 7:
+            run_action(admin_course_statistics)
         elif choice == 0:
             break
 
 # --- Lecturer services ---
+@count_queries()
 def lecturer_enter_grade():
     global system_repo
     while True:
@@ -455,19 +699,8 @@ def lecturer_enter_grade():
         selected_course = lecturer_courses[course_choice - 1]
 
         # Find students enrolled in groups linked to this course
-        students_in_course_ids = set()
-        for group in system_repo.find_all("groups"): # Iterate all groups
-            if system_repo.find_one("group_courses", {"group_id": group.id, "course_id": selected_course.id}): # Check if course is in this group
-                # If course is in group, get students from that group
-                group_students_links = system_repo.find_all("group_students", {"group_id": group.id})
-                for link in group_students_links:
-                    students_in_course_ids.add(link.get('student_id') or link.student_id) # Access by attribute or dict key
-
-        students_in_course = []
-        for student_id in students_in_course_ids:
-            student_obj = system_repo.find_one("users", {"id": student_id, "role": "student"})
-            if student_obj:
-                students_in_course.append(student_obj)
+        roster = fetch_course_roster(system_repo, selected_course.id)
+        students_in_course = [student for student, _ in roster]
 
         if not students_in_course:
             print(f"No students found for course '{selected_course.name}'.")
@@ -475,12 +708,15 @@ def lecturer_enter_grade():
             continue
 
         print(f"\nStudents in '{selected_course.name}':")
-        for i, student in enumerate(students_in_course, 1):
-            grade_obj = system_repo.find_one("grades", {"student_id": student.id, "course_id": selected_course.id})
-            current_grade = grade_obj.value if grade_obj else "N/A"
+        for i, (student, current_grade) in enumerate(roster, 1):
             print(f"{i}. {student.get_full_name()} (Current Grade: {current_grade})")
 
-        student_choice = get_choice(len(students_in_course))
+        print(f"\nEnter a student's number to grade them, or {len(roster) + 1} to grade the whole list in turn.")
+        student_choice = get_choice(len(students_in_course) + 1)
+        if student_choice == len(students_in_course) + 1:
+            enter_grades_in_batch(selected_course, roster)
+            input("Press Enter to continue...")
+            continue
         if student_choice == 0:
             break
         selected_student = students_in_course[student_choice - 1]
@@ -492,67 +728,71 @@ def lecturer_enter_grade():
                 if not (0 <= grade_value <= 100):
                     print("Grade must be between 0 and 100.")
                 else:
-                    existing_grade = system_repo.find_one("grades", {"student_id": selected_student.id, "course_id": selected_course.id})
-                    if existing_grade:
-                        # Update existing grade
-                        if system_repo.update_one("grades", existing_grade.id, {"value": grade_value}):
-                            print("Grade updated successfully.")
-                        else:
-                            print("Failed to update grade.")
-                    else:
-                        # Insert new grade
-                        new_grade = Grade(None, selected_student.id, selected_course.id, grade_value) # ID is None for new insert
-                        success, msg, _ = system_repo.insert_one("grades", new_grade) # Use repository
-                        if success:
-                            print("Grade entered successfully.")
-                        else:
-                            print(f"Error: {msg}")
+                    success, msg = save_student_grade(system_repo, selected_student.id, selected_course.id, grade_value)
+                    print(msg if success else f"Error: {msg}")
                     break
             except ValueError:
                 print("Invalid input. Please enter a number for the grade.")
         input("Press Enter to continue...")
 
+def enter_grades_in_batch(course, roster):
+    """
+    Prompts for every student of a course roster in turn and saves all changed grades
+    in a single transaction at the end.
+    """
+    print(f"\nBatch grading '{course.name}': press Enter to keep a grade, type q to stop early.")
+    changes = []
+    for student, current_grade in roster:
+        while True:
+            grade_input = input(f"{student.get_full_name()} (Current Grade: {current_grade}): ").strip()
+            if grade_input.lower() == "q" or not grade_input:
+                break
+            try:
+                grade_value = Grade.parse_value(grade_input)
+            except ValueError as e:
+                print(e)
+                continue
+            if grade_value != current_grade:
+                changes.append((student.id, course.id, grade_value))
+            break
+        if grade_input.lower() == "q":
+            break
+
+    if not changes:
+        print("No grades were changed.")
+        return
+    if input(f"Save {len(changes)} grade(s)? (y/n): ").strip().lower() != "y":
+        print("Changes discarded.")
+        return
+    success, result = system_repo.upsert_grades_many(changes)
+    if success:
+        print(f"Saved {result} grade(s).")
+    else:
+        print(f"No grades were saved. Error: {result}")
+
+@count_queries()
 def lecturer_view_courses_and_students():
     global system_repo
     clear_screen()
     print("--- Lecturer: View My Courses and Students ---")
 
-    lecturer_courses = system_repo.find_all("courses", {"lecturer_id": current_user.id})
+    lecturer_overview = fetch_lecturer_overview(system_repo, current_user.id)
 
-    if not lecturer_courses:
+    if not lecturer_overview:
         print("You are not assigned to any courses.")
         input("Press Enter to continue...")
         return
 
-    for course_obj in lecturer_courses:
+    for course_obj, roster in lecturer_overview:
         print(f"\n--- Course: {course_obj.name} ---")
 
-        student_ids_in_course = set()
-        # Find all groups that this course is assigned to
-        groups_for_this_course_links = system_repo.find_all("group_courses", {"course_id": course_obj.id})
-        for link in groups_for_this_course_links:
-            # Find all students in each of those groups
-            students_in_group_links = system_repo.find_all("group_students", {"group_id": link.get('group_id') or link.group_id})
-            for student_link in students_in_group_links:
-                student_ids_in_course.add(student_link.get('student_id') or student_link.student_id)
-
-
-        if not student_ids_in_course:
+        if not roster:
             print("No students enrolled in this course yet.")
             continue
 
         print("Enrolled Students:")
-        students_found = False
-        for student_id in student_ids_in_course:
-            student_obj = system_repo.find_one("users", {"id": student_id, "role": "student"})
-            if student_obj:
-                grade_obj = system_repo.find_one("grades", {"student_id": student_id, "course_id": course_obj.id})
-                grade_value = grade_obj.value if grade_obj else "N/A"
-                print(f"  - {student_obj.get_full_name()} (Grade: {grade_value})")
-                students_found = True
-
-        if not students_found:
-            print("No students associated with this course.")
+        for student_obj, grade_value in roster:
+            print(f"  - {student_obj.get_full_name()} (Grade: {grade_value})")
 
     input("Press Enter to continue...")
 
@@ -567,31 +807,31 @@ def lecturer_menu():
         choice = get_choice(len(options))
 
         if choice == 1:
-            lecturer_enter_grade()
+            run_action(lecturer_enter_grade)
         elif choice == 2:
-            lecturer_view_courses_and_students()
+            run_action(lecturer_view_courses_and_students)
         elif choice == 0:
             break
 
 # --- Student services ---
+@count_queries()
 def student_view_grades():
     global system_repo
     clear_screen()
     print("--- Student: View My Grades ---")
 
-    my_grades = system_repo.find_all("grades", {"student_id": current_user.id})
+    my_grades = fetch_student_grades(system_repo, current_user.id)
 
     if not my_grades:
         print("No grades recorded for you yet.")
     else:
         print("\nYour Grades:")
-        for grade_obj in my_grades:
-            course = system_repo.find_one("courses", {"id": grade_obj.course_id})
-            course_name = course.name if course else "Unknown Course"
-            print(f"  - {course_name}: {grade_obj.value}")
+        for course_name, grade_value in my_grades:
+            print(f"  - {course_name}: {grade_value}")
 
     input("Press Enter to continue...")
 
+@count_queries()
 def student_view_my_courses():
     global system_repo
     clear_screen()
@@ -605,29 +845,37 @@ def student_view_my_courses():
         input("Press Enter to continue...")
         return
 
-    my_course_ids = set()
-    for link in my_group_links:
-        # For each group the student is in, find all courses assigned to that group
-        group_id = link.get('group_id') or link.group_id
-        course_links_in_group = system_repo.find_all("group_courses", {"group_id": group_id})
-        for course_link in course_links_in_group:
-            my_course_ids.add(course_link.get('course_id') or course_link.course_id)
+    my_courses = fetch_student_courses(system_repo, current_user.id)
 
-    if not my_course_ids:
+    if not my_courses:
         print("You are not enrolled in any courses through your groups.")
         input("Press Enter to continue...")
         return
 
     print("\nYour Enrolled Courses:")
-    for course_id in my_course_ids:
-        course_obj = system_repo.find_one("courses", {"id": course_id})
-        if course_obj:
-            lecturer_info = "N/A"
-            if course_obj.lecturer_id:
-                lecturer_obj = system_repo.find_one("users", {"id": course_obj.lecturer_id, "role": "lecturer"})
-                if lecturer_obj:
-                    lecturer_info = lecturer_obj.get_full_name()
-            print(f"- {course_obj.name} (Lecturer: {lecturer_info})")
+    for course_obj, lecturer_info in my_courses:
+        print(f"- {course_obj.name} (Lecturer: {lecturer_info})")
+
+    input("Press Enter to continue...")
+
+@count_queries()
+def student_view_grade_history():
+    global system_repo
+    clear_screen()
+    print("--- Student: View My Grade History ---")
+
+    # Past terms are read from their archive files, which only this screen opens
+    history = system_repo.find_student_history(current_user.id)
+
+    if not history:
+        print("No grades recorded for you in any term.")
+    else:
+        term = None
+        for row in history:
+            if row["term"] != term:
+                term = row["term"]
+                print(f"\n{term}:")
+            print(f"  - {row['course']}: {row['grade'] if row['grade'] is not None else 'N/A'}")
 
     input("Press Enter to continue...")
 
@@ -637,24 +885,26 @@ def student_menu():
         clear_screen()
         print("--- Student Dashboard ---")
         print(f"Welcome, {current_user.get_full_name()}!")
-        options = ["View My Grades", "View My Enrolled Courses"]
+        options = ["View My Grades", "View My Enrolled Courses", "View My Grade History"]
         display_menu(options)
         choice = get_choice(len(options))
 
         if choice == 1:
-            student_view_grades()
+            run_action(student_view_grades)
         elif choice == 2:
-            student_view_my_courses()
+            run_action(student_view_my_courses)
+        elif choice == 3:
+            run_action(student_view_grade_history)
         elif choice == 0:
             break
 
 # --- Main Application Loop ---
 def main():
-    global system_repo # Declare that we're using the global system_repo
-    system_repo = DatabaseRepository() # Instantiate the DatabaseRepository here
+    global system_repo, profiler # Declare that we're using the global system_repo
+    # Menu actions are loops around input(): time spent at the prompts is not counted
+    profiler = profiler_from_command_line("Academic System CLI", exclude_input=True)
 
-    # Pass the repository instance to the auth module's functions for setup
-    auth.seed_initial_admin_if_needed(system_repo) # Pass repository for seeding
+    system_repo = DatabaseRepository() # Instantiate the DatabaseRepository here
 
     while True:
         clear_screen()
@@ -676,7 +926,7 @@ def main():
             elif choice == 2:
                 logout()
             elif choice == 0:
-                print("Exiting Academic System. All data is saved in 'academic_system.db'.")
+                print(f"Exiting Academic System. All data is saved in '{system_repo.db_path}' (back it up with 'python db_maintenance.py backup').")
                 break
         else:
             print("1. Login")
@@ -684,9 +934,9 @@ def main():
             choice = get_choice(1)
 
             if choice == 1:
-                login()
+                run_action(login)
             elif choice == 0:
-                print("Exiting Academic System. All data is saved in 'academic_system.db'.")
+                print(f"Exiting Academic System. All data is saved in '{system_repo.db_path}' (back it up with 'python db_maintenance.py backup').")
                 break
 
 if __name__ == "__main__":
@@ -80,4 +80,18 @@ class Grade:
             "student_id": self.student_id,
             "course_id": self.course_id,
             "value": self.value
-        }
\ No newline at end of file
+        }
+
+    @staticmethod
+    def parse_value(text):
+        """
+        Parses a grade typed by a user into a float between 0 and 100.
+        Raises ValueError with a message that can be shown to the user as-is.
+        """
+        try:
+            value = float(str(text).strip())
+        except ValueError:
+            raise ValueError("Please enter a valid number for the grade.")
+        if not (0 <= value <= 100):
+            raise ValueError("Grade must be between 0 and 100.")
+        return value
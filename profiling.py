@@ -0,0 +1,212 @@
+import builtins
+import os
+import sys
+import threading
+import time
+
+# cProfile, pstats and tracemalloc are imported where they are used: this module is
+# imported on every launch, but they are only needed once profiling is switched on.
+
+# Environment alternatives to the --profile / --profile-memory command line flags
+PROFILE_DIR_ENV = "ACADEMIC_PROFILE_DIR"
+PROFILE_MEMORY_ENV = "ACADEMIC_PROFILE_MEMORY"
+# Actions faster than this many milliseconds are not written out (keeps GUI timers from flooding the directory)
+PROFILE_MIN_MS_ENV = "ACADEMIC_PROFILE_MIN_MS"
+
+SUMMARY_FILE = "summary.txt"
+
+
+def _env_flag(name):
+    return os.environ.get(name, "").strip().lower() in ("1", "true", "yes", "on")
+
+
+class ActionProfiler:
+    """
+    Profiles individual user actions (CLI menu entries, Tk callbacks) with cProfile and,
+    optionally, tracemalloc. Each action gets its own .prof file, a text report of its
+    hotspots, and a line in summary.txt inside `output_dir`.
+    Nested actions are folded into the outermost one, since only one cProfile can run at a time.
+    With exclude_input=True (the CLI, whose actions are menu loops) the time spent waiting in
+    input() is left out of both the elapsed time and the cProfile timings, so an action's figures
+    measure the work done between prompts rather than how long the user took to answer them.
+    """
+    def __init__(self, output_dir, trace_memory=False, top=15, min_ms=0.0, exclude_input=False):
+        self.output_dir = output_dir
+        self.trace_memory = trace_memory
+        self.exclude_input = exclude_input
+        self.top = top
+        self.min_ms = min_ms
+        self._sequence = 0
+        self._lock = threading.Lock()
+        self._active = threading.local()
+        os.makedirs(output_dir, exist_ok=True)
+
+    def run(self, action_name, func, *args, **kwargs):
+        """Calls func(*args, **kwargs) under the profiler and records the result for `action_name`."""
+        # Profile one action at a time: nested calls, other threads and re-entrant Tk callbacks run as-is
+        if getattr(self._active, "busy", False) or not self._lock.acquire(blocking=False):
+            return func(*args, **kwargs)
+        self._active.busy = True
+        try:
+            return self._profile(action_name, func, args, kwargs)
+        finally:
+            self._active.busy = False
+            self._lock.release()
+
+    def wrap(self, action_name, func):
+        """Returns a callable that profiles every call of `func` as `action_name`."""
+        def profiled(*args, **kwargs):
+            return self.run(action_name, func, *args, **kwargs)
+        profiled.__name__ = getattr(func, "__name__", action_name)
+        profiled.__doc__ = getattr(func, "__doc__", None)
+        return profiled
+
+    def _profile(self, action_name, func, args, kwargs):
+        import cProfile
+        import tracemalloc
+        from query_counter import QueryCounter
+
+        started_tracing = False
+        snapshot_before = None
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                started_tracing = True
+            tracemalloc.reset_peak()
+            snapshot_before = tracemalloc.take_snapshot()
+
+        clock = time.perf_counter
+        waited = [0.0] # Seconds spent in input() during this action
+        asked = [None] # When the prompt on screen was shown
+        original_input = builtins.input
+        if self.exclude_input:
+            def timed_input(*input_args, **input_kwargs):
+                asked[0] = time.perf_counter()
+                try:
+                    return original_input(*input_args, **input_kwargs)
+                finally:
+                    waited[0] += time.perf_counter() - asked[0]
+                    asked[0] = None
+
+            # cProfile reads this clock too; it stands still while a prompt waits for an answer,
+            # so the wait vanishes from every function's timings, input() itself included
+            def clock():
+                now = time.perf_counter() if asked[0] is None else asked[0]
+                return now - waited[0]
+            builtins.input = timed_input
+
+        profiler = cProfile.Profile(clock) if self.exclude_input else cProfile.Profile()
+        counter = QueryCounter(action_name)
+        start = clock()
+        try:
+            with counter:
+                profiler.enable()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    profiler.disable()
+        finally:
+            builtins.input = original_input
+            elapsed_ms = (clock() - start) * 1000
+            memory = None
+            if self.trace_memory:
+                _, peak = tracemalloc.get_traced_memory()
+                memory = (tracemalloc.take_snapshot(), snapshot_before, peak)
+                if started_tracing:
+                    tracemalloc.stop()
+            if elapsed_ms >= self.min_ms:
+                self._write_reports(action_name, profiler, elapsed_ms, counter, memory,
+                                    waited[0] if self.exclude_input else None)
+
+    def _write_reports(self, action_name, profiler, elapsed_ms, counter, memory, input_wait=None):
+        import io
+        import pstats
+        import re
+
+        self._sequence += 1
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", action_name).strip("_") or "action"
+        base = os.path.join(self.output_dir, f"{self._sequence:04d}-{time.strftime('%H%M%S')}-{safe_name}")
+
+        profiler.dump_stats(base + ".prof")
+        stream = io.StringIO()
+        stats = pstats.Stats(profiler, stream=stream)
+        stats.sort_stats("cumulative").print_stats(self.top)
+        stream.write("\n")
+        stats.sort_stats("tottime").print_stats(self.top)
+        headline = f"{action_name}: {elapsed_ms:.1f} ms, {counter.count} queries"
+        if input_wait is not None:
+            headline += f" (excluding {input_wait:.1f} s waiting at input prompts)"
+        with open(base + ".txt", "w", encoding="utf-8") as report_file:
+            report_file.write(headline + "\n")
+            report_file.write(counter.report() + "\n\n")
+            report_file.write(stream.getvalue())
+
+        summary = [f"{headline} -> {os.path.basename(base)}.prof"]
+        for (filename, line, function), (_, _, tottime, _, _) in sorted(
+                stats.stats.items(), key=lambda item: item[1][2], reverse=True)[:5]:
+            summary.append(f"    {tottime * 1000:9.1f} ms  {function} ({os.path.basename(filename)}:{line})")
+
+        if memory:
+            snapshot_after, snapshot_before, peak = memory
+            snapshot_after.dump(base + ".tracemalloc")
+            with open(base + ".mem.txt", "w", encoding="utf-8") as memory_file:
+                memory_file.write(f"{action_name}: peak traced memory {peak / 1024:.1f} KiB\n\n")
+                for stat in snapshot_after.compare_to(snapshot_before, "lineno")[:self.top]:
+                    memory_file.write(f"{stat}\n")
+            summary.append(f"    peak memory {peak / 1024:.1f} KiB")
+
+        with open(os.path.join(self.output_dir, SUMMARY_FILE), "a", encoding="utf-8") as summary_file:
+            summary_file.write("\n".join(summary) + "\n")
+
+
+def create_profiler(output_dir=None, trace_memory=False, exclude_input=False):
+    """
+    Returns an ActionProfiler when profiling was requested on the command line
+    or through ACADEMIC_PROFILE_DIR / ACADEMIC_PROFILE_MEMORY, otherwise None.
+    """
+    output_dir = output_dir or os.environ.get(PROFILE_DIR_ENV, "").strip()
+    if not output_dir:
+        return None
+    try:
+        min_ms = float(os.environ.get(PROFILE_MIN_MS_ENV, "0") or 0)
+    except ValueError:
+        min_ms = 0.0
+    return ActionProfiler(output_dir, trace_memory=trace_memory or _env_flag(PROFILE_MEMORY_ENV), min_ms=min_ms,
+                          exclude_input=exclude_input)
+
+
+def add_profiling_arguments(parser):
+    """Adds the shared --profile/--profile-memory flags to an argparse parser."""
+    parser.add_argument("--profile", metavar="DIR",
+                        help=f"Profile each action into DIR (or set {PROFILE_DIR_ENV}).")
+    parser.add_argument("--profile-memory", action="store_true",
+                        help=f"Also record tracemalloc snapshots per action (or set {PROFILE_MEMORY_ENV}=1).")
+
+
+def profiler_from_command_line(description, argv=None, exclude_input=False):
+    """
+    Parses the entry point's command line and returns create_profiler()'s result.
+    argparse is only imported when there are arguments to parse, which keeps it off a plain launch.
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        return create_profiler(exclude_input=exclude_input)
+    import argparse
+    parser = argparse.ArgumentParser(description=description)
+    add_profiling_arguments(parser)
+    args = parser.parse_args(argv)
+    return create_profiler(args.profile, args.profile_memory, exclude_input)
+
+
+def install_tk_callback_profiling(profiler):
+    """Routes every Tk callback (button commands, traces, after() timers) through `profiler`."""
+    import tkinter
+
+    original_call_wrapper = tkinter.CallWrapper
+
+    class ProfilingCallWrapper(original_call_wrapper):
+        def __call__(self, *args):
+            action_name = getattr(self.func, "__qualname__", None) or repr(self.func)
+            return profiler.run(action_name, super().__call__, *args)
+
+    tkinter.CallWrapper = ProfilingCallWrapper
@@ -0,0 +1,154 @@
+import functools
+import os
+import sys
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+import database_repository
+
+# Set ACADEMIC_QUERY_DEBUG=1 to print a query report to stderr every time a counted scope ends,
+# or set it to a file path to append the reports there (the CLI clears the screen between menus).
+QUERY_DEBUG_ENV = "ACADEMIC_QUERY_DEBUG"
+_TRUTHY = ("1", "true", "yes", "on")
+
+# A statement shape repeated at least this many times inside one scope is reported as N+1.
+DEFAULT_N_PLUS_ONE_THRESHOLD = 5
+
+# Transaction control and connection setup are not "queries" for budgeting purposes.
+# Lines starting with "--" are statements SQLite runs internally for the FTS5 search indexes
+# (shadow-table reads and writes), as is the index configuration read; neither is issued by our code.
+# Note that sqlite also re-reports a write once per trigger it fires, so writes to users/courses count extra.
+_IGNORED_PREFIXES = ("BEGIN", "COMMIT", "ROLLBACK", "SAVEPOINT", "RELEASE", "PRAGMA", "--")
+_FTS_CONFIG_READ = "SELECT k, v FROM 'main'."
+
+_STRING_LITERAL = r"'(?:[^']|'')*'"
+_NUMBER_LITERAL = r"(?<![\w.])-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?\b"
+_IN_LIST = r"\(\s*\?(?:\s*,\s*\?)+\s*\)"
+_WHITESPACE = r"\s+"
+
+
+def normalize_query(sql):
+    """Reduces an executed statement to its shape by replacing literal values with '?'."""
+    # re caches compiled patterns; importing it here keeps it off the application's startup path
+    import re
+    shape = re.sub(_STRING_LITERAL, "?", sql)
+    shape = re.sub(_NUMBER_LITERAL, "?", shape)
+    shape = re.sub(_IN_LIST, "(?, ...)", shape)
+    return re.sub(_WHITESPACE, " ", shape).strip()
+
+
+def query_debug_enabled():
+    """Returns True when the query debug environment variable is set."""
+    value = os.environ.get(QUERY_DEBUG_ENV, "").strip()
+    return bool(value) and value.lower() not in ("0", "false", "no", "off")
+
+
+def _emit_debug_report(text):
+    target = os.environ.get(QUERY_DEBUG_ENV, "").strip()
+    if target.lower() in _TRUTHY:
+        print(text, file=sys.stderr)
+    else:
+        with open(target, "a", encoding="utf-8") as log_file:
+            log_file.write(text + "\n")
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when a counted scope issues more queries than its budget allows."""
+
+
+class QueryCounter:
+    """
+    Counts the SQL statements issued by DatabaseRepository while the scope is active.
+    Example:
+        with QueryCounter("admin courses view") as counter:
+            system_repo.find_all("courses")
+        print(counter.report())
+    """
+    def __init__(self, label=None, n_plus_one_threshold=DEFAULT_N_PLUS_ONE_THRESHOLD, current_thread_only=False):
+        self.label = label or "query scope"
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.current_thread_only = current_thread_only
+        self.statements = []
+        self._lock = threading.Lock()
+        self._thread_id = None
+
+    def __enter__(self):
+        self._thread_id = threading.get_ident()
+        database_repository.add_statement_listener(self._on_statement)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        database_repository.remove_statement_listener(self._on_statement)
+        if query_debug_enabled():
+            _emit_debug_report(self.report())
+        return False
+
+    def _on_statement(self, sql):
+        if self.current_thread_only and threading.get_ident() != self._thread_id:
+            return
+        if sql.lstrip().upper().startswith(_IGNORED_PREFIXES) or sql.startswith(_FTS_CONFIG_READ):
+            return
+        with self._lock:
+            self.statements.append(sql)
+
+    @property
+    def shapes(self):
+        """Counter of normalized statement shapes (computed on demand to keep recording cheap)."""
+        with self._lock:
+            statements = list(self.statements)
+        return Counter(normalize_query(sql) for sql in statements)
+
+    @property
+    def count(self):
+        """Number of statements issued inside the scope."""
+        return len(self.statements)
+
+    def n_plus_one_suspects(self):
+        """Returns (shape, count) pairs for statement shapes repeated past the threshold."""
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= self.n_plus_one_threshold]
+
+    def report(self, top=5):
+        """Builds a short human-readable summary of the scope."""
+        shapes = self.shapes
+        lines = [f"[queries] {self.label}: {self.count} statements, {len(shapes)} distinct shapes"]
+        suspects = [(shape, n) for shape, n in shapes.most_common() if n >= self.n_plus_one_threshold]
+        for shape, n in suspects[:top]:
+            lines.append(f"  possible N+1 ({n}x): {shape}")
+        return "\n".join(lines)
+
+
+@contextmanager
+def assert_query_budget(max_queries, label=None, allow_n_plus_one=False,
+                        n_plus_one_threshold=DEFAULT_N_PLUS_ONE_THRESHOLD):
+    """
+    Fails with QueryBudgetExceeded if the block issues more than `max_queries` statements,
+    or any repeated same-shape statement unless `allow_n_plus_one` is set.
+    Example:
+        with assert_query_budget(3, "admin groups view"):
+            app._admin_view_groups()
+    """
+    counter = QueryCounter(label, n_plus_one_threshold=n_plus_one_threshold)
+    with counter:
+        yield counter
+
+    problems = []
+    if counter.count > max_queries:
+        problems.append(f"issued {counter.count} statements, budget is {max_queries}")
+    if not allow_n_plus_one and counter.n_plus_one_suspects():
+        problems.append("repeated statement shapes detected")
+    if problems:
+        raise QueryBudgetExceeded(f"{counter.label}: {'; '.join(problems)}\n{counter.report()}")
+
+
+def count_queries(label=None):
+    """Decorator that counts the queries of every call and prints the report in debug mode."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not query_debug_enabled():
+                return func(*args, **kwargs)
+            with QueryCounter(label or func.__name__):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,186 @@
+import argparse
+import csv
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+from database_repository import (DATABASE_NAME, DB_PATH_ENV, DB_REPLICA_ENV, DatabaseRepository, default_database,
+                                 replica_taken_at)
+from db_maintenance import copy_pages, open_read_only
+
+# Seconds between two refreshes of the replica by the scheduler
+DEFAULT_REFRESH_INTERVAL = 300
+
+
+def default_replica_path(db_path=None):
+    """The replica kept next to a database: academic_system.db -> academic_system.replica.db."""
+    stem, extension = os.path.splitext(db_path or default_database())
+    return f"{stem}.replica{extension or '.db'}"
+
+
+def refresh_replica(db_path=None, replica_path=None):
+    """
+    Replaces the reporting replica with a fresh snapshot of the live database, copied online (see
+    db_maintenance.copy_pages) into a temporary file that is renamed over the old replica once complete.
+    Reports already running keep reading the old snapshot; the next ones open the new one.
+    The file's modification time is set to when the snapshot was taken, which is what staleness is
+    measured from. Returns the copy_pages() stats plus "path" and "taken_at".
+    """
+    db_path = db_path or default_database()
+    replica_path = replica_path or default_replica_path(db_path)
+    partial = replica_path + ".part"
+    if os.path.exists(partial):
+        os.remove(partial) # Left behind by a refresh that was interrupted
+    taken_at = time.time()
+    source = open_read_only(db_path)
+    target = sqlite3.connect(partial)
+    try:
+        stats = copy_pages(source, target, pause=0)
+        target.execute("PRAGMA journal_mode = DELETE") # Immutable readers must not look for a -wal file
+    finally:
+        source.close()
+        target.close()
+    os.utime(partial, (taken_at, taken_at))
+    os.replace(partial, replica_path)
+    return dict(stats, path=replica_path, taken_at=taken_at)
+
+
+class ReplicaRefresher:
+    """
+    Refreshes a reporting replica every `interval` seconds on a background thread.
+    A refresh that fails (e.g. the database is missing) is retried at the next interval; the error is kept
+    in `last_error` and the replica keeps its previous snapshot.
+    Example:
+        refresher = ReplicaRefresher("academic_system.db", interval=300)
+        refresher.start()
+        ...
+        refresher.stop()
+    """
+    def __init__(self, db_path=None, replica_path=None, interval=DEFAULT_REFRESH_INTERVAL, on_refresh=None):
+        self.db_path = db_path or default_database()
+        self.replica_path = replica_path or default_replica_path(self.db_path)
+        self.interval = interval
+        self.on_refresh = on_refresh # Called with the refresh_replica() stats after every refresh
+        self.refreshes = 0
+        self.last_error = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Refreshes once right away, then every interval."""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="replica-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                stats = refresh_replica(self.db_path, self.replica_path)
+            except (OSError, sqlite3.Error) as e:
+                self.last_error = e
+            else:
+                self.refreshes += 1
+                self.last_error = None
+                if self.on_refresh:
+                    self.on_refresh(stats)
+            self._stop.wait(self.interval)
+
+
+def describe_age(seconds):
+    """Human-readable staleness of report data, e.g. "live", "42 s old", "3 min old", "2.5 h old"."""
+    if not seconds:
+        return "live"
+    if seconds < 60:
+        return f"{seconds:.0f} s old"
+    if seconds < 3600:
+        return f"{seconds / 60:.0f} min old"
+    return f"{seconds / 3600:.1f} h old"
+
+
+def describe_report_source(repo):
+    """One line telling the user where a report's figures come from and how old they are."""
+    taken_at = replica_taken_at(repo.replica)
+    if taken_at is None:
+        return "Figures from the live database."
+    return (f"Figures as of {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(taken_at))} "
+            f"({describe_age(repo.report_age())}, from the reporting replica).")
+
+
+def _print_refresh(stats):
+    print(f"{time.strftime('%H:%M:%S')} refreshed '{stats['path']}': {stats['bytes'] / (1024 * 1024):.1f} MiB "
+          f"in {stats['seconds']:.2f}s", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keep a read-only reporting replica of the database, and run reports on it.")
+    parser.add_argument("--db", default=default_database(), help=f"Live database (default: ${DB_PATH_ENV}, or {DATABASE_NAME}).")
+    parser.add_argument("--replica", help=f"Replica file (default: ${DB_REPLICA_ENV}, or <db name>.replica.db).")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("refresh", help="Take a new snapshot now.")
+    schedule_parser = commands.add_parser("schedule", help="Take a new snapshot every --interval seconds until stopped.")
+    schedule_parser.add_argument("--interval", type=float, default=DEFAULT_REFRESH_INTERVAL)
+
+    report_parser = commands.add_parser("report", help="Print a report from the replica.")
+    report_parser.add_argument("name", choices=("statistics", "rosters"))
+    report_parser.add_argument("--csv", help="Write the rows to this CSV file instead of printing them.")
+    args = parser.parse_args()
+
+    replica_path = args.replica or os.environ.get(DB_REPLICA_ENV) or default_replica_path(args.db)
+    try:
+        if args.command == "refresh":
+            _print_refresh(refresh_replica(args.db, replica_path))
+        elif args.command == "schedule":
+            refresher = ReplicaRefresher(args.db, replica_path, args.interval, on_refresh=_print_refresh)
+            print(f"Refreshing '{replica_path}' every {args.interval:g}s; Ctrl+C to stop.", flush=True)
+            refresher.start()
+            try:
+                while True:
+                    time.sleep(1)
+                    if refresher.last_error:
+                        print(f"Refresh failed: {refresher.last_error}", flush=True)
+                        refresher.last_error = None
+            except KeyboardInterrupt:
+                refresher.stop()
+        else:
+            run_report(args.db, replica_path, args.name, args.csv)
+    except (FileNotFoundError, sqlite3.Error) as e:
+        print(f"Error: {e}")
+        sys.exit(2)
+
+
+def run_report(db_path, replica_path, name, csv_path=None):
+    repo = DatabaseRepository(db_path, replica=replica_path)
+    rows = repo.report_course_statistics() if name == "statistics" else repo.report_rosters()
+    print(describe_report_source(repo))
+    if csv_path:
+        with open(csv_path, "w", newline="") as csv_file:
+            writer = csv.DictWriter(csv_file, fieldnames=list(rows[0]) if rows else [])
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"{len(rows)} row(s) written to '{csv_path}'.")
+        return
+    if name == "statistics":
+        print(f"{'Course':<40} {'Lecturer':<25} {'Enrolled':>8} {'Graded':>7} {'Average':>8} {'Min':>6} {'Max':>6}")
+        for row in rows:
+            average = f"{row['average']:.1f}" if row["average"] is not None else "-"
+            print(f"{row['course'][:40]:<40} {(row['lecturer'] or 'N/A')[:25]:<25} {row['enrolled']:>8} "
+                  f"{row['graded']:>7} {average:>8} {row['minimum'] if row['minimum'] is not None else '-':>6} "
+                  f"{row['maximum'] if row['maximum'] is not None else '-':>6}")
+    else:
+        for row in rows:
+            print(f"{row['course'][:40]:<40} {row['surname']}, {row['name']} ({row['username']}): "
+                  f"{row['grade'] if row['grade'] is not None else 'N/A'}")
+    print(f"{len(rows)} row(s).")
+
+
+if __name__ == "__main__":
+    main()
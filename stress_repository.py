@@ -0,0 +1,123 @@
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+import dataset_generator
+from database_repository import DatabaseRepository, busy_retry_stats, reset_busy_retry_stats
+
+# Share of operations that save a grade; the rest are the reads a grade-entry screen makes
+DEFAULT_WRITE_RATIO = 0.3
+
+
+def _stress_worker(repo, index, threads, grades, deadline, write_ratio, outcome):
+    """
+    Mixes reads and grade saves until the deadline. Each worker only writes the grades whose position
+    is `index` modulo `threads`, so the last value it saved for each must be what ends up in the database.
+    """
+    rng = random.Random(index)
+    owned = grades[index::threads]
+    expected, reads, writes, errors = {}, 0, 0, []
+    while time.perf_counter() < deadline:
+        try:
+            if owned and rng.random() < write_ratio:
+                student_id, course_id = rng.choice(owned)
+                value = float(rng.randint(0, 100))
+                success, result = repo.upsert_grades_many([(student_id, course_id, value)])
+                if success:
+                    expected[(student_id, course_id)] = value
+                    writes += 1
+                else:
+                    errors.append(result)
+            else:
+                student_id, course_id = rng.choice(grades)
+                repo.find_all("grades", {"student_id": student_id})
+                repo.find_one("courses", {"id": course_id})
+                reads += 1
+        except Exception as e:
+            errors.append(repr(e))
+    outcome[index] = (expected, reads, writes, errors)
+
+
+def run_stress(db_path, threads=32, seconds=5.0, write_ratio=DEFAULT_WRITE_RATIO, thread_safe=True):
+    """
+    Runs `threads` workers against one repository (thread-safe mode) or one repository each (the
+    connection-per-call default). Returns a summary dict; "mismatches" lists grades whose final value
+    differs from the last successful save.
+    """
+    shared = DatabaseRepository(db_path, thread_safe=True) if thread_safe else None
+    reader = shared or DatabaseRepository(db_path)
+    grades = [(g.student_id, g.course_id) for g in reader.find_all("grades")]
+    reset_busy_retry_stats()
+
+    outcome = [None] * threads
+    deadline = time.perf_counter() + seconds
+    workers = [threading.Thread(target=_stress_worker,
+                                args=(shared or DatabaseRepository(db_path), i, threads, grades, deadline,
+                                      write_ratio, outcome))
+               for i in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+
+    expected = {}
+    for worker_expected, _, _, _ in outcome:
+        expected.update(worker_expected)
+    stored = {(g.student_id, g.course_id): g.value for g in reader.find_all("grades")}
+    summary = {
+        "mode": "thread-safe" if thread_safe else "connection per call",
+        "threads": threads,
+        "reads_per_s": round(sum(o[1] for o in outcome) / elapsed, 1),
+        "writes_per_s": round(sum(o[2] for o in outcome) / elapsed, 1),
+        "errors": [error for o in outcome for error in o[3]],
+        "mismatches": [key for key, value in expected.items() if stored.get(key) != value],
+        "busy_retries": busy_retry_stats()["retries"],
+    }
+    if shared:
+        shared.close()
+        summary["write_batches"] = shared.write_stats["batches"]
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stress the repository with many threads mixing reads and grade saves.")
+    parser.add_argument("--db", help="Existing database to stress; its grade values are overwritten. Default: a generated one.")
+    parser.add_argument("--preset", choices=sorted(dataset_generator.PRESETS), default="department")
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--write-ratio", type=float, default=DEFAULT_WRITE_RATIO)
+    parser.add_argument("--compare", action="store_true",
+                        help="Also run with one connection-per-call repository per thread.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        db_path = args.db
+        if not db_path:
+            db_path = os.path.join(work_dir, "stress.db")
+            print(f"Generating '{args.preset}' dataset...", flush=True)
+            dataset_generator.generate_preset(db_path, preset=args.preset)
+
+        failed = False
+        for thread_safe in ((True, False) if args.compare else (True,)):
+            summary = run_stress(db_path, args.threads, args.seconds, args.write_ratio, thread_safe)
+            print(f"{summary['mode']}: {summary['threads']} threads, {summary['reads_per_s']} reads/s, "
+                  f"{summary['writes_per_s']} grade saves/s, {len(summary['errors'])} errors, "
+                  f"{summary['busy_retries']} busy retries"
+                  + (f", {summary['write_batches']} write transactions" if "write_batches" in summary else ""))
+            for error in summary["errors"][:5]:
+                print(f"  error: {error}")
+            if summary["mismatches"]:
+                print(f"  {len(summary['mismatches'])} grade(s) do not hold their last saved value, "
+                      f"e.g. {summary['mismatches'][0]}")
+            failed = failed or bool(summary["errors"] or summary["mismatches"])
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
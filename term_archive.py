@@ -0,0 +1,187 @@
+import argparse
+import os
+import sqlite3
+import sys
+import time
+
+from database_repository import (DATABASE_NAME, DB_PATH_ENV, TERM_TABLES, DatabaseRepository, default_database,
+                                 get_db_connection)
+
+# Where archives go, relative to the database's directory
+DEFAULT_ARCHIVE_DIR = "archives"
+# Archiving copies a term's rows, then deletes the live rows the archive holds unchanged; a row edited in
+# between is copied again in the next round
+MAX_ARCHIVE_ROUNDS = 3
+
+# Tables of an archive file. No foreign keys: the users and courses they point at live in the main database.
+# courses keeps a copy of the course names as they were when the term was archived.
+ARCHIVE_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS archive.terms (id INTEGER PRIMARY KEY, name TEXT NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS archive.courses (id INTEGER PRIMARY KEY, name TEXT NOT NULL, lecturer_id INTEGER)",
+    ("CREATE TABLE IF NOT EXISTS archive.grades (id INTEGER PRIMARY KEY, student_id INTEGER NOT NULL, "
+     "course_id INTEGER NOT NULL, value REAL, term_id INTEGER NOT NULL)"),
+    ("CREATE TABLE IF NOT EXISTS archive.group_students (group_id INTEGER NOT NULL, student_id INTEGER NOT NULL, "
+     "term_id INTEGER NOT NULL, PRIMARY KEY (group_id, student_id))"),
+    ("CREATE TABLE IF NOT EXISTS archive.group_courses (group_id INTEGER NOT NULL, course_id INTEGER NOT NULL, "
+     "term_id INTEGER NOT NULL, PRIMARY KEY (group_id, course_id))"),
+    "CREATE INDEX IF NOT EXISTS archive.idx_grades_student ON grades (student_id)",
+    "CREATE INDEX IF NOT EXISTS archive.idx_grades_course ON grades (course_id)",
+]
+
+# Per term table: the columns copied, and the condition under which a live row is the one in the archive
+ARCHIVE_COPIES = {
+    "grades": ("id, student_id, course_id, value, term_id",
+               "a.id = t.id AND a.student_id = t.student_id AND a.course_id = t.course_id AND a.value IS t.value"),
+    "group_students": ("group_id, student_id, term_id", "a.group_id = t.group_id AND a.student_id = t.student_id"),
+    "group_courses": ("group_id, course_id, term_id", "a.group_id = t.group_id AND a.course_id = t.course_id"),
+}
+
+
+def archive_file_name(db_path, term_id):
+    stem = os.path.splitext(os.path.basename(db_path))[0]
+    return f"{stem}-term-{term_id}.db"
+
+
+def archive_term(db_path=None, term_id=None, archive_dir=DEFAULT_ARCHIVE_DIR, progress=None):
+    """
+    Moves every row of a closed term out of the live tables into its own archive file, in bulk.
+    Rows are first copied and committed to the archive; only then are the live rows the archive holds
+    unchanged deleted (in one short transaction), so an interrupted run loses nothing and can simply
+    be run again. The term is marked archived once none of its rows are left in the live tables.
+    `progress(round, table, rows)` is called after each copy. Returns {"path", table: rows moved}.
+    Raises ValueError for an unknown, current or already archived term.
+    """
+    db_path = db_path or default_database()
+    repo = DatabaseRepository(db_path) # Brings the schema up to date (terms came with version 6)
+    term = next((term for term in repo.find_terms() if term["id"] == term_id), None)
+    if term is None:
+        raise ValueError(f"No term with id {term_id}")
+    if term["status"] != "closed":
+        raise ValueError(f"Term '{term['name']}' is {term['status']}; only closed terms can be archived "
+                         "(start the next term first)")
+
+    db_dir = os.path.dirname(os.path.abspath(db_path))
+    os.makedirs(os.path.join(db_dir, archive_dir), exist_ok=True)
+    relative_path = os.path.join(archive_dir, archive_file_name(db_path, term_id))
+    moved = {table: 0 for table in TERM_TABLES}
+
+    conn = get_db_connection(db_path)
+    try:
+        conn.execute("ATTACH DATABASE ? AS archive", (os.path.join(db_dir, relative_path),))
+        for round_number in range(1, MAX_ARCHIVE_ROUNDS + 1):
+            # Copy: a transaction writing the archive only
+            conn.execute("BEGIN IMMEDIATE")
+            for statement in ARCHIVE_SCHEMA:
+                conn.execute(statement)
+            conn.execute("INSERT OR REPLACE INTO archive.terms (id, name) VALUES (?, ?)", (term["id"], term["name"]))
+            conn.execute("INSERT OR REPLACE INTO archive.courses (id, name, lecturer_id) "
+                         "SELECT id, name, lecturer_id FROM main.courses")
+            copied = {table: conn.execute(f"INSERT OR REPLACE INTO archive.{table} ({columns}) "
+                                          f"SELECT {columns} FROM main.{table} WHERE term_id = ?", (term_id,)).rowcount
+                      for table, (columns, _) in ARCHIVE_COPIES.items()}
+            conn.commit()
+            if progress:
+                for table, rows in copied.items():
+                    progress(round_number, table, rows)
+
+            # Delete: a transaction writing the live database only
+            conn.execute("BEGIN IMMEDIATE")
+            left = 0
+            for table, (_, same_row) in ARCHIVE_COPIES.items():
+                moved[table] += conn.execute(
+                    f"DELETE FROM main.{table} AS t WHERE t.term_id = ? "
+                    f"AND EXISTS (SELECT 1 FROM archive.{table} a WHERE {same_row})", (term_id,)).rowcount
+                left += conn.execute(f"SELECT COUNT(*) FROM main.{table} WHERE term_id = ?", (term_id,)).fetchone()[0]
+            if not left:
+                conn.execute("UPDATE main.terms SET status = 'archived', archive_path = ? WHERE id = ?",
+                             (relative_path, term_id))
+            conn.commit()
+            if not left:
+                break
+        else:
+            raise sqlite3.OperationalError(f"Rows of term '{term['name']}' kept changing while it was archived; "
+                                           "run the archive again")
+    except sqlite3.Error:
+        if conn.in_transaction:
+            conn.rollback()
+        raise
+    finally:
+        conn.close()
+    return dict(moved, path=os.path.join(db_dir, relative_path))
+
+
+def print_terms(repo):
+    conn = get_db_connection(repo.db_path)
+    try:
+        live = {table: dict(conn.execute(f"SELECT term_id, COUNT(*) FROM {table} GROUP BY term_id").fetchall())
+                for table in TERM_TABLES}
+    finally:
+        conn.close()
+    for term in repo.find_terms():
+        counts = ", ".join(f"{live[table].get(term['id'], 0)} {table}" for table in TERM_TABLES)
+        where = f"archived in '{term['archive_path']}'" if term["status"] == "archived" else f"live: {counts}"
+        print(f"  {term['id']:>3}  {term['name']:<25} {term['status']:<9} {where}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Academic terms: start a new term and archive finished ones.")
+    parser.add_argument("--db", default=default_database(), help=f"Database file (default: ${DB_PATH_ENV}, or {DATABASE_NAME}).")
+    parser.add_argument("--dir", default=DEFAULT_ARCHIVE_DIR,
+                        help=f"Archive directory, relative to the database's (default: {DEFAULT_ARCHIVE_DIR}).")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("list", help="List the terms and where their rows are.")
+    start_parser = commands.add_parser("start", help="Start a new current term; the current one is closed.")
+    start_parser.add_argument("name")
+    archive_parser = commands.add_parser("archive", help="Move a closed term's rows to its archive file.")
+    archive_parser.add_argument("term_id", type=int)
+    close_parser = commands.add_parser("close", help="Start a new term and archive the one it replaces.")
+    close_parser.add_argument("name", help="Name of the new term.")
+    history_parser = commands.add_parser("history", help="Show a student's grades over every term.")
+    history_parser.add_argument("username")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"Error: No database at '{args.db}'")
+        sys.exit(2)
+    repo = DatabaseRepository(args.db)
+    try:
+        run_command(repo, args)
+    except (ValueError, sqlite3.Error) as e:
+        print(f"Error: {e}")
+        sys.exit(2)
+
+
+def run_command(repo, args):
+    if args.command == "list":
+        print_terms(repo)
+
+    elif args.command in ("start", "close"):
+        previous = repo.current_term()
+        success, result = repo.start_term(args.name)
+        if not success:
+            raise ValueError(result)
+        print(f"Term '{args.name}' started" + (f"; '{previous['name']}' is closed." if previous else "."))
+        if args.command == "close" and previous:
+            run_archive(repo, previous["id"], args.dir)
+
+    elif args.command == "archive":
+        run_archive(repo, args.term_id, args.dir)
+
+    elif args.command == "history":
+        student = repo.find_one("users", {"username": args.username, "role": "student"})
+        if not student:
+            raise ValueError(f"No student with username '{args.username}'")
+        for row in repo.find_student_history(student.id):
+            print(f"  {row['term']:<25} {row['course']:<40} {row['grade'] if row['grade'] is not None else 'N/A'}")
+
+
+def run_archive(repo, term_id, archive_dir):
+    start = time.perf_counter()
+    result = archive_term(repo.db_path, term_id, archive_dir)
+    print(f"Archived term {term_id} to '{result['path']}' in {time.perf_counter() - start:.2f}s: "
+          + ", ".join(f"{result[table]} {table}" for table in TERM_TABLES) + " moved.")
+
+
+if __name__ == "__main__":
+    main()
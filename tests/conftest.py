@@ -0,0 +1,28 @@
+import pytest
+
+import dataset_generator
+from database_repository import DatabaseRepository
+
+
+@pytest.fixture
+def repo():
+    """A private in-memory copy of the small preset: cloned from a per-process template, never on disk."""
+    repository = dataset_generator.fresh_repository()
+    yield repository
+    repository.close()
+
+
+@pytest.fixture
+def threaded_repo():
+    """As repo, in thread-safe mode (one writer thread batching every write)."""
+    repository = dataset_generator.fresh_repository(thread_safe=True)
+    yield repository
+    repository.close()
+
+
+@pytest.fixture
+def db_file(tmp_path, repo):
+    """Path of a database file holding the small preset, for code that works on files (backups, archives)."""
+    path = str(tmp_path / "academic_system.db")
+    DatabaseRepository(path, template=repo).close()
+    return path
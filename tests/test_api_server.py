@@ -0,0 +1,52 @@
+import pytest
+
+from api_server import ApiError, ApiService
+
+
+@pytest.fixture
+def service(repo):
+    api = ApiService(repo)
+    yield api
+    api.grade_writer.close() # The repo fixture closes the repository
+
+
+def _lecturer_with_roster(repo):
+    """Returns (lecturer user dict, course id, roster student ids, a student not on that roster)."""
+    for course in repo.find_all("courses"):
+        if course.lecturer_id is None:
+            continue
+        roster = {entry["student_id"] for entry in repo.find_course_rosters(course_id=course.id)[course.id]}
+        outsiders = [s.id for s in repo.find_all("users", {"role": "student"}) if s.id not in roster]
+        if roster and outsiders:
+            lecturer = repo.find_one("users", {"id": course.lecturer_id}).to_dict()
+            return lecturer, course.id, roster, outsiders[0]
+    pytest.skip("The preset has no course with both enrolled and unenrolled students")
+
+
+def test_lecturer_saves_grades_for_roster_students(service, repo):
+    lecturer, course_id, roster, _ = _lecturer_with_roster(repo)
+    student_id = min(roster)
+    assert service.save_grades(lecturer, {"grades": [
+        {"student_id": student_id, "course_id": course_id, "value": 64}]}) == {"saved": 1}
+    assert repo.find_one("grades", {"student_id": student_id, "course_id": course_id}).value == 64
+
+
+def test_lecturer_cannot_grade_students_outside_the_roster(service, repo):
+    lecturer, course_id, roster, outsider = _lecturer_with_roster(repo)
+    with pytest.raises(ApiError) as error:
+        service.save_grades(lecturer, {"grades": [
+            {"student_id": min(roster), "course_id": course_id, "value": 70},
+            {"student_id": outsider, "course_id": course_id, "value": 70}]})
+    assert error.value.status == 403
+    # Nothing of the request was written
+    assert repo.find_one("grades", {"student_id": outsider, "course_id": course_id}) is None
+
+
+@pytest.mark.parametrize("handler, params", [
+    ("create_course", {"name": "Bad Lecturer Course", "lecturer_id": "abc"}),
+    ("assign_lecturer", {"course_id": 1, "lecturer_id": "abc"}),
+])
+def test_non_numeric_lecturer_id_is_a_bad_request(service, handler, params):
+    with pytest.raises(ApiError) as error:
+        getattr(service, handler)(None, params)
+    assert error.value.status == 400
@@ -0,0 +1,9 @@
+import pytest
+
+from dataset_generator import PRESETS, generate_dataset
+
+
+def test_a_failed_bulk_insert_is_reported(repo):
+    # The small preset is already in `repo`, so the same usernames collide
+    with pytest.raises(RuntimeError, match="generated users.*UNIQUE"):
+        generate_dataset(repo, password_hash="not-a-real-hash", **PRESETS["small"])
@@ -0,0 +1,61 @@
+import os
+import sqlite3
+
+import pytest
+
+from database_repository import DatabaseRepository
+from db_maintenance import backup_database, integrity_check, list_backups, open_read_only, restore_database
+
+
+def _count(db_path, table):
+    conn = open_read_only(db_path)
+    try:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_backup_is_a_checked_copy(db_file, tmp_path):
+    backup_dir = str(tmp_path / "backups")
+    stats = backup_database(db_file, backup_dir, pause=0)
+    assert stats["path"] in list_backups(backup_dir, db_file)
+    assert not os.path.exists(stats["path"] + ".part")
+    for table in ("users", "courses", "grades", "group_students"):
+        assert _count(stats["path"], table) == _count(db_file, table)
+    conn = open_read_only(stats["path"])
+    try:
+        assert integrity_check(conn) == []
+    finally:
+        conn.close()
+
+
+def test_backup_keeps_the_latest_copies(db_file, tmp_path):
+    backup_dir = tmp_path / "backups"
+    backup_dir.mkdir()
+    old_backups = [backup_dir / f"academic_system-2020010{day}-000000.db" for day in (1, 2, 3)]
+    for old_backup in old_backups:
+        old_backup.write_bytes(b"")
+    stats = backup_database(db_file, str(backup_dir), keep=2, pause=0)
+    assert stats["removed"] == [str(path) for path in old_backups[:2]]
+    assert list_backups(str(backup_dir), db_file) == [str(old_backups[2]), stats["path"]]
+
+
+def test_restore_brings_back_the_backed_up_rows(db_file, tmp_path):
+    repo = DatabaseRepository(db_file)
+    backup_path = backup_database(db_file, str(tmp_path / "backups"), pause=0)["path"]
+    course = repo.find_all("courses")[0]
+    grades = len(repo.find_all("grades", {"course_id": course.id}))
+    assert repo.delete_one("courses", course.id)
+
+    restore_database(backup_path, db_file, pages=16)
+    # The open repository sees the restored data: the file was rewritten through SQLite, not swapped
+    assert repo.find_one("courses", {"id": course.id}).name == course.name
+    assert len(repo.find_all("grades", {"course_id": course.id})) == grades
+
+
+def test_restore_refuses_a_damaged_backup(db_file, tmp_path):
+    damaged = tmp_path / "damaged.db"
+    damaged.write_bytes(b"not a database" * 100)
+    with pytest.raises(sqlite3.DatabaseError):
+        restore_database(str(damaged), db_file)
+    assert _count(db_file, "users") > 0
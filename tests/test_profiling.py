@@ -0,0 +1,46 @@
+import builtins
+import os
+import time
+
+from profiling import SUMMARY_FILE, ActionProfiler
+
+
+def _slow_answer(prompt=""):
+    time.sleep(0.3) # A user thinking before they answer
+    return "1"
+
+
+def _menu_action():
+    return [input("Choice: ") for _ in range(2)]
+
+
+def _summary(output_dir):
+    with open(os.path.join(output_dir, SUMMARY_FILE), encoding="utf-8") as summary_file:
+        return summary_file.readline()
+
+
+def _hotspot_ms(output_dir):
+    with open(os.path.join(output_dir, SUMMARY_FILE), encoding="utf-8") as summary_file:
+        return [float(line.split()[0]) for line in summary_file.readlines()[1:]]
+
+
+def _elapsed_ms(summary_line):
+    return float(summary_line.split(": ", 1)[1].split(" ms", 1)[0])
+
+
+def test_time_at_input_prompts_is_not_counted(tmp_path, monkeypatch):
+    monkeypatch.setattr(builtins, "input", _slow_answer)
+    profiler = ActionProfiler(str(tmp_path), exclude_input=True)
+    assert profiler.run("menu", _menu_action) == ["1", "1"]
+    assert builtins.input is _slow_answer # Restored after the action
+    line = _summary(str(tmp_path))
+    assert _elapsed_ms(line) < 300
+    assert "waiting at input prompts" in line
+    # Not even the function answering the prompt is charged for the wait
+    assert max(_hotspot_ms(str(tmp_path))) < 300
+
+
+def test_input_time_is_counted_unless_excluded(tmp_path, monkeypatch):
+    monkeypatch.setattr(builtins, "input", _slow_answer)
+    ActionProfiler(str(tmp_path)).run("menu", _menu_action)
+    assert _elapsed_ms(_summary(str(tmp_path))) >= 600
@@ -0,0 +1,86 @@
+import pytest
+
+import dataset_generator
+import main
+from query_counter import QueryBudgetExceeded, QueryCounter, assert_query_budget
+
+# Statements each screen may issue, whatever the size of the dataset
+SCREEN_BUDGETS = {
+    "admin courses": 2,
+    "admin groups": 5,
+    "student grades": 1,
+    "student courses": 2,
+    "student grade history": 2,
+    "lecturer courses and students": 2,
+    "lecturer enter grade": 2,
+}
+
+
+@pytest.fixture
+def screens(monkeypatch):
+    """Runs main.py screens headlessly: answers their prompts from a script and swallows the screen clears."""
+    monkeypatch.setattr(main, "clear_screen", lambda: None)
+
+    def run(repo, screen, answers, user=None):
+        monkeypatch.setattr(main, "system_repo", repo)
+        monkeypatch.setattr(main, "current_user", user)
+        answers = iter(answers)
+        monkeypatch.setattr("builtins.input", lambda prompt="": next(answers))
+        screen()
+    return run
+
+
+def _student(repo):
+    return next(student for student in repo.find_all("users", {"role": "student"})
+                if repo.find_student_grades(student.id) and repo.find_student_courses(student.id))
+
+
+def _lecturer(repo):
+    return next(lecturer for lecturer in repo.find_all("users", {"role": "lecturer"})
+                if any(repo.find_course_rosters(lecturer.id).values()))
+
+
+def _screen_runs(repo):
+    """(budget name, screen, answers to its prompts, logged-in user) for every budgeted screen."""
+    student, lecturer = _student(repo), _lecturer(repo)
+    courses = repo.find_all("courses", {"lecturer_id": lecturer.id})
+    rosters = repo.find_course_rosters(lecturer.id)
+    course_choice = next(i for i, course in enumerate(courses, 1) if rosters[course.id])
+    return [
+        ("admin courses", main.admin_manage_courses, ["2", "", "0"], None),
+        ("admin groups", main.admin_manage_groups, ["2", "", "0"], None),
+        ("student grades", main.student_view_grades, [""], student),
+        ("student courses", main.student_view_my_courses, [""], student),
+        ("student grade history", main.student_view_grade_history, [""], student),
+        ("lecturer courses and students", main.lecturer_view_courses_and_students, [""], lecturer),
+        ("lecturer enter grade", main.lecturer_enter_grade, [str(course_choice), "0"], lecturer),
+    ]
+
+
+@pytest.mark.parametrize("preset", ["small", "department"])
+def test_screens_stay_within_their_query_budget(preset, screens, capsys):
+    repo = dataset_generator.fresh_repository(preset)
+    try:
+        for name, screen, answers, user in _screen_runs(repo):
+            with assert_query_budget(SCREEN_BUDGETS[name], name):
+                screens(repo, screen, answers, user)
+    finally:
+        repo.close()
+    assert "Database error" not in capsys.readouterr().out
+
+
+def test_a_lookup_per_row_is_flagged_as_n_plus_one(repo):
+    with pytest.raises(QueryBudgetExceeded, match="repeated statement shapes") as failure:
+        with assert_query_budget(10000, "course per grade"):
+            for grade in repo.find_all("grades"):
+                repo.find_one("courses", {"id": grade.course_id})
+    assert "possible N+1" in str(failure.value)
+    assert "issued" not in str(failure.value) # Well under the budget, and still flagged
+
+
+def test_connections_opened_before_the_scope_are_counted(threaded_repo):
+    threaded_repo.find_all("courses") # Opens this thread's kept connection
+    with QueryCounter() as counter:
+        threaded_repo.find_all("courses")
+        threaded_repo.find_one("users", {"id": 1})
+    assert counter.count == 2
@@ -0,0 +1,158 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from database_repository import DatabaseRepository
+from models import Group
+
+
+def _group_names(repo):
+    return {group.name for group in repo.find_all("groups")}
+
+
+def test_transaction_commits_every_call_together(db_file):
+    repo, other = DatabaseRepository(db_file), DatabaseRepository(db_file)
+    with repo.transaction():
+        repo.insert_one("groups", Group(None, "T-1"))
+        # Not visible to other sessions until the block ends (an in-memory database would make them wait)
+        assert "T-1" not in _group_names(other)
+        repo.insert_one("groups", Group(None, "T-2"))
+    assert {"T-1", "T-2"} <= _group_names(other)
+
+
+def test_transaction_rolls_back_when_the_block_raises(repo):
+    with pytest.raises(RuntimeError):
+        with repo.transaction():
+            repo.insert_one("groups", Group(None, "T-1"))
+            raise RuntimeError("stop")
+    assert "T-1" not in _group_names(repo)
+
+
+def test_a_failed_call_only_undoes_its_own_changes(repo):
+    existing = repo.find_all("groups")[0].name
+    with repo.transaction():
+        assert repo.insert_one("groups", Group(None, "T-1"))[0]
+        assert not repo.insert_one("groups", Group(None, existing))[0]
+        assert repo.insert_one("groups", Group(None, "T-2"))[0]
+    assert {"T-1", "T-2"} <= _group_names(repo)
+
+
+def test_nested_transaction_is_a_savepoint(repo):
+    with repo.transaction():
+        repo.insert_one("groups", Group(None, "outer"))
+        with pytest.raises(RuntimeError):
+            with repo.transaction():
+                repo.insert_one("groups", Group(None, "inner"))
+                raise RuntimeError("undo the inner block only")
+        with repo.transaction():
+            repo.insert_one("groups", Group(None, "inner kept"))
+    names = _group_names(repo)
+    assert {"outer", "inner kept"} <= names and "inner" not in names
+
+
+def test_readonly_transaction_writes_nothing(repo):
+    with repo.transaction(readonly=True):
+        repo.insert_one("groups", Group(None, "T-1"))
+    assert "T-1" not in _group_names(repo)
+
+
+def test_deleting_a_student_removes_their_grades_and_memberships(repo):
+    student_id = repo.find_all("grades")[0].student_id
+    assert repo.find_all("group_students", {"student_id": student_id})
+    assert repo.delete_one("users", student_id)
+    assert repo.find_all("grades", {"student_id": student_id}) == []
+    assert repo.find_all("group_students", {"student_id": student_id}) == []
+
+
+def test_deleting_a_course_removes_its_grades_and_group_links(repo):
+    course_id = repo.find_all("group_courses")[0]["course_id"]
+    assert repo.delete_one("courses", course_id)
+    assert repo.find_all("grades", {"course_id": course_id}) == []
+    assert repo.find_all("group_courses", {"course_id": course_id}) == []
+
+
+def test_deleting_a_lecturer_leaves_their_courses_unassigned(repo):
+    course = next(course for course in repo.find_all("courses") if course.lecturer_id)
+    assert repo.delete_one("users", course.lecturer_id)
+    assert repo.find_one("courses", {"id": course.id}).lecturer_id is None
+
+
+def test_deleting_a_group_removes_its_links(repo):
+    group = next(group for group in repo.find_all("groups") if group.student_ids and group.course_ids)
+    assert repo.delete_one("groups", group.id)
+    assert repo.find_all("group_students", {"group_id": group.id}) == []
+    assert repo.find_all("group_courses", {"group_id": group.id}) == []
+
+
+def test_assign_to_groups_reports_added_present_and_unknown(repo):
+    _, _, group_id = repo.insert_one("groups", Group(None, "New group"))
+    usernames = [student.username for student in repo.find_all("users", {"role": "student"})[:3]]
+    success, result = repo.assign_to_groups("group_students", usernames + ["nobody"], [group_id, 99999],
+                                            key="username")
+    assert success
+    assert result == {"added": 3, "already_present": 0, "unknown_members": ["nobody"], "unknown_groups": [99999]}
+    success, result = repo.assign_to_groups("group_students", usernames, [group_id], key="username")
+    assert (result["added"], result["already_present"]) == (0, 3)
+    assert len(repo.find_all("group_students", {"group_id": group_id})) == 3
+
+
+def test_assign_to_groups_rejects_unknown_tables_and_keys(repo):
+    assert repo.assign_to_groups("grades", [1], [1])[0] is False
+    assert repo.assign_to_groups("group_courses", ["x"], [1], key="username")[0] is False
+
+
+def test_rollover_dry_run_writes_nothing(repo):
+    groups = repo.find_all("groups")[:2]
+    before = len(repo.find_all("groups"))
+    success, report = repo.rollover_groups([g.id for g in groups], suffix=" (next)", dry_run=True)
+    assert success and report["dry_run"]
+    assert [new_name for _, _, new_name in report["groups"]] == [f"{g.name} (next)" for g in groups]
+    assert report["courses"] == sum(len(g.course_ids) for g in groups)
+    assert len(repo.find_all("groups")) == before
+
+
+def test_rollover_clones_groups_with_their_courses(repo):
+    groups = repo.find_all("groups")[:2]
+    success, report = repo.rollover_groups([g.id for g in groups], suffix=" (next)", copy_students=True)
+    assert success and report["conflicts"] == []
+    clones = {group.name: group for group in repo.find_all("groups")}
+    for group in groups:
+        clone = clones[f"{group.name} (next)"]
+        assert sorted(clone.course_ids) == sorted(group.course_ids)
+        assert sorted(clone.student_ids) == sorted(group.student_ids)
+    assert report["courses"] == sum(len(g.course_ids) for g in groups)
+
+
+def test_rollover_with_a_name_conflict_writes_nothing(repo):
+    first, second = repo.find_all("groups")[:2]
+    before = len(repo.find_all("groups"))
+    success, message = repo.rollover_groups([first.id], find=first.name, replace=second.name)
+    assert not success and "already exist" in message
+    assert len(repo.find_all("groups")) == before
+
+
+def test_sessions_opening_an_old_database_together_upgrade_it_once(tmp_path):
+    path = str(tmp_path / "academic_system.db")
+    blocker = sqlite3.connect(path)
+    blocker.execute("BEGIN IMMEDIATE") # Both sessions read the old version, then queue for the write lock
+    errors = []
+
+    def open_repository():
+        try:
+            DatabaseRepository(path).close()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=open_repository) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.3)
+    blocker.rollback()
+    blocker.close()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert DatabaseRepository(path).current_term() is not None
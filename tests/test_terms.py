@@ -0,0 +1,69 @@
+import os
+
+import pytest
+
+from database_repository import CLOSED_TERM_ERROR, DatabaseRepository
+from models import Course, Group, Student
+from term_archive import archive_term
+
+
+def _term_id(repo, name):
+    return next(term["id"] for term in repo.find_terms() if term["name"] == name)
+
+
+def test_new_term_writes_wait_for_the_closed_term_archive(tmp_path):
+    db_path = str(tmp_path / "terms.db")
+    repo = DatabaseRepository(db_path)
+    repo.start_term("T1")
+    _, _, student_id = repo.insert_one("users", Student(None, "Sara", "Roux", "sara.roux", "x"))
+    _, _, course_id = repo.insert_one("courses", Course(None, "Databases", None))
+    _, _, group_id = repo.insert_one("groups", Group(None, "G1"))
+    assert repo.assign_to_groups("group_students", [student_id], [group_id])[1]["added"] == 1
+    assert repo.upsert_grades_many([(student_id, course_id, 50.0)]) == (True, 1)
+
+    repo.start_term("T2")
+    # Both would otherwise write into T1's rows, which the archive then takes away
+    assert repo.assign_to_groups("group_students", [student_id], [group_id])[0] is False
+    success, message = repo.upsert_grades_many([(student_id, course_id, 90.0)])
+    assert not success and CLOSED_TERM_ERROR in message
+    assert repo.add_student_to_group(group_id, student_id) == (False, CLOSED_TERM_ERROR)
+
+    archive_term(db_path, _term_id(repo, "T1"))
+    assert repo.find_student_grades(student_id) == []
+    assert repo.assign_to_groups("group_students", [student_id], [group_id])[1]["added"] == 1
+    assert repo.upsert_grades_many([(student_id, course_id, 90.0)]) == (True, 1)
+
+    assert [grade["grade"] for grade in repo.find_student_grades(student_id)] == [90.0]
+    assert [(row["term"], row["grade"]) for row in repo.find_student_history(student_id)] == [("T1", 50.0), ("T2", 90.0)]
+    assert repo.find_term_grades(_term_id(repo, "T1"))[0]["grade"] == 50.0
+
+
+def test_current_term_rows_are_written_as_before(tmp_path):
+    repo = DatabaseRepository(str(tmp_path / "terms.db"))
+    _, _, student_id = repo.insert_one("users", Student(None, "Sara", "Roux", "sara.roux", "x"))
+    _, _, course_id = repo.insert_one("courses", Course(None, "Databases", None))
+    assert repo.upsert_grades_many([(student_id, course_id, 50.0)]) == (True, 1)
+    assert repo.upsert_grades_many([(student_id, course_id, 70.0)]) == (True, 1)
+    assert [grade["grade"] for grade in repo.find_student_grades(student_id)] == [70.0]
+
+
+def test_archive_moves_a_closed_term_out_of_the_live_tables(db_file):
+    repo = DatabaseRepository(db_file)
+    first_term = repo.current_term()
+    student_id = repo.find_all("grades")[0].student_id
+    history = repo.find_student_history(student_id)
+    live = {table: len(repo.find_all(table)) for table in ("grades", "group_students", "group_courses")}
+
+    with pytest.raises(ValueError):
+        archive_term(db_file, first_term["id"]) # Still the current term
+    repo.start_term("Next term")
+    result = archive_term(db_file, first_term["id"])
+
+    assert {table: result[table] for table in live} == live
+    assert all(repo.find_all(table) == [] for table in live)
+    assert os.path.exists(result["path"])
+    archived = next(term for term in repo.find_terms() if term["id"] == first_term["id"])
+    assert archived["status"] == "archived"
+    assert repo.find_student_history(student_id) == history # Now read from the archive file
+    with pytest.raises(ValueError):
+        archive_term(db_file, first_term["id"])
@@ -0,0 +1,90 @@
+import sqlite3
+import threading
+import time
+
+import database_repository
+from database_repository import get_db_connection
+from models import Group
+
+
+def _hold_write_lock(repo):
+    """Takes the database's write lock on a connection of its own, so queued writes pile up behind it."""
+    conn = get_db_connection(repo.db_path)
+    conn.execute("BEGIN IMMEDIATE")
+    return conn
+
+
+def test_queued_writes_are_committed_in_batches(threaded_repo):
+    before = dict(threaded_repo.write_stats)
+    blocker = _hold_write_lock(threaded_repo)
+    futures = [threaded_repo.submit_write("insert_one", "groups", Group(None, f"Batch {i}")) for i in range(20)]
+    time.sleep(0.2)
+    blocker.rollback()
+    blocker.close()
+    assert all(future.result(timeout=10)[0] for future in futures)
+    assert threaded_repo.write_stats["writes"] - before["writes"] == 20
+    # The writer took one write, waited for the lock, then found the other 19 queued
+    assert threaded_repo.write_stats["batches"] - before["batches"] <= 2
+    names = {group.name for group in threaded_repo.find_all("groups")}
+    assert {f"Batch {i}" for i in range(20)} <= names
+
+
+def test_a_failing_write_does_not_fail_its_batch(threaded_repo):
+    existing = threaded_repo.find_all("groups")[0].name
+    blocker = _hold_write_lock(threaded_repo)
+    futures = [threaded_repo.submit_write("insert_one", "groups", Group(None, name))
+               for name in ("Before", existing, "After")]
+    time.sleep(0.2)
+    blocker.rollback()
+    blocker.close()
+    results = [future.result(timeout=10) for future in futures]
+    assert [result[0] for result in results] == [True, False, True]
+    names = {group.name for group in threaded_repo.find_all("groups")}
+    assert {"Before", "After"} <= names
+
+
+def test_writes_from_many_threads_all_land(threaded_repo):
+    student_ids = [student.id for student in threaded_repo.find_all("users", {"role": "student"})[:40]]
+    course_id = threaded_repo.find_all("courses")[0].id
+    errors = []
+
+    def grade(ids):
+        for student_id in ids:
+            success, result = threaded_repo.upsert_grades_many([(student_id, course_id, 77.0)])
+            if not success:
+                errors.append(result)
+
+    threads = [threading.Thread(target=grade, args=(student_ids[i::8],)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    grades = {g.student_id: g.value for g in threaded_repo.find_all("grades", {"course_id": course_id})}
+    assert all(grades[student_id] == 77.0 for student_id in student_ids)
+
+
+def test_a_failed_batch_commit_is_replayed_write_by_write(threaded_repo, monkeypatch):
+    commit = database_repository._commit
+    failed = []
+
+    def commit_failing_once(conn):
+        # Only the writer's shared commit gets the raw connection; calls inside it get their savepoint wrapper
+        if isinstance(conn, sqlite3.Connection) and not failed:
+            failed.append(conn)
+            raise sqlite3.OperationalError("disk I/O error")
+        return commit(conn)
+
+    monkeypatch.setattr(database_repository, "_commit", commit_failing_once)
+    before = threaded_repo.write_stats["replayed"]
+    success, _, group_id = threaded_repo.insert_one("groups", Group(None, "Replayed"))
+    assert failed and success
+    assert threaded_repo.write_stats["replayed"] - before == 1
+    assert threaded_repo.find_one("groups", {"id": group_id}).name == "Replayed"
+
+
+def test_close_drops_the_in_memory_database(threaded_repo):
+    threaded_repo.insert_one("groups", Group(None, "Gone"))
+    path = threaded_repo.db_path
+    threaded_repo.close()
+    assert database_repository.DatabaseRepository(path).find_all("groups") == []
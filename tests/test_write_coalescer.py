@@ -0,0 +1,69 @@
+import queue
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import write_coalescer
+from write_coalescer import GradeWriteCoalescer
+
+
+@pytest.fixture
+def grade(repo):
+    """(student_id, course_id) of an existing grade."""
+    existing = repo.find_all("grades")[0]
+    return existing.student_id, existing.course_id
+
+
+def test_a_bad_grade_fails_only_its_own_save(repo, grade):
+    writer = GradeWriteCoalescer(repo, flush_interval=0.05, idle_gap=0.05)
+    student_id, course_id = grade
+    good = writer.submit(student_id, course_id, 55.0)
+    bad = writer.submit(10 ** 9, course_id, 60.0) # No such student
+    assert good.result(5) == (True, 1)
+    assert bad.result(5)[0] is False
+    writer.close()
+    assert repo.find_one("grades", {"student_id": student_id, "course_id": course_id}).value == 55.0
+
+
+def test_an_unexpected_error_reaches_the_caller_and_the_writer_keeps_going(repo, grade, monkeypatch):
+    writer = GradeWriteCoalescer(repo)
+    real_upsert = repo.upsert_grades_many
+    calls = []
+
+    def fail_once(grades):
+        calls.append(grades)
+        if len(calls) == 1:
+            raise RuntimeError("disk on fire")
+        return real_upsert(grades)
+
+    monkeypatch.setattr(repo, "upsert_grades_many", fail_once)
+    with pytest.raises(RuntimeError, match="disk on fire"):
+        writer.save(*grade, 41.0, timeout=5)
+    assert writer.save(*grade, 42.0, timeout=5) == (True, 1)
+    writer.close()
+
+
+class _SlowQueue(queue.Queue):
+    """Takes a moment to queue a save, so close() runs while a submit() is half-way through."""
+    def put(self, item, *args, **kwargs):
+        if item is not None:
+            time.sleep(0.05)
+        super().put(item, *args, **kwargs)
+
+
+def test_close_while_submitting_resolves_the_accepted_save(repo, grade, monkeypatch):
+    monkeypatch.setattr(write_coalescer, "queue", SimpleNamespace(Queue=_SlowQueue, Empty=queue.Empty))
+    writer = GradeWriteCoalescer(repo)
+    submitted = []
+    submitter = threading.Thread(target=lambda: submitted.append(writer.submit(*grade, 77.0)))
+    submitter.start()
+    time.sleep(0.01) # The submit is now queueing its save
+    writer.close()
+    submitter.join()
+
+    # Before the fix the save landed behind close()'s stop marker and its future never resolved
+    assert submitted[0].result(2) == (True, 1)
+    with pytest.raises(RuntimeError):
+        writer.submit(*grade, 50.0)
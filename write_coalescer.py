@@ -0,0 +1,223 @@
+import argparse
+import os
+import queue
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+
+import dataset_generator
+from database_repository import DatabaseRepository
+
+# A flush waits at most this long for more grades after the first one arrives...
+DEFAULT_FLUSH_INTERVAL = 0.005
+# ...but starts as soon as no new grade has arrived for this long (so a lone save is not held back)...
+DEFAULT_IDLE_GAP = 0.0005
+# ...or when this many grades are waiting
+DEFAULT_MAX_BATCH = 500
+
+
+class GradeWriteCoalescer:
+    """
+    Group commit for grade saves. Concurrent callers submit grades and get a Future; one writer thread
+    collects everything submitted within a few milliseconds and writes it with a single
+    upsert_grades_many transaction, so a burst of saves costs one commit (and one fsync) instead of one each.
+    Repeated saves of the same student and course within a flush are written once, with the last value.
+    Example:
+        writer = GradeWriteCoalescer(repo)
+        success, result = writer.save(student_id, course_id, 87.5)
+        writer.close()
+    """
+    def __init__(self, repo, flush_interval=DEFAULT_FLUSH_INTERVAL, max_batch=DEFAULT_MAX_BATCH,
+                 idle_gap=DEFAULT_IDLE_GAP):
+        self.repo = repo
+        self.flush_interval = flush_interval
+        self.idle_gap = idle_gap
+        self.max_batch = max_batch
+        self.stats = {"grades": 0, "flushes": 0, "coalesced": 0, "isolated": 0}
+        self._pending = queue.Queue()
+        self._in_flight = 0 # Submitted units not yet taken into a flush
+        self._closed = False
+        self._lock = threading.Lock() # Guards _in_flight and _closed
+        self._writer = threading.Thread(target=self._write_loop, name="grade-writer", daemon=True)
+        self._writer.start()
+
+    def submit_many(self, grades):
+        """
+        Queues (student_id, course_id, value) grades that must be written together, and returns a Future
+        resolving to what upsert_grades_many returned for them: (True, count) or (False, "Error message").
+        """
+        future = Future()
+        with self._lock:
+            # Checked and queued under one lock, so nothing can be queued behind close()'s stop marker
+            if self._closed:
+                raise RuntimeError("The grade writer is closed")
+            self._in_flight += 1
+            self._pending.put((list(grades), future))
+        return future
+
+    def submit(self, student_id, course_id, value):
+        """Queues one grade; see submit_many()."""
+        return self.submit_many([(student_id, course_id, value)])
+
+    def save(self, student_id, course_id, value, timeout=None):
+        """Saves one grade and waits for its commit. Returns (True, 1) or (False, "Error message")."""
+        return self.submit(student_id, course_id, value).result(timeout)
+
+    def flush(self, timeout=None):
+        """Waits until every grade submitted so far is written."""
+        self.submit_many([]).result(timeout)
+
+    def close(self):
+        """Writes what is still queued and stops the writer thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._pending.put(None)
+        self._writer.join()
+
+    def _write_loop(self):
+        while True:
+            first = self._pending.get()
+            if first is None:
+                return
+            units = [first]
+            size = len(first[0])
+            deadline = time.monotonic() + self.flush_interval
+            stop = False
+            while size < self.max_batch:
+                with self._lock:
+                    if len(units) >= self._in_flight:
+                        break # Everybody waiting is in this batch: there is nothing to wait for
+                remaining = min(deadline - time.monotonic(), self.idle_gap)
+                try:
+                    unit = self._pending.get(timeout=remaining) if remaining > 0 else self._pending.get_nowait()
+                except queue.Empty:
+                    break
+                if unit is None:
+                    stop = True
+                    break
+                units.append(unit)
+                size += len(unit[0])
+            with self._lock:
+                self._in_flight -= len(units)
+            self._flush(units)
+            if stop:
+                return
+
+    def _flush(self, units):
+        try:
+            self._write_units(units)
+        except Exception as e:
+            # Anything upsert_grades_many did not turn into (False, message): fail these callers, keep the writer
+            for _, future in units:
+                if not future.done():
+                    future.set_exception(e)
+
+    def _write_units(self, units):
+        latest = {}
+        for grades, _ in units:
+            for student_id, course_id, value in grades:
+                latest[(student_id, course_id)] = value # Later submissions win, as they would one by one
+        submitted = sum(len(grades) for grades, _ in units)
+        self.stats["grades"] += submitted
+        self.stats["coalesced"] += submitted - len(latest)
+        self.stats["flushes"] += 1
+        if not latest:
+            for _, future in units:
+                future.set_result((True, 0))
+            return
+
+        success, result = self.repo.upsert_grades_many(
+            [(student_id, course_id, value) for (student_id, course_id), value in latest.items()])
+        if success:
+            for grades, future in units:
+                future.set_result((True, len(grades)))
+            return
+        if len(units) == 1:
+            units[0][1].set_result((False, result))
+            return
+        # One bad grade (e.g. an unknown student) must not fail everybody else's: write each unit on its own
+        self.stats["isolated"] += len(units)
+        for grades, future in units:
+            future.set_result(self.repo.upsert_grades_many(grades))
+
+
+def _direct_saver(repo):
+    return lambda student_id, course_id, value: repo.upsert_grades_many([(student_id, course_id, value)])
+
+
+def run_grade_write_benchmark(db_path, writers=32, seconds=3.0, profile="durable"):
+    """
+    Has `writers` threads save single grades as fast as they can, first each in its own transaction,
+    then through a GradeWriteCoalescer. Returns {mode: {"grades_per_s", "p50_ms", "p95_ms", "failures"}}.
+    """
+    repo = DatabaseRepository(db_path, profile)
+    grades = [(g.student_id, g.course_id) for g in repo.find_all("grades")]
+    results = {}
+    for mode in ("transaction per save", "coalesced"):
+        coalescer = GradeWriteCoalescer(repo) if mode == "coalesced" else None
+        save = coalescer.save if coalescer else _direct_saver(repo)
+        latencies, failures = [], []
+        lock = threading.Lock()
+        deadline = time.perf_counter() + seconds
+
+        def write(seed):
+            rng = random.Random(seed)
+            own_latencies, own_failures = [], 0
+            while time.perf_counter() < deadline:
+                student_id, course_id = rng.choice(grades)
+                start = time.perf_counter()
+                success, _ = save(student_id, course_id, float(rng.randint(0, 100)))
+                own_latencies.append(time.perf_counter() - start)
+                own_failures += not success
+            with lock:
+                latencies.extend(own_latencies)
+                failures.append(own_failures)
+
+        threads = [threading.Thread(target=write, args=(i,)) for i in range(writers)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        if coalescer:
+            coalescer.close()
+
+        latencies.sort()
+        results[mode] = {
+            "grades_per_s": round(len(latencies) / elapsed, 1),
+            "p50_ms": round(latencies[len(latencies) // 2] * 1000, 2),
+            "p95_ms": round(latencies[int(len(latencies) * 0.95)] * 1000, 2),
+            "failures": sum(failures),
+        }
+        if coalescer:
+            results[mode]["flushes"] = coalescer.stats["flushes"]
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare grade saves per transaction with group-committed saves.")
+    parser.add_argument("--preset", choices=sorted(dataset_generator.PRESETS), default="department")
+    parser.add_argument("--writers", type=int, default=32, help="Concurrent threads saving grades.")
+    parser.add_argument("--seconds", type=float, default=3.0, help="How long each mode runs.")
+    parser.add_argument("--profile", default="durable",
+                        help="Connection profile; 'durable' fsyncs every commit, like a results-day server should.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        db_path = os.path.join(work_dir, "grade_writes.db")
+        print(f"Generating '{args.preset}' dataset...", flush=True)
+        dataset_generator.generate_preset(db_path, preset=args.preset)
+        results = run_grade_write_benchmark(db_path, args.writers, args.seconds, args.profile)
+    for mode, stats in results.items():
+        print(f"  {mode:<22} {stats['grades_per_s']:>9.1f} grades/s  p50 {stats['p50_ms']:>8.2f} ms  "
+              f"p95 {stats['p95_ms']:>8.2f} ms  failures {stats['failures']}"
+              + (f"  ({stats['flushes']} commits)" if "flushes" in stats else ""))
+
+
+if __name__ == "__main__":
+    main()